@@ -3,18 +3,27 @@ Dashboard application - FastAPI
 Full VPS control: manage scraper, jobs, files, and exports from browser
 """
 
-from fastapi import FastAPI, Request, HTTPException, Depends
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi import FastAPI, Request, HTTPException, Depends, Query
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from typing import Optional, List
 import os
 import csv
+import uuid
+import asyncio
 from pathlib import Path
 from datetime import datetime
-from scraper_controller import ScraperController
-from db import Database
+from scraper_controller import ScraperController, to_business_row
+from scraper_async import get_async_scraper, close_async_scraper
+from schemas import ScrapeRequest
+from resource_policy import TrafficMeter
+from db import Database, build_business_query
+from csv_stream import open_readonly, iter_csv_bytes, write_csv
+from db_writer import get_db_writer, close_db_writer
+from event_bus import event_bus, format_sse
+import timing
 from config import settings, ensure_directories
 
 # Import security modules
@@ -40,7 +49,7 @@ templates = Jinja2Templates(directory="templates")
 
 # Initialize controller
 controller = ScraperController()
-db = Database(str(settings.database_path))
+db = Database(str(settings.database_path), stats_ttl=settings.stats_cache_ttl)
 
 
 # ─── Pydantic Models ───────────────────────────────────────────
@@ -165,42 +174,112 @@ async def get_status(request: Request):
     return controller.get_status()
 
 
+# Plain def: these block on the writer thread, so FastAPI runs them in its threadpool
 @app.post("/api/start", dependencies=[Depends(verify_credentials)])
-async def start_scraper(request: Request):
+def start_scraper(request: Request):
     """Start scraper"""
     return controller.start()
 
 
 @app.post("/api/pause", dependencies=[Depends(verify_credentials)])
-async def pause_scraper(request: Request):
-    return controller.pause()
+async def pause_scraper(request: Request, worker_id: Optional[int] = None):
+    return controller.pause(worker_id)
 
 
 @app.post("/api/resume", dependencies=[Depends(verify_credentials)])
-async def resume_scraper(request: Request):
-    return controller.resume()
+async def resume_scraper(request: Request, worker_id: Optional[int] = None):
+    return controller.resume(worker_id)
 
 
 @app.post("/api/stop", dependencies=[Depends(verify_credentials)])
-async def stop_scraper(request: Request):
-    return controller.stop()
+async def stop_scraper(request: Request, worker_id: Optional[int] = None):
+    return controller.stop(worker_id)
 
 
 @app.post("/api/skip", dependencies=[Depends(verify_credentials)])
-async def skip_current(request: Request):
-    return controller.skip_current()
+async def skip_current(request: Request, worker_id: Optional[int] = None):
+    return controller.skip_current(worker_id)
 
 
 @app.post("/api/unstuck", dependencies=[Depends(verify_credentials)])
-async def force_unstuck(request: Request):
+def force_unstuck(request: Request):
     return controller.force_unstuck()
 
 
+# ─── Async Scrape API ─────────────────────────────────────────
+# Searches scheduled directly on the app's event loop (no worker thread)
+async_scrape_tasks = {}
+MAX_TRACKED_SCRAPE_TASKS = 200
+# Strong references to the running asyncio tasks (the loop only keeps weak ones)
+_running_scrapes = set()
+
+
+async def _save_scraped_businesses(businesses, category, city, country):
+    """Persist async scrape results through the writer thread"""
+    rows = [to_business_row(biz, category, city, country) for biz in businesses]
+    result = await get_db_writer().call_async('add_businesses', rows)
+    return result['inserted']
+
+
+async def _run_async_scrape(task_id: str, req: ScrapeRequest):
+    entry = async_scrape_tasks[task_id]
+    entry["status"] = "running"
+    traffic = TrafficMeter()
+    timer = timing.JobTimer()
+    try:
+        businesses = await get_async_scraper().scrape(
+            req.category, req.city, req.country, req.max_results, traffic=traffic, timer=timer
+        )
+        saved = await _save_scraped_businesses(
+            businesses, req.category, req.city, req.country
+        )
+        entry.update(status="completed", businesses_found=len(businesses), saved=saved)
+    except Exception as e:
+        logger.error(f"Async scrape {task_id} failed: {e}")
+        entry.update(status="failed", error=str(e))
+    finally:
+        entry["bytes_transferred"] = traffic.total_bytes
+        entry["timings"] = timer.rows()
+        entry["finished_at"] = datetime.now().isoformat()
+
+
+@app.post("/api/scrape", dependencies=[Depends(verify_credentials)])
+async def schedule_scrape(request: Request, scrape: ScrapeRequest):
+    """Schedule a search on the async engine and return its task id"""
+    # Forget the oldest finished tasks
+    finished = [k for k, v in async_scrape_tasks.items() if v.get("finished_at")]
+    for key in finished[:max(0, len(async_scrape_tasks) - MAX_TRACKED_SCRAPE_TASKS)]:
+        del async_scrape_tasks[key]
+
+    task_id = uuid.uuid4().hex[:12]
+    async_scrape_tasks[task_id] = {
+        "task_id": task_id,
+        "status": "queued",
+        "category": scrape.category,
+        "city": scrape.city,
+        "country": scrape.country,
+        "created_at": datetime.now().isoformat(),
+    }
+    task = asyncio.create_task(_run_async_scrape(task_id, scrape))
+    _running_scrapes.add(task)
+    task.add_done_callback(_running_scrapes.discard)
+    return {"success": True, "task_id": task_id}
+
+
+@app.get("/api/scrape/{task_id}", dependencies=[Depends(verify_credentials)])
+async def get_scrape_task(task_id: str):
+    """Status of an async scrape task"""
+    entry = async_scrape_tasks.get(task_id)
+    if entry is None:
+        raise HTTPException(404, "Unknown task")
+    return entry
+
+
 # ─── Job Management API ───────────────────────────────────────
 @app.post("/api/jobs/add", dependencies=[Depends(verify_credentials)])
 async def add_job(request: Request, job: JobRequest):
     """Add a single job"""
-    result = db.add_job(job.category, job.city, job.country)
+    result = await get_db_writer().call_async('add_job', job.category, job.city, job.country)
     if result:
         return {"success": True, "job_id": result}
     return {"success": False, "error": "Job already exists"}
@@ -238,15 +317,17 @@ async def bulk_add_jobs(request: Request):
     if not places:
         return {"success": False, "error": "No cities found in places.csv"}
 
-    added = 0
-    skipped = 0
-    for job in jobs:
-        for place in places:
-            result = db.add_job(job, place["city"], place["country"])
-            if result:
-                added += 1
-            else:
-                skipped += 1
+    def add_all(local_db):
+        return [
+            local_db.add_job(job, place["city"], place["country"])
+            for job in jobs
+            for place in places
+        ]
+
+    # One writer operation, one commit for the whole grid
+    results = await get_db_writer().call_async(add_all)
+    added = sum(1 for result in results if result)
+    skipped = len(results) - added
 
     return {
         "success": True,
@@ -265,11 +346,9 @@ async def delete_job(request: Request):
     if not job_id:
         return {"success": False, "error": "Missing job_id"}
 
-    cursor = db.conn.cursor()
-    cursor.execute("DELETE FROM jobs WHERE id = ? AND status = 'pending'", (job_id,))
-    db.conn.commit()
+    deleted = await get_db_writer().call_async('delete_pending_jobs', [job_id])
 
-    if cursor.rowcount > 0:
+    if deleted > 0:
         return {"success": True}
     return {"success": False, "error": "Job not found or not pending"}
 
@@ -282,33 +361,34 @@ async def delete_multiple_jobs(request: Request):
     if not job_ids:
         return {"success": False, "error": "No job IDs provided"}
 
-    placeholders = ",".join("?" * len(job_ids))
-    cursor = db.conn.cursor()
-    cursor.execute(
-        f"DELETE FROM jobs WHERE id IN ({placeholders}) AND status = 'pending'",
-        job_ids
-    )
-    db.conn.commit()
+    deleted = await get_db_writer().call_async('delete_pending_jobs', job_ids)
 
-    return {"success": True, "deleted": cursor.rowcount}
+    return {"success": True, "deleted": deleted}
 
 
 @app.post("/api/jobs/clear-completed", dependencies=[Depends(verify_credentials)])
 async def clear_completed_jobs(request: Request):
     """Clear completed and failed jobs"""
-    cursor = db.conn.cursor()
-    cursor.execute("DELETE FROM jobs WHERE status IN ('completed', 'failed')")
-    db.conn.commit()
-    return {"success": True, "deleted": cursor.rowcount}
+    deleted = await get_db_writer().call_async('clear_finished_jobs')
+    return {"success": True, "deleted": deleted}
 
 
 from proxy_scraper import fetch_proxies, verify_proxies
 from proxy_manager import get_proxy_manager
+from proxy_store import proxy_store
 
 from scheduler_service import scheduler
+from business_refresher import business_refresher
 
 # Start scheduler
 app.add_event_handler("startup", scheduler.start)
+app.add_event_handler("startup", event_bus.attach_loop)
+app.add_event_handler("startup", proxy_store.start)
+app.add_event_handler("startup", business_refresher.start)
+app.add_event_handler("shutdown", business_refresher.stop)
+app.add_event_handler("shutdown", close_async_scraper)
+app.add_event_handler("shutdown", proxy_store.stop)
+app.add_event_handler("shutdown", close_db_writer)
 
 # ─── Settings API ─────────────────────────────────────────────
 @app.get("/api/settings", dependencies=[Depends(verify_credentials)])
@@ -355,6 +435,12 @@ async def update_settings(request: Request):
     return {"success": False, "error": "Invalid value"}
 
 
+@app.get("/api/proxies/health", dependencies=[Depends(verify_credentials)])
+async def api_proxy_health(request: Request):
+    """Per-proxy health (EWMA latency/success, ban score, breaker state), best first"""
+    return get_proxy_manager().get_state()
+
+
 @app.post("/api/proxies/fetch", dependencies=[Depends(verify_credentials)])
 def api_fetch_proxies(request: Request):
     """Fetch and verify free proxies from external sources (Runs in threadpool)"""
@@ -368,7 +454,12 @@ def api_fetch_proxies(request: Request):
             
         # Verify proxies
         logger.info(f"Verifying {len(raw_proxies)} proxies...")
-        working_proxies = verify_proxies(raw_proxies)
+        working_proxies = verify_proxies(
+            raw_proxies,
+            settings.proxy_verify_concurrency,
+            settings.proxy_verify_target or None,
+            settings.proxy_verify_timeout,
+        )
         
         if not working_proxies:
             return {"success": False, "error": "Found proxies but none passed verification test"}
@@ -425,57 +516,70 @@ async def save_file(filename: str, request: Request):
 
 
 # ─── Export API ────────────────────────────────────────────────
+def _export_filters(cities=None, categories=None, has_website=None):
+    """Filters shared by the file export and the streaming export"""
+    return {"cities": cities or None, "categories": categories or None, "has_website": has_website}
+
+
 @app.post("/api/export", dependencies=[Depends(verify_credentials)])
 async def export_data(request: Request):
     """Export data to CSV"""
     data = await request.json()
-
-    cursor = db.conn.cursor()
-    query = "SELECT * FROM businesses WHERE 1=1"
-    params = []
-
-    if data.get("cities"):
-        placeholders = ",".join("?" * len(data["cities"]))
-        query += f" AND city IN ({placeholders})"
-        params.extend(data["cities"])
-
-    if data.get("categories"):
-        placeholders = ",".join("?" * len(data["categories"]))
-        query += f" AND category IN ({placeholders})"
-        params.extend(data["categories"])
-
-    if data.get("has_website") is not None:
-        if data["has_website"]:
-            query += ' AND website IS NOT NULL AND website != ""'
-        else:
-            query += ' AND (website IS NULL OR website = "")'
-
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-
-    if not rows:
-        raise HTTPException(400, "No data to export")
+    query, params = build_business_query(_export_filters(
+        data.get("cities"), data.get("categories"), data.get("has_website")
+    ))
 
     # Generate filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"export_{timestamp}.csv"
     filepath = settings.export_dir / filename
 
-    # Write CSV
-    with open(filepath, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(dict(row))
+    # Write CSV chunk by chunk on a read-only connection
+    def write():
+        conn = open_readonly(str(settings.database_path))
+        try:
+            return write_csv(conn, query, params, filepath, settings.export_chunk_size)
+        finally:
+            conn.close()
+
+    count = await asyncio.to_thread(write)
+    if not count:
+        filepath.unlink(missing_ok=True)
+        raise HTTPException(400, "No data to export")
 
     return {
         "success": True,
         "filename": filename,
-        "count": len(rows),
+        "count": count,
         "download_url": f"/download/{filename}",
     }
 
 
+@app.get("/api/export/stream", dependencies=[Depends(verify_credentials)])
+async def export_stream(
+    cities: Optional[List[str]] = Query(None),
+    categories: Optional[List[str]] = Query(None),
+    has_website: Optional[bool] = None,
+    gzip: bool = False,
+):
+    """Stream the filtered businesses as CSV (optionally gzipped) without buffering"""
+    query, params = build_business_query(_export_filters(cities, categories, has_website))
+
+    def chunks():
+        conn = open_readonly(str(settings.database_path))
+        try:
+            yield from iter_csv_bytes(conn, query, params, settings.export_chunk_size, compress=gzip)
+        finally:
+            conn.close()
+
+    filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv" + (".gz" if gzip else "")
+    return StreamingResponse(
+        chunks(),
+        media_type="application/gzip" if gzip else "text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @app.get("/download/{filename}")
 async def download_file(filename: str):
     """Download exported file"""
@@ -491,12 +595,7 @@ async def api_stats(request: Request):
     """Get full statistics for live updates"""
     stats = db.get_statistics()
     scraper = controller.get_status()
-
-    cursor = db.conn.cursor()
-    cursor.execute("""
-        SELECT status, COUNT(*) as count FROM jobs GROUP BY status
-    """)
-    jobs = {row['status']: row['count'] for row in cursor.fetchall()}
+    jobs = stats['jobs']
 
     return {
         "total_businesses": stats['total_businesses'],
@@ -513,6 +612,76 @@ async def api_stats(request: Request):
     }
 
 
+@app.get("/api/jobs/{job_id}/timings", dependencies=[Depends(verify_credentials)])
+async def api_job_timings(job_id: int):
+    """Where a job's time went, per phase and proxy (slowest first)"""
+    return {"job_id": job_id, "phases": db.get_job_timings(job_id)}
+
+
+# ─── Business Refresh ─────────────────────────────────────────
+@app.post("/api/businesses/refresh", dependencies=[Depends(verify_credentials)])
+async def start_business_refresh(limit: Optional[int] = Query(None, ge=1, le=5000)):
+    """Re-visit the stalest businesses (no-website leads first) in the background"""
+    if not business_refresher.schedule(limit):
+        return {"success": False, "message": "A refresh pass is already running"}
+    return {"success": True, "limit": limit or settings.business_refresh_batch}
+
+
+@app.get("/api/businesses/refresh", dependencies=[Depends(verify_credentials)])
+async def business_refresh_status():
+    """Whether a refresh pass is running, and the latest pass's counts"""
+    return {"running": business_refresher.busy, "last_pass": business_refresher.last_pass}
+
+
+@app.get("/api/businesses/changes", dependencies=[Depends(verify_credentials)])
+async def business_changes(business_id: Optional[int] = None, limit: int = Query(100, ge=1, le=1000)):
+    """Field changes found by refresh visits, newest first"""
+    return {"changes": db.get_business_changes(business_id, limit)}
+
+
+# ─── Metrics ──────────────────────────────────────────────────
+@app.get("/metrics", dependencies=[Depends(verify_credentials)], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Phase timing histograms in Prometheus text format"""
+    return PlainTextResponse(timing.metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# ─── Live Event Feed ──────────────────────────────────────────
+SSE_KEEPALIVE_SECONDS = 15
+
+
+@app.get("/api/events", dependencies=[Depends(verify_credentials)])
+async def live_events(request: Request):
+    """
+    Server-Sent Events stream. Sends one 'snapshot' (current status and
+    statistics), then only deltas published by the scraper controller.
+    """
+    queue = event_bus.subscribe()
+
+    async def stream():
+        try:
+            snapshot = {"id": 0, "type": "snapshot", "data": {
+                **controller.get_status(),
+                "db": db.get_statistics(),
+            }}
+            yield format_sse(snapshot)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ─── Health Check ─────────────────────────────────────────────
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,310 @@
+"""
+Persistent Playwright browser pool
+Keeps a warm Chromium instance and hands out isolated contexts (one per proxy)
+"""
+
+import os
+import uuid
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict
+from playwright.sync_api import sync_playwright, Browser, BrowserContext
+
+from config import settings
+from proxy_manager import ProxyConfig
+from resource_policy import ResourcePolicy
+from session_cache import get_session_cache
+from replay_harness import har_context_options, attach_replay
+import timing
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+]
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+VIEWPORT = {"width": 1920, "height": 1080}
+
+DIRECT_KEY = "direct"
+
+
+def _process_tree_rss_mb(marker: str) -> float:
+    """
+    Sum the resident memory (MB) of the processes whose command line
+    contains `marker` and of everything below them.
+    Reads /proc directly, so it returns 0 on platforms without procfs.
+    """
+    children: Dict[int, list] = {}
+    rss_kb: Dict[int, int] = {}
+    roots = []
+    needle = marker.encode()
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0.0
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status", "r") as f:
+                ppid, rss = None, 0
+                for line in f:
+                    if line.startswith("PPid:"):
+                        ppid = int(line.split()[1])
+                    elif line.startswith("VmRSS:"):
+                        rss = int(line.split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                if needle in f.read():
+                    roots.append(int(entry))
+        except (OSError, ValueError):
+            continue
+        pid = int(entry)
+        rss_kb[pid] = rss
+        if ppid is not None:
+            children.setdefault(ppid, []).append(pid)
+
+    total_kb = 0
+    seen = set()
+    stack = roots
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total_kb += rss_kb.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total_kb / 1024
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium with one cached context per proxy.
+
+    Playwright's sync API is bound to the thread that started it, so a pool
+    must only be used from the thread that created it (see get_browser_pool).
+
+    The browser is recycled (closed and lazily relaunched) when any limit is hit:
+    - after `max_jobs` finished jobs
+    - after `max_pages` opened pages
+    - when this pool's browser process tree grows past `max_rss_mb`
+      (found by a per-pool tag switch on the Chromium command line, so
+      pools on other worker threads are not counted)
+    """
+
+    def __init__(
+        self,
+        max_jobs: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        max_rss_mb: Optional[int] = None,
+        max_contexts: Optional[int] = None,
+    ):
+        self.max_jobs = max_jobs if max_jobs is not None else settings.browser_recycle_after_jobs
+        self.max_pages = max_pages if max_pages is not None else settings.browser_recycle_after_pages
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else settings.browser_max_rss_mb
+        self.max_contexts = (
+            max_contexts if max_contexts is not None else settings.browser_pool_max_contexts
+        )
+
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._contexts: "OrderedDict[str, BrowserContext]" = OrderedDict()
+        self._warm = set()  # context keys started from a saved session
+        self._saved = set()  # context keys whose session is already cached
+        self.policy = ResourcePolicy()
+        self.sessions = get_session_cache()
+
+        # Counters since the last (re)launch
+        self.jobs_served = 0
+        self.pages_opened = 0
+        self.launches = 0
+        self.tag = f"--browser-pool-tag={os.getpid()}-{uuid.uuid4().hex[:12]}"
+
+    # ─── Browser lifecycle ─────────────────────────────────────
+    def _ensure_browser(self) -> Browser:
+        """Start Playwright and launch Chromium if not already running"""
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+
+        logger.info("🚀 Launching pooled Chromium instance")
+        with timing.span("browser_launch"):
+            self._browser = self._playwright.chromium.launch(
+                headless=settings.headless_mode,
+                args=LAUNCH_ARGS + [self.tag],
+            )
+        self._contexts.clear()
+        self._warm.clear()
+        self._saved.clear()
+        self.jobs_served = 0
+        self.pages_opened = 0
+        self.launches += 1
+        return self._browser
+
+    def recycle(self, reason: str = "manual"):
+        """Close the browser; the next request relaunches it"""
+        logger.info(f"♻️ Recycling browser ({reason})")
+        for context in list(self._contexts.values()):
+            try:
+                context.close()
+            except Exception:
+                pass
+        self._contexts.clear()
+        self._warm.clear()
+        self._saved.clear()
+
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logger.debug(f"Browser close error: {e}")
+        self._browser = None
+
+    def close(self):
+        """Shut down the browser and Playwright driver"""
+        self.recycle("shutdown")
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"Playwright stop error: {e}")
+            self._playwright = None
+
+    # ─── Contexts ──────────────────────────────────────────────
+    @staticmethod
+    def _key(proxy: Optional[ProxyConfig]) -> str:
+        return str(proxy) if proxy else DIRECT_KEY
+
+    def get_context(self, proxy: Optional[ProxyConfig] = None) -> BrowserContext:
+        """
+        Return the warm context bound to `proxy` (or the direct connection),
+        creating it if needed (from the saved session, when there is one).
+        Least recently used contexts are evicted.
+        """
+        browser = self._ensure_browser()
+        key = self._key(proxy)
+
+        context = self._contexts.get(key)
+        if context is not None:
+            self._contexts.move_to_end(key)
+            return context
+
+        options = {"viewport": VIEWPORT, "user_agent": USER_AGENT, "locale": self.sessions.locale}
+        if proxy:
+            options["proxy"] = proxy.to_playwright_config()
+        context_timer = timing.Stopwatch()
+        state = self.sessions.get(key)
+        if state is not None:
+            options["storage_state"] = state
+            self._warm.add(key)
+            self._saved.add(key)
+        har_key = str(proxy) if proxy else None
+        options.update(har_context_options(settings.har_mode, settings.har_path, har_key))
+        context = browser.new_context(**options)
+        if self.policy.enabled:
+            context.route("**/*", self.policy.handle_route)
+        if settings.har_mode == "replay":
+            # registered last, so it answers first
+            attach_replay(context, settings.har_path, har_key)
+        context_timer.lap("new_context")
+        self._contexts[key] = context
+
+        while len(self._contexts) > self.max_contexts:
+            old_key, old_context = self._contexts.popitem(last=False)
+            self._warm.discard(old_key)
+            self._saved.discard(old_key)
+            logger.debug(f"Evicting browser context: {old_key}")
+            try:
+                old_context.close()
+            except Exception:
+                pass
+
+        return context
+
+    def new_page(self, proxy: Optional[ProxyConfig] = None):
+        """Open a page in the context bound to `proxy`"""
+        context = self.get_context(proxy)
+        page = context.new_page()
+        page.set_default_timeout(settings.page_load_timeout * 1000)
+        self.pages_opened += 1
+        return page
+
+    def is_warm(self, proxy: Optional[ProxyConfig] = None) -> bool:
+        """True when the proxy's context started from a saved session (consent done)"""
+        return self._key(proxy) in self._warm
+
+    def save_session(self, proxy: Optional[ProxyConfig] = None):
+        """Cache the context's cookies once it got past consent (once per context)"""
+        key = self._key(proxy)
+        context = self._contexts.get(key)
+        if context is None or key in self._saved or not self.sessions.enabled:
+            return
+        try:
+            self.sessions.put(key, context.storage_state())
+            self._saved.add(key)
+        except Exception as e:
+            logger.debug(f"Could not read storage state for {key}: {e}")
+
+    def expire_session(self, proxy: Optional[ProxyConfig] = None):
+        """The context met the consent wall after all: stop treating it as warm, save it again"""
+        key = self._key(proxy)
+        self._warm.discard(key)
+        self._saved.discard(key)
+
+    def discard_context(self, proxy: Optional[ProxyConfig] = None):
+        """Drop the context for a proxy that failed (cookies/session may be burnt)"""
+        key = self._key(proxy)
+        self.sessions.discard(key)
+        self._warm.discard(key)
+        self._saved.discard(key)
+        context = self._contexts.pop(key, None)
+        if context is not None:
+            try:
+                context.close()
+            except Exception:
+                pass
+
+    # ─── Recycle policy ────────────────────────────────────────
+    def job_finished(self):
+        """Count a finished job and recycle the browser if a limit was reached"""
+        self.jobs_served += 1
+        if self._browser is None:
+            return
+
+        if self.max_jobs and self.jobs_served >= self.max_jobs:
+            self.recycle(f"{self.jobs_served} jobs")
+        elif self.max_pages and self.pages_opened >= self.max_pages:
+            self.recycle(f"{self.pages_opened} pages")
+        elif self.max_rss_mb:
+            rss = _process_tree_rss_mb(self.tag)
+            if rss > self.max_rss_mb:
+                self.recycle(f"RSS {rss:.0f} MB > {self.max_rss_mb} MB")
+
+
+# One pool per thread (Playwright sync objects are thread-bound)
+_local = threading.local()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Get or create the browser pool owned by the calling thread"""
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = BrowserPool()
+        _local.pool = pool
+    return pool
+
+
+def close_browser_pool():
+    """Close the calling thread's browser pool, if any"""
+    pool = getattr(_local, "pool", None)
+    if pool is not None:
+        pool.close()
+        _local.pool = None
@@ -0,0 +1,183 @@
+"""
+Incremental business refresh
+Keeps stored listings current at a cost proportional to churn: picks
+businesses by staleness and value (no-website leads first), opens each
+one straight from its maps_url on the async engine (no search, no
+scrolling) and updates changed fields in place, logging every change to
+business_changes.
+
+    python business_refresher.py --limit 200     # one pass from the shell
+
+The dashboard runs a pass every BUSINESS_REFRESH_INTERVAL seconds
+(0 = off) and on POST /api/businesses/refresh.
+"""
+
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from typing import Optional, Dict
+
+from config import settings
+import timing
+from db_writer import get_db_writer, close_db_writer
+from page_waits import PolitenessBudget
+from resource_policy import TrafficMeter
+from scraper_async import get_async_scraper, close_async_scraper
+from logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+class BusinessRefresher:
+    """Refresh passes over the stalest / most valuable businesses"""
+
+    def __init__(self):
+        self.running = False
+        self.task = None
+        self.current: Optional[asyncio.Task] = None
+        self.last_pass: Dict = {}
+
+    @property
+    def busy(self) -> bool:
+        return self.current is not None and not self.current.done()
+
+    def start(self):
+        """Periodic passes (FastAPI startup hook); no-op when the interval is 0"""
+        if not self.running and settings.business_refresh_interval > 0:
+            self.running = True
+            self.task = asyncio.create_task(self._run_loop())
+            logger.info(
+                f"✅ Business refresh every {settings.business_refresh_interval}s "
+                f"({settings.business_refresh_batch} per pass)"
+            )
+
+    def stop(self):
+        self.running = False
+        if self.task is not None:
+            self.task.cancel()
+
+    async def _run_loop(self):
+        while self.running:
+            try:
+                await asyncio.sleep(settings.business_refresh_interval)
+                if self.schedule():
+                    await self.current
+            except asyncio.CancelledError:
+                logger.info("Business refresh task cancelled")
+                break
+            except Exception as e:
+                logger.error(f"🔄 Business refresh error: {e}")
+                await asyncio.sleep(60)
+
+    def schedule(self, limit: Optional[int] = None) -> bool:
+        """Start a pass in the background; False if one is already running"""
+        if self.busy:
+            return False
+        self.current = asyncio.create_task(self.run_pass(limit))
+        return True
+
+    async def run_pass(self, limit: Optional[int] = None) -> Dict:
+        """Visit up to `limit` due businesses; returns the pass statistics"""
+        limit = limit or settings.business_refresh_batch
+        writer = get_db_writer()
+        scraper = get_async_scraper()
+        politeness = PolitenessBudget()
+        traffic = TrafficMeter()
+        started = time.perf_counter()
+
+        due = await writer.call_async(
+            "get_businesses_to_refresh",
+            settings.business_refresh_after,
+            limit,
+            settings.business_refresh_max_failures,
+            settings.business_refresh_retry_after,
+        )
+        stats = {
+            "started_at": datetime.now().isoformat(),
+            "due": len(due),
+            "visited": 0,
+            "changed": 0,
+            "unchanged": 0,
+            "failed": 0,
+            "errors": 0,
+            "fields_changed": {},
+        }
+        self.last_pass = stats
+        logger.info(f"🔄 Refreshing {len(due)} businesses (stale for {settings.business_refresh_after}s)")
+
+        async def refresh_one(business: Dict):
+            try:
+                fields = await scraper.visit_place(business["maps_url"], business["name"], traffic=traffic)
+            except Exception as e:
+                # Proxy / transport trouble says nothing about the listing: retry
+                # after BUSINESS_REFRESH_RETRY_AFTER, without counting a failure
+                logger.debug(f"Refresh of {business['name']} failed: {e}")
+                stats["errors"] += 1
+                await writer.call_async("mark_refresh_attempt", business["id"])
+                return
+            stats["visited"] += 1
+            if fields is None:
+                # The page loaded but showed no place: the listing may be gone
+                stats["failed"] += 1
+                await writer.call_async("mark_refresh_failed", business["id"])
+            else:
+                changed = await writer.call_async("apply_business_refresh", business["id"], fields)
+                if changed:
+                    stats["changed"] += 1
+                    for field in changed:
+                        stats["fields_changed"][field] = stats["fields_changed"].get(field, 0) + 1
+                    logger.info(f"  ✏️ {business['name']}: {', '.join(changed)} changed")
+                else:
+                    stats["unchanged"] += 1
+            with timing.span("politeness"):
+                await politeness.pause_async()
+
+        # Concurrency is capped by the async engine's page semaphore; the
+        # visit tasks inherit the pass's timer
+        timer = timing.JobTimer()
+        timing_token = timing.activate(timer)
+        try:
+            await asyncio.gather(*(refresh_one(business) for business in due))
+        finally:
+            timing.deactivate(timing_token)
+
+        stats["seconds"] = round(time.perf_counter() - started, 1)
+        stats["bytes_transferred"] = traffic.total_bytes
+        logger.info(
+            f"🔄 Refresh pass: {stats['visited']} visited, {stats['changed']} changed, "
+            f"{stats['unchanged']} unchanged, {stats['failed']} without a place panel, "
+            f"{stats['errors']} errors (retried later) in {stats['seconds']}s "
+            f"({traffic.summary()})"
+        )
+        logger.info(f"⏱️ Refresh pass: {timer.summary()}")
+        return stats
+
+
+# Singleton instance
+business_refresher = BusinessRefresher()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh stale businesses by visiting their Maps pages")
+    parser.add_argument("--limit", type=int, default=settings.business_refresh_batch)
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    async def _run():
+        try:
+            return await business_refresher.run_pass(args.limit)
+        finally:
+            await close_async_scraper()
+
+    try:
+        asyncio.run(_run())
+    finally:
+        close_db_writer()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ Centralized configuration management using Pydantic Settings
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from pathlib import Path
+from typing import List
 
 
 class Settings(BaseSettings):
@@ -13,24 +14,81 @@ class Settings(BaseSettings):
 
     # Database
     database_path: Path = Path("business_leads.db")
+    db_writer_queue_size: int = 1000  # pending writes before submitters block
+    db_writer_max_batch: int = 200  # writes applied per group commit
+    stats_cache_ttl: float = 2.0  # seconds dashboard statistics are served from cache
 
     # Scraping Configuration
     max_results_per_job: int = 50
     headless_mode: bool = False
     scroll_pause_min: int = 2
-    scroll_pause_max: int = 5
-    request_delay_min: int = 3
+    scroll_pause_max: int = 5  # upper bound on waiting for new cards after a scroll
+    request_delay_min: int = 3  # politeness pause per business (anti-detection)
     request_delay_max: int = 7
+    politeness_budget_per_job: float = 0  # cap on politeness seconds per job (0 = no cap)
+    network_idle_timeout_ms: int = 1500  # best-effort settle after page-ready events
+
+    # Extraction: "network" reads Maps XHR payloads and clicks a card only
+    # when a required field is missing; "click" always opens the detail panel
+    extraction_mode: str = "network"
+    network_required_fields: List[str] = ["address", "phone"]
+
+    # Bandwidth: request filtering applied to every browser context
+    block_resource_types: List[str] = ["image", "media", "font"]
+    block_url_patterns: List[str] = [
+        r"google-analytics\.com",
+        r"googletagmanager\.com",
+        r"doubleclick\.net",
+        r"/gen_204",
+        r"/maps/vt[/?]",  # map tiles
+        r"khms\d*\.google",  # satellite tiles
+        r"streetviewpixels",
+    ]
+    allow_url_patterns: List[str] = []
+    proxy_cost_per_gb: float = 0.0  # for cost-per-lead logging
+
+    # Worker Pool
+    scraper_workers: int = 1
+    proxy_cooldown_min: int = 30  # seconds an exit (proxy or direct) rests between jobs
+    proxy_cooldown_max: int = 90
+
+    # Async engine (pages in flight on one event loop)
+    async_max_concurrent_pages: int = 8
+
+    # Browser Pool (warm Chromium reused across jobs)
+    browser_recycle_after_jobs: int = 50
+    browser_recycle_after_pages: int = 500
+    browser_max_rss_mb: int = 1500
+    browser_pool_max_contexts: int = 4
+    browser_locale: str = "en-US"
+    session_cache_dir: Path = Path("sessions")  # saved cookies/consent per proxy + locale
+    session_cache_ttl: int = 86400  # seconds a saved session is reused (0 = off)
+    har_mode: str = "off"  # off | record | replay (offline fixtures, see replay_harness)
+    har_path: Path = Path("fixtures/maps.har")
 
     # Proxy Configuration
     proxies_file: Path = Path("proxies.txt")
     rotate_proxy_after: int = 10
-    max_proxy_failures: int = 3
+    max_proxy_failures: int = 3  # consecutive failures before the breaker opens
+    proxy_ewma_alpha: float = 0.3  # weight of the latest job in latency/success averages
+    proxy_breaker_cooldown: int = 300  # seconds an open breaker waits before a trial job
+    proxy_breaker_max_cooldown: int = 3600  # cap for the doubling on repeated trips
+    proxy_health_flush_interval: int = 30  # seconds between batched writes to the proxies table
+    proxy_verify_concurrency: int = 500  # probes in flight (keep below the open-files ulimit)
+    proxy_verify_timeout: float = 4
+    proxy_verify_target: int = 0  # stop verifying once this many work (0 = check all)
+    proxy_refresh_interval: int = 600  # seconds between incremental refresh steps
+    proxy_fetch_interval: int = 3600  # seconds between re-fetching the free proxy sources
+    proxy_refresh_batch: int = 5000  # max candidates verified per step
+    proxy_recheck_after: int = 1800  # a candidate is stale after this (doubles per failed check)
+    proxy_retire_after: int = 3  # consecutive failed checks before a candidate is dropped
 
     # Timeouts
     page_load_timeout: int = 45
     element_wait_timeout: int = 15
     job_timeout_seconds: int = 1800
+    job_lease_seconds: int = 300  # running job is requeued if not heartbeated for this long
+    job_heartbeat_interval: int = 60
 
     # Server Configuration
     host: str = "0.0.0.0"
@@ -43,8 +101,24 @@ class Settings(BaseSettings):
     log_max_bytes: int = 10 * 1024 * 1024  # 10 MB
     log_backup_count: int = 5
 
+    # Search result cache (per normalized category × city × country, see search_cache)
+    search_cache_mode: str = "delta"  # off | skip (fresh searches are not re-run) | delta (open only unseen listings)
+    search_cache_ttl: int = 7 * 86400  # seconds a search / listing stays fresh (0 = off)
+
+    # Incremental business refresh (business_refresher.py)
+    business_refresh_interval: int = 0  # seconds between automatic passes (0 = only on demand)
+    business_refresh_after: int = 30 * 86400  # a business is stale this long after its last visit
+    business_refresh_batch: int = 200  # businesses visited per pass
+    business_refresh_max_failures: int = 3  # visits without a place panel before a listing is left alone
+    business_refresh_retry_after: int = 3600  # seconds before retrying a visit that errored (proxy/page trouble)
+
+    # Raw capture archive (offline re-extraction with reextract.py)
+    raw_archive_enabled: bool = False
+    raw_archive_dir: Path = Path("raw_archive")
+
     # Export Configuration
     export_dir: Path = Path("exports")
+    export_chunk_size: int = 1000  # rows per fetchmany() when exporting
 
     # Security
     admin_username: str
@@ -0,0 +1,79 @@
+"""
+Chunked CSV export
+Reads a query with fetchmany() and emits CSV a chunk at a time, so memory
+stays flat no matter how many rows match.
+"""
+
+import csv
+import io
+import zlib
+import sqlite3
+import logging
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+BOM = "\ufeff"  # Excel needs it to detect UTF-8 (same as encoding='utf-8-sig')
+
+
+def open_readonly(db_path: str) -> sqlite3.Connection:
+    """
+    Read-only connection for long exports. check_same_thread is off because
+    a streaming response may resume the generator on another thread.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def iter_csv(conn: sqlite3.Connection, query: str, params=(), chunk_size: int = 1000) -> Iterator[str]:
+    """Yield the header, then one CSV text block per fetchmany() chunk"""
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow([column[0] for column in cursor.description])
+    yield BOM + buffer.getvalue()
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(tuple(row) for row in rows)
+        yield buffer.getvalue()
+
+
+def iter_csv_bytes(conn: sqlite3.Connection, query: str, params=(), chunk_size: int = 1000,
+                   compress: bool = False) -> Iterator[bytes]:
+    """UTF-8 encoded CSV chunks, gzip-compressed when `compress` is set"""
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    for text in iter_csv(conn, query, params, chunk_size):
+        data = text.encode("utf-8")
+        if gzip is not None:
+            data = gzip.compress(data)
+        if data:
+            yield data
+    if gzip is not None:
+        yield gzip.flush()
+
+
+def write_csv(conn: sqlite3.Connection, query: str, params, output_file,
+              chunk_size: int = 1000) -> int:
+    """Write a query result to a CSV file chunk by chunk; returns the row count"""
+    count = 0
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    with open(output_file, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow([column[0] for column in cursor.description])
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.writerows(tuple(row) for row in rows)
+            count += len(rows)
+    return count
+
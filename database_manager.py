@@ -4,10 +4,10 @@ Professional SQLite database for commercial lead generation business
 """
 
 import sqlite3
-import pandas as pd
 from datetime import datetime
 import os
 import logging
+from csv_stream import write_csv
 
 logging.basicConfig(level=logging.INFO)
 
@@ -273,13 +273,12 @@ class BusinessDatabase:
                 query += " AND data_quality_score >= ?"
                 params.append(filters['min_quality_score'])
         
-        df = pd.read_sql_query(query, self.conn, params=params)
-        
         if output_file is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_file = f"export_{timestamp}.csv"
         
-        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        # Chunked write: never holds the whole result in memory
+        record_count = write_csv(self.conn, query, params, output_file)
         
         # Log the export
         cursor = self.conn.cursor()
@@ -294,7 +293,7 @@ class BusinessDatabase:
             filters.get('city') if filters else None,
             filters.get('country') if filters else None,
             str(filters),
-            len(df),
+            record_count,
             'CSV',
             output_file,
             customer_name,
@@ -302,8 +301,8 @@ class BusinessDatabase:
         ))
         self.conn.commit()
         
-        logging.info(f"Exported {len(df)} records to {output_file}")
-        return output_file, len(df)
+        logging.info(f"Exported {record_count} records to {output_file}")
+        return output_file, record_count
     
     def get_statistics(self):
         """Get database statistics"""
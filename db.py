@@ -2,15 +2,114 @@
 Database operations
 """
 import sqlite3
-from datetime import datetime
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import logging
 
+from field_parser import canonical_maps_url
+
 logger = logging.getLogger(__name__)
 
 
+def build_business_query(filters=None, columns='*'):
+    """
+    SELECT over businesses for export filters. Accepts single values
+    (city, category) or lists (cities, categories) plus has_website.
+    Returns (query, params).
+    """
+    query = f'SELECT {columns} FROM businesses WHERE 1=1'
+    params = []
+    filters = filters or {}
+
+    for single, plural, column in (('city', 'cities', 'city'), ('category', 'categories', 'category')):
+        values = filters.get(plural) or ([filters[single]] if filters.get(single) else [])
+        if values:
+            placeholders = ','.join('?' * len(values))
+            query += f' AND {column} IN ({placeholders})'
+            params.extend(values)
+
+    if filters.get('has_website') is not None:
+        if filters['has_website']:
+            query += ' AND website IS NOT NULL AND website != ""'
+        else:
+            query += ' AND (website IS NULL OR website = "")'
+
+    return query, params
+
+
+# Counters kept current by triggers so dashboard polls never scan tables
+_BUMP = "INSERT INTO stats (key, value) VALUES ({key}, {delta}) ON CONFLICT(key) DO UPDATE SET value = value + excluded.value;"
+_HAS_WEBSITE = "({row}.website IS NOT NULL AND {row}.website != '')"
+
+
+def maps_url_key(url):
+    """Stored form of a maps_url: canonical for Maps links, anything else as is"""
+    if isinstance(url, str) and url.startswith('http'):
+        return canonical_maps_url(url)
+    return url
+
+
+def _bump(key, delta):
+    return _BUMP.format(key=key, delta=delta)
+
+
+STATS_TRIGGERS = {
+    'trg_stats_business_insert': f'''
+        AFTER INSERT ON businesses BEGIN
+            {_bump("'businesses'", 1)}
+            {_bump("'with_website'", _HAS_WEBSITE.format(row='NEW'))}
+            {_bump("'rating_sum'", 'COALESCE(NEW.rating, 0)')}
+            {_bump("'rating_count'", '(NEW.rating IS NOT NULL)')}
+        END''',
+    'trg_stats_business_delete': f'''
+        AFTER DELETE ON businesses BEGIN
+            {_bump("'businesses'", -1)}
+            {_bump("'with_website'", '-' + _HAS_WEBSITE.format(row='OLD'))}
+            {_bump("'rating_sum'", '-COALESCE(OLD.rating, 0)')}
+            {_bump("'rating_count'", '-(OLD.rating IS NOT NULL)')}
+        END''',
+    'trg_stats_business_update': f'''
+        AFTER UPDATE OF website, rating ON businesses BEGIN
+            {_bump("'with_website'", _HAS_WEBSITE.format(row='NEW') + ' - ' + _HAS_WEBSITE.format(row='OLD'))}
+            {_bump("'rating_sum'", 'COALESCE(NEW.rating, 0) - COALESCE(OLD.rating, 0)')}
+            {_bump("'rating_count'", '(NEW.rating IS NOT NULL) - (OLD.rating IS NOT NULL)')}
+        END''',
+    'trg_stats_job_insert': f'''
+        AFTER INSERT ON jobs BEGIN
+            {_bump("'jobs:' || NEW.status", 1)}
+        END''',
+    'trg_stats_job_delete': f'''
+        AFTER DELETE ON jobs BEGIN
+            {_bump("'jobs:' || OLD.status", -1)}
+        END''',
+    'trg_stats_job_update': f'''
+        AFTER UPDATE OF status ON jobs WHEN OLD.status IS NOT NEW.status BEGIN
+            {_bump("'jobs:' || OLD.status", -1)}
+            {_bump("'jobs:' || NEW.status", 1)}
+        END''',
+}
+
+
+# Refresh ordering expressions; get_businesses_to_refresh must use them verbatim
+# so SQLite matches them to idx_business_refresh
+NO_WEBSITE = "(website IS NULL OR website IN ('', 'N/A'))"
+STALENESS = 'COALESCE(last_updated, scraped_at)'
+
+
+# Columns save_proxy_health() writes (cost_per_gb is left to the operator)
+PROXY_HEALTH_FIELDS = (
+    'proxy', 'host', 'port', 'username', 'success_count', 'fail_count',
+    'consecutive_failures', 'latency_ewma', 'success_ewma', 'ban_score',
+    'breaker_state', 'breaker_trips', 'open_until', 'last_used', 'is_active',
+)
+
+
 class Database:
-    def __init__(self, db_path='business_leads.db'):
+    def __init__(self, db_path='business_leads.db', stats_ttl=2.0):
         self.db_path = db_path
+        self.stats_ttl = stats_ttl
+        self._stats_cache = None  # (expires_at, statistics)
         self.conn = None
         self.connect()
         self.create_tables()
@@ -20,6 +119,8 @@ class Database:
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
         self.conn.execute('PRAGMA journal_mode=WAL')
         self.conn.row_factory = sqlite3.Row
+        self._business_fields = None  # column layout, cached per connection
+        self._group_commit = False  # inside group_commit(): methods don't commit
         logger.info(f"Connected to database: {self.db_path}")
     
     def create_tables(self):
@@ -61,98 +162,331 @@ class Database:
             )
         ''')
         
+        # Proxy health, flushed by proxy_store so it survives restarts
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS proxies (
+                proxy TEXT PRIMARY KEY,
+                host TEXT NOT NULL,
+                port INTEGER NOT NULL,
+                username TEXT,
+                success_count INTEGER DEFAULT 0,
+                fail_count INTEGER DEFAULT 0,
+                consecutive_failures INTEGER DEFAULT 0,
+                latency_ewma REAL,
+                success_ewma REAL,
+                ban_score REAL DEFAULT 0,
+                breaker_state TEXT DEFAULT 'closed',
+                breaker_trips INTEGER DEFAULT 0,
+                open_until REAL DEFAULT 0,
+                last_used REAL,
+                is_active BOOLEAN DEFAULT 1,
+                cost_per_gb REAL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Per-job phase timings (timing.JobTimer rows)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_timings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id INTEGER NOT NULL,
+                phase TEXT NOT NULL,
+                proxy TEXT,
+                count INTEGER NOT NULL,
+                total_seconds REAL NOT NULL,
+                max_seconds REAL NOT NULL,
+                recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_timings_job ON job_timings(job_id)')
+
+        # Search result cache (search_cache.py): which listings a search found, and when.
+        # Independent of jobs, so it survives clearing or re-adding them
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_cache (
+                query_key TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                city TEXT NOT NULL,
+                country TEXT,
+                result_count INTEGER DEFAULT 0,
+                last_scraped TIMESTAMP NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_results (
+                query_key TEXT NOT NULL,
+                maps_url TEXT NOT NULL,
+                name TEXT,
+                seen_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (query_key, maps_url)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_results_seen ON search_results(query_key, seen_at)')
+
+        # Columns added after the first release
+        self._ensure_columns('businesses', {
+            'rating': 'REAL',
+            'reviews': 'INTEGER',
+            # Incremental refresh (business_refresher.py)
+            'last_updated': 'TIMESTAMP',
+            'refresh_failures': 'INTEGER DEFAULT 0',
+            'last_refresh_attempt': 'TIMESTAMP',
+        })
+
+        self._canonicalize_maps_urls(cursor)
+
+        # Field changes found by refresh visits
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS business_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                business_id INTEGER NOT NULL,
+                field TEXT NOT NULL,
+                old_value TEXT,
+                new_value TEXT,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_business_changes_business ON business_changes(business_id)')
+        self._ensure_columns('jobs', {
+            'bytes_transferred': 'INTEGER DEFAULT 0',
+            'requests_blocked': 'INTEGER DEFAULT 0',
+            # Leases: a running job belongs to worker_id until lease_expires_at
+            'worker_id': 'TEXT',
+            'lease_expires_at': 'TIMESTAMP',
+            'heartbeat_at': 'TIMESTAMP',
+        })
+
         # Create indexes
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_business_city ON businesses(city)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_business_category ON businesses(category)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_business_website ON businesses(website)')
+        # Refresh order (get_businesses_to_refresh): lead first, then stalest
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_business_refresh
+            ON businesses({NO_WEBSITE}, {STALENESS})
+        ''')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_status ON jobs(status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_lease ON jobs(status, lease_expires_at)')
+
+        # Statistics maintained incrementally by triggers
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats (
+                key TEXT PRIMARY KEY,
+                value REAL NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_stats_%'")
+        existing_triggers = {row[0] for row in cursor.fetchall()}
+        for name, body in STATS_TRIGGERS.items():
+            if name not in existing_triggers:
+                cursor.execute(f'CREATE TRIGGER {name} {body}')
+        if existing_triggers != set(STATS_TRIGGERS):
+            # Counters only stay right from the moment the triggers exist
+            self._rebuild_statistics(cursor)
         
         self.conn.commit()
         logger.info("Database tables created")
     
     
-    def add_business(self, data):
-        """Add business to database with retry logic"""
-        import time
-        retries = 5
-        
-        # Check which columns exist (read only, usually safe)
+    def _ensure_columns(self, table, columns):
+        """Add columns missing from databases created by older versions"""
         cursor = self.conn.cursor()
-        cursor.execute("PRAGMA table_info(businesses)")
-        columns = [row[1] for row in cursor.fetchall()]
-        
-        # Build dynamic insert based on available columns
-        fields = ['name', 'category', 'city', 'country', 'address', 'phone', 'website', 'maps_url']
-        values = [
-            data.get('name'),
-            data.get('category'),
-            data.get('city'),
-            data.get('country'),
-            data.get('address'),
-            data.get('phone'),
-            data.get('website'),
-            data.get('maps_url')
-        ]
-        
-        # Add rating and reviews if columns exist
-        if 'rating' in columns:
-            fields.append('rating')
-            values.append(data.get('rating'))
-        if 'reviews' in columns:
-            fields.append('reviews')
-            values.append(data.get('reviews'))
-        
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, declaration in columns.items():
+            if name not in existing:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {declaration}')
+                logger.info(f"Added column {table}.{name}")
+
+    def _canonicalize_maps_urls(self, cursor):
+        """
+        Rewrite maps_urls stored before every scraper canonicalized them
+        (tracking params, viewport, http), so the UNIQUE dedup matches new
+        inserts. A row whose canonical URL is already taken keeps its own.
+        """
+        cursor.execute('''
+            SELECT id, maps_url FROM businesses
+            WHERE (maps_url LIKE '%?%' AND (maps_url NOT LIKE '%/?cid=%' OR maps_url LIKE '%&%'))
+               OR maps_url LIKE '%/@%' OR maps_url LIKE '%#%'
+               OR maps_url LIKE 'http:%' OR maps_url LIKE '%!%%' ESCAPE '!'
+        ''')
+        updates = []
+        for row in cursor.fetchall():
+            canonical = maps_url_key(row['maps_url'])
+            if canonical != row['maps_url']:
+                updates.append((canonical, row['id']))
+        if updates:
+            cursor.executemany('UPDATE OR IGNORE businesses SET maps_url = ? WHERE id = ?', updates)
+            logger.info(f"Canonicalized {len(updates)} stored maps_urls")
+
+    # ─── Transactions ──────────────────────────────────────────
+    @contextmanager
+    def group_commit(self):
+        """
+        Run several writes as one transaction with a single commit.
+        Write methods called inside the block skip their own BEGIN/COMMIT.
+        """
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute('BEGIN IMMEDIATE')
+        self._group_commit = True
+        try:
+            yield self
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self._group_commit = False
+
+    def _begin(self, cursor):
+        """Take the write lock up front (no-op inside group_commit)"""
+        if self._group_commit:
+            return
+        if self.conn.in_transaction:
+            self.conn.commit()
+        cursor.execute('BEGIN IMMEDIATE')
+
+    def _commit(self):
+        if not self._group_commit:
+            self.conn.commit()
+
+    def _rollback(self):
+        if not self._group_commit:
+            self.conn.rollback()
+
+    def _insert_fields(self):
+        """Business columns we write, checked once per connection"""
+        if self._business_fields is None:
+            cursor = self.conn.cursor()
+            cursor.execute("PRAGMA table_info(businesses)")
+            columns = [row[1] for row in cursor.fetchall()]
+
+            fields = ['name', 'category', 'city', 'country', 'address', 'phone', 'website', 'maps_url']
+            # Older databases may predate rating/reviews
+            for optional in ('rating', 'reviews'):
+                if optional in columns:
+                    fields.append(optional)
+            self._business_fields = fields
+        return self._business_fields
+
+    def add_business(self, data):
+        """
+        Add one business; returns its id, or None for a duplicate or error.
+        BEGIN IMMEDIATE waits out a busy database on the connection timeout.
+        """
+        fields = self._insert_fields()
+        values = [data.get(field) for field in fields]
+        values[fields.index('maps_url')] = maps_url_key(data.get('maps_url'))
+
         placeholders = ','.join(['?' for _ in fields])
         field_names = ','.join(fields)
-        
-        for attempt in range(retries):
-            try:
-                cursor = self.conn.cursor()
-                cursor.execute(f'''
-                    INSERT INTO businesses ({field_names})
-                    VALUES ({placeholders})
-                ''', values)
-                
-                self.conn.commit()
-                return cursor.lastrowid
-            except sqlite3.OperationalError as e:
-                if "locked" in str(e).lower():
-                    if attempt == retries - 1:
-                        logger.error(f"DB locked after {retries} attempts")
-                        return None
-                    sleep_time = 0.2 * (2 ** attempt)
-                    time.sleep(sleep_time)
-                else:
-                    logger.error(f"DB Error: {e}")
-                    return None
-            except sqlite3.IntegrityError:
-                return None
-            except Exception as e:
-                logger.error(f"Error adding business: {e}")
-                return None
+
+        cursor = self.conn.cursor()
+        try:
+            self._begin(cursor)
+            cursor.execute(f'''
+                INSERT INTO businesses ({field_names})
+                VALUES ({placeholders})
+            ''', values)
+            self._commit()
+            return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            self._rollback()
+            return None
+        except Exception as e:
+            self._rollback()
+            logger.error(f"Error adding business: {e}")
+            return None
     
+    def add_businesses(self, rows):
+        """
+        Insert many businesses in one transaction.
+        Rows that collide with an existing maps_url or (name, address) are
+        skipped. Returns {'inserted': n, 'duplicates': n}.
+        """
+        rows = list(rows)
+        if not rows:
+            return {'inserted': 0, 'duplicates': 0}
+
+        fields = self._insert_fields()
+        placeholders = ','.join(['?' for _ in fields])
+        field_names = ','.join(fields)
+        url_index = fields.index('maps_url')
+        values = []
+        for row in rows:
+            value = [row.get(field) for field in fields]
+            value[url_index] = maps_url_key(value[url_index])
+            values.append(value)
+
+        # BEGIN IMMEDIATE waits on the connection's busy timeout instead of
+        # failing half-way through the batch
+        cursor = self.conn.cursor()
+        try:
+            self._begin(cursor)
+            cursor.executemany(f'''
+                INSERT OR IGNORE INTO businesses ({field_names})
+                VALUES ({placeholders})
+            ''', values)
+            # rowcount leaves out the stats triggers' writes (total_changes does not)
+            inserted = cursor.rowcount
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+
+        return {'inserted': inserted, 'duplicates': len(rows) - inserted}
+
+    def update_business_fields(self, rows):
+        """
+        Apply re-extracted fields to stored businesses, matched by canonical
+        maps_url (see _canonicalize_maps_urls). A field is only overwritten with a real value (None/'N/A' keep the
+        stored one). Returns the number of businesses that changed.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        fields = [f for f in ('address', 'phone', 'website', 'rating', 'reviews')
+                  if f in self._insert_fields()]
+        assignments = ', '.join(f'{f} = COALESCE(?, {f})' for f in fields)
+        changed = ' OR '.join(f'COALESCE(?, {f}) IS NOT {f}' for f in fields)
+        values = []
+        for row in rows:
+            new = [None if row.get(f) in (None, '', 'N/A') else row[f] for f in fields]
+            values.append(new + [maps_url_key(row['maps_url'])] + new)
+
+        cursor = self.conn.cursor()
+        try:
+            self._begin(cursor)
+            cursor.executemany(f'''
+                UPDATE businesses SET {assignments}
+                WHERE maps_url = ? AND ({changed})
+            ''', values)
+            updated = cursor.rowcount
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+        return updated
+
     def add_job(self, category, city, country):
-        """Add job to queue with retry logic"""
-        import time
-        retries = 5
-        for attempt in range(retries):
-            try:
-                cursor = self.conn.cursor()
-                cursor.execute('''
-                    INSERT INTO jobs (category, city, country, status)
-                    VALUES (?, ?, ?, 'pending')
-                ''', (category, city, country))
-                self.conn.commit()
-                return cursor.lastrowid
-            except sqlite3.OperationalError as e:
-                if "locked" in str(e).lower():
-                    if attempt == retries - 1:
-                        raise
-                    time.sleep(0.2 * (2 ** attempt))
-                else:
-                    raise
-            except sqlite3.IntegrityError:
-                return None
+        """Add job to queue; returns its id, or None if it already exists"""
+        cursor = self.conn.cursor()
+        try:
+            self._begin(cursor)
+            cursor.execute('''
+                INSERT INTO jobs (category, city, country, status)
+                VALUES (?, ?, ?, 'pending')
+            ''', (category, city, country))
+            self._commit()
+            return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            self._rollback()
+            return None
+        except Exception:
+            self._rollback()
+            raise
     
     def get_pending_jobs(self):
         """Get all pending jobs"""
@@ -160,110 +494,420 @@ class Database:
         cursor.execute('SELECT * FROM jobs WHERE status = "pending" ORDER BY id')
         return [dict(row) for row in cursor.fetchall()]
     
-    def update_job_status(self, job_id, status, businesses_found=None, error=None):
-        """Update job status with retry logic"""
-        import time
-        retries = 5
-        for attempt in range(retries):
-            try:
-                cursor = self.conn.cursor()
-                if status == 'running':
-                    cursor.execute('''
-                        UPDATE jobs 
-                        SET status = ?, started_at = ?, businesses_found = COALESCE(?, businesses_found)
-                        WHERE id = ?
-                    ''', (status, datetime.now(), businesses_found, job_id))
-                elif status == 'completed':
-                    cursor.execute('''
-                        UPDATE jobs 
-                        SET status = ?, completed_at = ?, businesses_found = ?
-                        WHERE id = ?
-                    ''', (status, datetime.now(), businesses_found, job_id))
-                elif status == 'failed':
-                    cursor.execute('''
-                        UPDATE jobs 
-                        SET status = ?, completed_at = ?, error_message = ?
-                        WHERE id = ?
-                    ''', (status, datetime.now(), error, job_id))
-                else:
-                    cursor.execute('UPDATE jobs SET status = ? WHERE id = ?', (status, job_id))
-                self.conn.commit()
-                return
-            except sqlite3.OperationalError as e:
-                if "locked" in str(e).lower():
-                    if attempt == retries - 1:
-                        logger.error(f"Failed to update job status: {e}")
-                        return
-                    time.sleep(0.2 * (2 ** attempt))
-                else:
-                    logger.error(f"DB Error: {e}")
-                    return
+    def claim_next_job(self, worker_id=None, lease_seconds=300):
+        """
+        Atomically move the oldest pending job to 'running' and return it.
+        BEGIN IMMEDIATE takes the write lock up front, so two workers (or two
+        processes) can never claim the same row. The claim is a lease owned by
+        `worker_id`; jobs whose lease expired are requeued first.
+        Returns None if the queue is empty.
+        """
+        cursor = self.conn.cursor()
+        try:
+            self._begin(cursor)
+            now = datetime.now()
+            self._requeue_expired(cursor, now)
+
+            cursor.execute('SELECT * FROM jobs WHERE status = "pending" ORDER BY id LIMIT 1')
+            row = cursor.fetchone()
+            if row is None:
+                self._commit()
+                return None
+
+            lease_expires_at = now + timedelta(seconds=lease_seconds)
+            cursor.execute('''
+                UPDATE jobs
+                SET status = 'running', started_at = ?, worker_id = ?,
+                    lease_expires_at = ?, heartbeat_at = ?
+                WHERE id = ? AND status = 'pending'
+            ''', (now, worker_id, lease_expires_at, now, row['id']))
+            self._commit()
+
+            job = dict(row)
+            job.update(
+                status='running',
+                started_at=now,
+                worker_id=worker_id,
+                lease_expires_at=lease_expires_at,
+                heartbeat_at=now,
+            )
+            return job
+        except Exception:
+            self._rollback()
+            raise
+
+    def _requeue_expired(self, cursor, now):
+        cursor.execute('''
+            UPDATE jobs SET status = 'pending', worker_id = NULL, lease_expires_at = NULL
+            WHERE status = 'running' AND lease_expires_at IS NOT NULL AND lease_expires_at < ?
+        ''', (now,))
+        if cursor.rowcount:
+            logger.warning(f"Requeued {cursor.rowcount} job(s) with expired leases")
+        return cursor.rowcount
+
+    def requeue_expired_jobs(self):
+        """Return running jobs whose worker stopped heartbeating to the queue"""
+        cursor = self.conn.cursor()
+        count = self._requeue_expired(cursor, datetime.now())
+        self._commit()
+        return count
+
+    def heartbeat_job(self, job_id, worker_id, lease_seconds=300):
+        """
+        Extend a running job's lease. Returns False if the worker no longer
+        owns it (the lease expired and the job was requeued or reclaimed).
+        """
+        now = datetime.now()
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET heartbeat_at = ?, lease_expires_at = ?
+            WHERE id = ? AND worker_id = ? AND status = 'running'
+        ''', (now, now + timedelta(seconds=lease_seconds), job_id, worker_id))
+        self._commit()
+        return cursor.rowcount > 0
+
+    def count_jobs(self, status=None):
+        """Count jobs, optionally filtered by status"""
+        cursor = self.conn.cursor()
+        if status:
+            cursor.execute('SELECT COUNT(*) FROM jobs WHERE status = ?', (status,))
+        else:
+            cursor.execute('SELECT COUNT(*) FROM jobs')
+        return cursor.fetchone()[0]
 
+    def update_job_status(self, job_id, status, businesses_found=None, error=None):
+        """Update job status (lock waits are left to the connection's busy timeout)"""
+        cursor = self.conn.cursor()
+        try:
+            self._begin(cursor)
+            if status == 'running':
+                cursor.execute('''
+                    UPDATE jobs 
+                    SET status = ?, started_at = ?, businesses_found = COALESCE(?, businesses_found)
+                    WHERE id = ?
+                ''', (status, datetime.now(), businesses_found, job_id))
+            elif status == 'completed':
+                cursor.execute('''
+                    UPDATE jobs 
+                    SET status = ?, completed_at = ?, businesses_found = ?
+                    WHERE id = ?
+                ''', (status, datetime.now(), businesses_found, job_id))
+            elif status == 'failed':
+                cursor.execute('''
+                    UPDATE jobs 
+                    SET status = ?, completed_at = ?, error_message = ?
+                    WHERE id = ?
+                ''', (status, datetime.now(), error, job_id))
+            else:
+                cursor.execute('UPDATE jobs SET status = ? WHERE id = ?', (status, job_id))
+            if status != 'running':
+                # Finished or requeued: release the lease
+                cursor.execute('''
+                    UPDATE jobs SET lease_expires_at = NULL,
+                        worker_id = CASE WHEN status = 'pending' THEN NULL ELSE worker_id END
+                    WHERE id = ?
+                ''', (job_id,))
+            self._commit()
+        except sqlite3.OperationalError as e:
+            self._rollback()
+            logger.error(f"Failed to update job status: {e}")
     
-    def get_statistics(self):
-        """Get database statistics"""
+    def record_job_traffic(self, job_id, bytes_transferred, requests_blocked=0):
+        """Store the bandwidth a job used through its proxy"""
+        try:
+            self.conn.execute('''
+                UPDATE jobs SET bytes_transferred = ?, requests_blocked = ?
+                WHERE id = ?
+            ''', (bytes_transferred, requests_blocked, job_id))
+            self._commit()
+        except sqlite3.OperationalError as e:
+            logger.error(f"Failed to record job traffic: {e}")
+
+    def delete_pending_jobs(self, job_ids):
+        """Delete queued jobs by id; running/finished jobs are left alone"""
+        if not job_ids:
+            return 0
+        placeholders = ','.join('?' * len(job_ids))
         cursor = self.conn.cursor()
+        cursor.execute(
+            f"DELETE FROM jobs WHERE id IN ({placeholders}) AND status = 'pending'",
+            list(job_ids)
+        )
+        self._commit()
+        return cursor.rowcount
+
+    def clear_finished_jobs(self):
+        """Delete completed and failed jobs"""
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM jobs WHERE status IN ('completed', 'failed')")
+        self._commit()
+        return cursor.rowcount
+
+    def reset_running_jobs(self):
+        """Return every running job to the queue"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET status = 'pending', worker_id = NULL, lease_expires_at = NULL
+            WHERE status = 'running'
+        ''')
+        self._commit()
+        return cursor.rowcount
+
+    # ─── Job timings ───────────────────────────────────────────
+    def save_job_timings(self, job_id, rows):
+        """Store one job's phase timings (replaces an earlier record of the same job)"""
+        cursor = self.conn.cursor()
+        self._begin(cursor)
+        try:
+            cursor.execute('DELETE FROM job_timings WHERE job_id = ?', (job_id,))
+            cursor.executemany('''
+                INSERT INTO job_timings (job_id, phase, proxy, count, total_seconds, max_seconds)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [
+                (job_id, r['phase'], r['proxy'], r['count'], r['total_seconds'], r['max_seconds'])
+                for r in rows
+            ])
+            self._commit()
+        except sqlite3.Error:
+            self._rollback()
+            raise
+        return len(rows)
+
+    def get_job_timings(self, job_id):
+        """Phase timings of a job, slowest phase first"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT phase, proxy, count, total_seconds, max_seconds
+            FROM job_timings WHERE job_id = ?
+            ORDER BY total_seconds DESC
+        ''', (job_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    # ─── Incremental refresh ───────────────────────────────────
+    def get_businesses_to_refresh(self, stale_seconds, limit, max_failures=3, retry_after=3600):
+        """
+        Businesses due for a refresh visit: not confirmed for `stale_seconds`,
+        no-website leads first, then the stalest. One range scan of
+        idx_business_refresh per group, so no table scan or sort. Businesses
+        whose last visit errored within `retry_after` seconds are passed over,
+        so they don't head every pass.
+        """
+        cursor = self.conn.cursor()
+        due = []
+        for no_website in (1, 0):
+            if len(due) >= limit:
+                break
+            cursor.execute(f'''
+                SELECT id, name, maps_url, address, phone, website
+                FROM businesses
+                WHERE {NO_WEBSITE} = ?
+                  AND {STALENESS} < datetime('now', ?)
+                  AND maps_url LIKE 'http%'
+                  AND COALESCE(refresh_failures, 0) < ?
+                  AND (last_refresh_attempt IS NULL OR last_refresh_attempt < datetime('now', ?))
+                ORDER BY {STALENESS}
+                LIMIT ?
+            ''', (
+                no_website, f'-{int(stale_seconds)} seconds', max_failures,
+                f'-{int(retry_after)} seconds', limit - len(due),
+            ))
+            due.extend(dict(row) for row in cursor.fetchall())
+        return due
+
+    def apply_business_refresh(self, business_id, fields):
+        """
+        Write a refresh visit's fields: changed values are updated in place
+        and logged to business_changes; a missing value ('N/A') never
+        overwrites a stored one. Returns the names of the changed fields.
+        """
+        columns = [f for f in ('address', 'phone', 'website', 'rating', 'reviews')
+                   if f in self._insert_fields()]
+        cursor = self.conn.cursor()
+        self._begin(cursor)
+        try:
+            cursor.execute(f'SELECT {", ".join(columns)} FROM businesses WHERE id = ?', (business_id,))
+            row = cursor.fetchone()
+            if row is None:
+                self._commit()
+                return []
+            changes = [
+                (f, row[f], fields[f]) for f in columns
+                if fields.get(f) not in (None, '', 'N/A') and fields[f] != row[f]
+            ]
+            assignments = ''.join(f'{f} = ?, ' for f, _, _ in changes)
+            cursor.execute(f'''
+                UPDATE businesses
+                SET {assignments}last_updated = CURRENT_TIMESTAMP, refresh_failures = 0,
+                    last_refresh_attempt = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', [new for _, _, new in changes] + [business_id])
+            cursor.executemany('''
+                INSERT INTO business_changes (business_id, field, old_value, new_value)
+                VALUES (?, ?, ?, ?)
+            ''', [(business_id, f, old, new) for f, old, new in changes])
+            self._commit()
+        except sqlite3.Error:
+            self._rollback()
+            raise
+        return [f for f, _, _ in changes]
+
+    def mark_refresh_failed(self, business_id):
+        """Count a refresh visit that found no place panel"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE businesses SET refresh_failures = COALESCE(refresh_failures, 0) + 1,
+                last_refresh_attempt = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (business_id,))
+        self._commit()
+
+    def mark_refresh_attempt(self, business_id):
+        """Note a refresh visit that errored (proxy/page trouble): backs off, not a failure"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'UPDATE businesses SET last_refresh_attempt = CURRENT_TIMESTAMP WHERE id = ?',
+            (business_id,),
+        )
+        self._commit()
+
+    def get_business_changes(self, business_id=None, limit=100):
+        """Latest refresh changes, newest first (optionally for one business)"""
+        where = 'WHERE c.business_id = ?' if business_id is not None else ''
+        params = ([business_id] if business_id is not None else []) + [limit]
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT c.*, b.name FROM business_changes c
+            JOIN businesses b ON b.id = c.business_id
+            {where}
+            ORDER BY c.id DESC LIMIT ?
+        ''', params)
+        return [dict(row) for row in cursor.fetchall()]
+
+    # ─── Search cache ──────────────────────────────────────────
+    def get_search_cache(self, query_key):
+        """When a normalized search was last scraped, or None"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT * FROM search_cache WHERE query_key = ?', (query_key,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def get_search_results(self, query_key, since):
+        """maps_urls a search has found since `since` (datetime)"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT maps_url FROM search_results WHERE query_key = ? AND seen_at >= ?',
+            (query_key, since),
+        )
+        return [row['maps_url'] for row in cursor.fetchall()]
+
+    def save_search_results(self, query_key, category, city, country, listings):
+        """Record the (maps_url, name) listings a search just returned"""
+        now = datetime.now()
+        cursor = self.conn.cursor()
+        self._begin(cursor)
+        try:
+            cursor.executemany('''
+                INSERT INTO search_results (query_key, maps_url, name, seen_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(query_key, maps_url) DO UPDATE SET
+                    name = excluded.name, seen_at = excluded.seen_at
+            ''', [(query_key, maps_url, name, now) for maps_url, name in listings])
+            cursor.execute('''
+                INSERT INTO search_cache (query_key, category, city, country, result_count, last_scraped)
+                VALUES (?, ?, ?, ?, (SELECT COUNT(*) FROM search_results WHERE query_key = ?), ?)
+                ON CONFLICT(query_key) DO UPDATE SET
+                    result_count = excluded.result_count, last_scraped = excluded.last_scraped
+            ''', (query_key, category, city, country, query_key, now))
+            self._commit()
+        except sqlite3.Error:
+            self._rollback()
+            raise
+        return len(listings)
+
+    # ─── Proxy health ──────────────────────────────────────────
+    def load_proxy_health(self):
+        """Stored proxy health keyed by str(ProxyConfig)"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT * FROM proxies')
+        return {row['proxy']: dict(row) for row in cursor.fetchall()}
+
+    def save_proxy_health(self, records):
+        """Upsert a batch of proxy health records in one statement"""
+        if not records:
+            return 0
+        fields = PROXY_HEALTH_FIELDS
+        updates = ', '.join(f'{f} = excluded.{f}' for f in fields if f != 'proxy')
+        cursor = self.conn.cursor()
+        self._begin(cursor)
+        try:
+            cursor.executemany(f'''
+                INSERT INTO proxies ({', '.join(fields)}, updated_at)
+                VALUES ({', '.join('?' * len(fields))}, CURRENT_TIMESTAMP)
+                ON CONFLICT(proxy) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP
+            ''', [tuple(record.get(f) for f in fields) for record in records])
+            self._commit()
+        except sqlite3.Error:
+            self._rollback()
+            raise
+        return len(records)
+
+    def _rebuild_statistics(self, cursor):
+        """Recount the stats table from scratch (one full scan)"""
+        cursor.execute('DELETE FROM stats')
+        cursor.execute('''
+            INSERT INTO stats (key, value)
+            SELECT 'businesses', COUNT(*) FROM businesses
+            UNION ALL SELECT 'with_website', COUNT(*) FROM businesses
+                WHERE website IS NOT NULL AND website != ''
+            UNION ALL SELECT 'rating_sum', COALESCE(SUM(rating), 0) FROM businesses
+            UNION ALL SELECT 'rating_count', COUNT(rating) FROM businesses
+            UNION ALL SELECT 'jobs:' || status, COUNT(*) FROM jobs GROUP BY status
+        ''')
+        logger.info("Rebuilt statistics counters")
+
+    def rebuild_statistics(self):
+        """Recount statistics (e.g. after editing the database by hand)"""
+        self._rebuild_statistics(self.conn.cursor())
+        self._commit()
+        self._stats_cache = None
+
+    def get_statistics(self, fresh=False):
+        """Get database statistics (trigger-maintained counters, cached for stats_ttl)"""
+        now = time.monotonic()
+        if not fresh and self._stats_cache is not None and self._stats_cache[0] > now:
+            return self._stats_cache[1]
+
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT key, value FROM stats')
+        counters = {row[0]: row[1] for row in cursor.fetchall()}
+
+        total = int(counters.get('businesses', 0))
+        with_website = int(counters.get('with_website', 0))
+        rating_count = counters.get('rating_count', 0)
+        avg_rating = counters.get('rating_sum', 0) / rating_count if rating_count else 0
+
+        jobs = {
+            key[len('jobs:'):]: int(value)
+            for key, value in counters.items()
+            if key.startswith('jobs:') and value > 0
+        }
         
-        cursor.execute('SELECT COUNT(*) FROM businesses')
-        total = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM businesses WHERE website IS NOT NULL AND website != ""')
-        with_website = cursor.fetchone()[0]
-        
-        # Check if rating column exists
-        cursor.execute("PRAGMA table_info(businesses)")
-        columns = [row[1] for row in cursor.fetchall()]
-        
-        avg_rating = 0
-        if 'rating' in columns:
-            cursor.execute('SELECT AVG(rating) FROM businesses WHERE rating IS NOT NULL')
-            avg_rating = cursor.fetchone()[0] or 0
-        
-        cursor.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status')
-        jobs = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        return {
+        statistics = {
             'total_businesses': total,
             'with_website': with_website,
             'without_website': total - with_website,
             'avg_rating': round(avg_rating, 2),
             'jobs': jobs
         }
+        self._stats_cache = (now + self.stats_ttl, statistics)
+        return statistics
     
     def export_to_csv(self, output_file, filters=None):
         """Export businesses to CSV"""
-        import csv
-        
-        cursor = self.conn.cursor()
-        query = 'SELECT * FROM businesses WHERE 1=1'
-        params = []
-        
-        if filters:
-            if filters.get('city'):
-                query += ' AND city = ?'
-                params.append(filters['city'])
-            if filters.get('category'):
-                query += ' AND category = ?'
-                params.append(filters['category'])
-            if filters.get('has_website') is not None:
-                if filters['has_website']:
-                    query += ' AND website IS NOT NULL AND website != ""'
-                else:
-                    query += ' AND (website IS NULL OR website = "")'
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        if not rows:
-            return 0
-        
-        with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            writer.writeheader()
-            for row in rows:
-                writer.writerow(dict(row))
-        
-        return len(rows)
+        from csv_stream import write_csv
+
+        query, params = build_business_query(filters)
+        return write_csv(self.conn, query, params, output_file)
     
     def close(self):
         """Close database connection"""
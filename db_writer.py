@@ -0,0 +1,172 @@
+"""
+Single-writer persistence thread
+Every write to business_leads.db goes through one thread that owns the
+write connection. Callers enqueue an operation and get a Future back; the
+writer drains whatever is queued and applies it as one group commit.
+"""
+
+import queue
+import asyncio
+import threading
+import logging
+from concurrent.futures import Future
+from typing import Optional, Union, Callable
+
+from config import settings
+from db import Database
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class DatabaseWriter:
+    """
+    Write-behind queue in front of a single Database connection.
+
+    Operations are a Database method name or a callable taking the Database:
+        writer.submit("update_job_status", job_id, "completed", 12)
+        writer.submit(lambda db: db.add_businesses(rows)).result()
+
+    Each operation runs inside its own savepoint, so one failing write only
+    fails its own Future and never rolls back the rest of the group.
+    A full queue blocks submit() (backpressure) instead of growing unbounded.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_queue: Optional[int] = None,
+        max_batch: Optional[int] = None,
+    ):
+        self.db_path = db_path or str(settings.database_path)
+        self.max_batch = max_batch or settings.db_writer_max_batch
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue or settings.db_writer_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Counters
+        self.operations = 0
+        self.commits = 0
+        self.failures = 0
+
+    # ─── Lifecycle ─────────────────────────────────────────────
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        """Flush everything queued so far, then stop the thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    # ─── Submitting writes ─────────────────────────────────────
+    def submit(self, operation: Union[str, Callable], *args, **kwargs) -> Future:
+        """Queue a write; blocks while the queue is full"""
+        self.start()
+        future: Future = Future()
+        self._queue.put((operation, args, kwargs, future))
+        return future
+
+    def call(self, operation: Union[str, Callable], *args, **kwargs):
+        """Queue a write and wait for its result"""
+        return self.submit(operation, *args, **kwargs).result()
+
+    async def call_async(self, operation: Union[str, Callable], *args, **kwargs):
+        """Await a write from the event loop without blocking it on a full queue"""
+        future = await asyncio.to_thread(self.submit, operation, *args, **kwargs)
+        return await asyncio.wrap_future(future)
+
+    # ─── Writer thread ─────────────────────────────────────────
+    def _run(self):
+        db = Database(self.db_path)
+        logger.info("🗄️ Database writer started")
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._queue.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if any(item is _STOP for item in batch):
+                    stopping = True
+                    batch = [item for item in batch if item is not _STOP]
+                if batch:
+                    self._apply(db, batch)
+        finally:
+            db.close()
+            logger.info("🗄️ Database writer stopped")
+
+    def _apply(self, db: Database, batch):
+        """Run a batch of operations as one group commit"""
+        results = []
+        try:
+            with db.group_commit():
+                for operation, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    db.conn.execute("SAVEPOINT write_op")
+                    try:
+                        if callable(operation):
+                            result = operation(db, *args, **kwargs)
+                        else:
+                            result = getattr(db, operation)(*args, **kwargs)
+                        db.conn.execute("RELEASE write_op")
+                        results.append((future, result, None))
+                    except Exception as e:
+                        db.conn.execute("ROLLBACK TO write_op")
+                        db.conn.execute("RELEASE write_op")
+                        results.append((future, None, e))
+        except Exception as e:
+            # The commit itself failed: nothing in this group was written
+            logger.error(f"Group commit of {len(batch)} writes failed: {e}")
+            self.failures += len(batch)
+            for _, _, _, future in batch:
+                if future.running():
+                    future.set_exception(e)
+            return
+
+        self.commits += 1
+        for future, result, error in results:
+            self.operations += 1
+            if error is not None:
+                self.failures += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+# Global instance
+_db_writer = None
+_db_writer_lock = threading.Lock()
+
+
+def get_db_writer() -> DatabaseWriter:
+    """Get or create the global database writer"""
+    global _db_writer
+    with _db_writer_lock:
+        if _db_writer is None:
+            _db_writer = DatabaseWriter()
+        return _db_writer
+
+
+def close_db_writer():
+    """Flush and stop the global database writer"""
+    global _db_writer
+    with _db_writer_lock:
+        if _db_writer is not None:
+            _db_writer.stop()
+            _db_writer = None
@@ -0,0 +1,37 @@
+"""
+Single-pass detail panel extraction
+DETAIL_PANEL_SCRIPT reads everything the field lookups need from the open
+business panel (data-item-id elements, aria-labelled buttons, external
+links, panel text) in one page.evaluate() call; field_parser.classify_panel()
+then picks address, phone and website out of that payload in Python, with
+the same fallbacks the per-field locator lookups used to make one by one.
+"""
+
+# Snapshot of the panel showing `name` (falls back to the first panel)
+DETAIL_PANEL_SCRIPT = """
+name => {
+    const wanted = (name || '').trim().toLowerCase();
+    const heading = main => ((main.querySelector('h1') || {}).textContent || '').trim().toLowerCase();
+    const mains = [...document.querySelectorAll("div[role='main']")];
+    const panel = mains.find(main => {
+        const text = heading(main);
+        return text && wanted && (text === wanted || text.startsWith(wanted) || wanted.startsWith(text));
+    }) || mains[0];
+    if (!panel) {
+        return null;
+    }
+    const visible = [...panel.querySelectorAll('[data-item-id], button[aria-label], a[href]')]
+        .filter(el => el.getClientRects().length > 0);
+    const attrs = el => ({
+        id: el.getAttribute('data-item-id') || '',
+        aria: el.getAttribute('aria-label') || '',
+        href: el.getAttribute('href') || '',
+    });
+    return {
+        items: visible.filter(el => el.hasAttribute('data-item-id')).map(attrs),
+        buttons: visible.filter(el => el.matches('button[aria-label]')).map(el => el.getAttribute('aria-label')),
+        links: visible.filter(el => el.matches("a[href^='http']")).map(attrs),
+        text: panel.innerText || '',
+    };
+}
+"""
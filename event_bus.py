@@ -0,0 +1,86 @@
+"""
+Live event feed
+Scraper threads publish small delta events; every connected dashboard
+client gets them over Server-Sent Events (/api/events) from its own
+asyncio queue. Publishing never touches the database.
+"""
+
+import json
+import asyncio
+import threading
+import logging
+from datetime import datetime
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class EventBus:
+    """
+    Thread-safe fan-out from publisher threads to asyncio subscribers.
+
+    publish() may be called from any thread; events are handed to the
+    event loop with call_soon_threadsafe. A subscriber that falls behind
+    loses its oldest events rather than growing without bound.
+    """
+
+    def __init__(self, max_queue: int = 200):
+        self.max_queue = max_queue
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def attach_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Bind the bus to the app's event loop (call from FastAPI startup)"""
+        self._loop = loop or asyncio.get_running_loop()
+
+    # ─── Subscribers (event loop only) ─────────────────────────
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    # ─── Publishing (any thread) ───────────────────────────────
+    def publish(self, event_type: str, **data):
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        with self._lock:
+            self._next_id += 1
+            event = {
+                "id": self._next_id,
+                "type": event_type,
+                "time": datetime.now().isoformat(),
+                "data": data,
+            }
+        try:
+            loop.call_soon_threadsafe(self._fan_out, event)
+        except RuntimeError:
+            pass  # loop shutting down
+
+    def _fan_out(self, event: dict):
+        for queue in list(self._subscribers):
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(event)
+
+
+def format_sse(event: dict) -> str:
+    """Encode an event in text/event-stream framing"""
+    payload = json.dumps(event["data"], default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+# Global instance
+event_bus = EventBus()
@@ -13,6 +13,12 @@ class ProxyException(ScraperException):
     pass
 
 
+class ProxyBannedException(ProxyException):
+    """Google answered with a captcha / unusual-traffic page"""
+
+    pass
+
+
 class DatabaseException(ScraperException):
     """Database-related errors"""
 
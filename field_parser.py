@@ -0,0 +1,392 @@
+"""
+Business field parsing shared by every scraper
+Turns the raw strings a listing exposes (aria-labels, card text, panel
+text, links) into address, phone and website values. Everything is built
+once at import: regexes are precompiled and the localized label prefixes
+and keyword lists live in tries, so a lookup is one pass over the string
+whatever the number of locales.
+
+No browser is needed, so stored panel payloads can be re-parsed in bulk
+(classify_panels) and the parsers benchmarked on their own.
+"""
+
+import re
+from collections import deque
+from typing import Optional, Dict, List, Iterable, Tuple
+from urllib.parse import urlsplit, urlunsplit, unquote, parse_qs
+
+# ─── Matchers ───────────────────────────────────────────────
+
+
+class KeywordMatcher:
+    """
+    Aho–Corasick automaton over a keyword list: search() reports the first
+    keyword found anywhere in a string in a single left-to-right scan.
+    """
+
+    def __init__(self, keywords: Iterable[str], ignore_case: bool = True):
+        self.ignore_case = ignore_case
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Optional[str]] = [None]
+
+        for keyword in keywords:
+            node = 0
+            for ch in keyword.lower() if ignore_case else keyword:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(None)
+                node = nxt
+            if self._out[node] is None:
+                self._out[node] = keyword
+
+        # Failure links, breadth first; a node also reports its suffix's keyword
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._out[nxt] is None:
+                    self._out[nxt] = self._out[self._fail[nxt]]
+
+    def search(self, text: Optional[str]) -> Optional[str]:
+        """First keyword (as given) that occurs in `text`, or None"""
+        if not text:
+            return None
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text.lower() if self.ignore_case else text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] is not None:
+                return out[node]
+        return None
+
+    def __contains__(self, text: Optional[str]) -> bool:
+        return self.search(text) is not None
+
+
+class LabelTrie:
+    """
+    Localized field labels ("Phone", "Téléphone", ...) in a prefix trie.
+    strip() removes a leading "<label>:" in one walk; the colon may be
+    preceded by spaces (French "Adresse : ") and the longest label wins.
+    """
+
+    _SPACES = " \t\u00a0\u202f"
+
+    def __init__(self, labels: Iterable[str]):
+        self._root: Dict = {}
+        for label in labels:
+            node = self._root
+            for ch in label.lower():
+                node = node.setdefault(ch, {})
+            node[None] = True  # end of a label
+
+    def _label_end(self, text: str) -> int:
+        """Index just past "<label>:" and its trailing spaces, 0 if none"""
+        node, best = self._root, 0
+        lowered = text.lower()
+        for i, ch in enumerate(lowered):
+            node = node.get(ch)
+            if node is None:
+                break
+            if None in node:
+                j = i + 1
+                while j < len(text) and text[j] in self._SPACES:
+                    j += 1
+                if j < len(text) and text[j] == ":":
+                    j += 1
+                    while j < len(text) and text[j] in self._SPACES:
+                        j += 1
+                    best = j
+        return best
+
+    def strip(self, text: str) -> str:
+        return text[self._label_end(text):].strip()
+
+    def has_label(self, text: str) -> bool:
+        return self._label_end(text) > 0
+
+
+# ─── Locale data ────────────────────────────────────────────
+
+ADDRESS_LABELS = LabelTrie([
+    "Address", "Adresse", "Adresa", "Adres", "Dirección", "Indirizzo", "Endereço",
+])
+PHONE_LABELS = LabelTrie([
+    "Phone", "Tel", "Telefon", "Telefonnummer", "Téléphone", "Numéro de téléphone",
+    "Teléfono", "Número de teléfono", "Telefone", "Telefono", "Telefoonnummer",
+])
+
+# aria-label fragments of the address / phone / website controls
+ADDRESS_KEYWORDS = KeywordMatcher(["address", "adresa"])
+PHONE_KEYWORDS = KeywordMatcher(["phone", "telefon", "téléphone", "numéro", "teléfono"])
+WEBSITE_KEYWORDS = KeywordMatcher([
+    "website", "site web", "webová stránka", "webseite", "sitio web",
+    "site internet", "sito web",
+])
+# Street words that mark an address line in the results card text
+ADDRESS_HINTS = KeywordMatcher(["calle", "street", "rue", "via", "avenue", "cl.", "c.", "av."])
+
+# Results feed entries that are not businesses: the ad label (a line of its
+# own, or before " · "), UI/info cards by name, and disclaimer blurbs
+AD_LABELS = frozenset([
+    "ad", "ads", "sponsored", "annonce", "sponsorisé", "anzeige", "gesponsert",
+    "anuncio", "patrocinado", "reklama", "sponzorováno", "annuncio", "sponsorizzato",
+])
+NON_LISTING_NAMES = KeywordMatcher([
+    "google", "résultats", "results", "certains de ces", "les prix sont", "partager",
+])
+DISCLAIMER_MARKERS = KeywordMatcher(["personnalisés", "partenaires de google", "envoyer un lien"])
+
+# Google's own links and social profiles are never the business website
+GOOGLE_DOMAINS = KeywordMatcher([
+    "google.com", "goo.gl", "maps.app", "play.google",
+    "support.google", "accounts.google", "policies.google",
+])
+SOCIAL_DOMAINS = KeywordMatcher([
+    "facebook.com", "instagram.com", "twitter.com",
+    "youtube.com", "linkedin.com", "tiktok.com",
+])
+
+# ─── Patterns ───────────────────────────────────────────────
+
+PHONE_LABEL_RE = re.compile(r"[\d\s\-\+\(\)]{9,}")
+PHONE_PATTERNS = (
+    re.compile(r"\+\d{1,4}\s?\d{3}\s?\d{3}\s?\d{3,4}"),
+    re.compile(r"\d{3}\s?\d{3}\s?\d{3,4}"),
+)
+CARD_PHONE_RE = re.compile(r"\+?\d[\d\s\-\(\)]{8,}")
+DIGITS_RE = re.compile(r"\d")
+URL_RE = re.compile(r"https?://[^\s,]+")
+DOMAIN_RE = re.compile(r"([a-zA-Z0-9-]+\.[a-z]{2,})")
+TEXT_URL_PATTERNS = (
+    re.compile(r'(https?://[^\s<>"]+)'),
+    re.compile(r"(www\.[a-zA-Z0-9-]+\.[a-zA-Z]{2,}[^\s]*)"),
+)
+RATING_RE = re.compile(r"(\d+(?:[.,]\d+)?)")
+COUNT_RE = re.compile(r"\d[\d,.\s]*")
+PLACE_PATH_RE = re.compile(r"^(/maps/place/[^/]+)(?:/@[^/]*)?(/data=[^/?#]+)?")
+
+# ─── Single values ──────────────────────────────────────────
+
+
+def has_digit(text: Optional[str]) -> bool:
+    return bool(text) and DIGITS_RE.search(text) is not None
+
+
+def parse_address_label(aria: Optional[str]) -> Optional[str]:
+    """'Address: Main St 1' -> 'Main St 1'"""
+    if not aria:
+        return None
+    return ADDRESS_LABELS.strip(aria) or None
+
+
+def parse_phone_label(aria: Optional[str]) -> Optional[str]:
+    """'Phone: +420 123 456 789' -> '+420 123 456 789' (None without digits)"""
+    if not aria:
+        return None
+    cleaned = PHONE_LABELS.strip(aria)
+    return cleaned if has_digit(cleaned) else None
+
+
+def find_phone(text: Optional[str]) -> Optional[str]:
+    """First phone-number-looking run in free text (detail panel)"""
+    if not text:
+        return None
+    for pattern in PHONE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group().strip()
+    return None
+
+
+def find_card_phone(text: Optional[str]) -> Optional[str]:
+    """Longest phone-looking run in a results card (most likely complete)"""
+    if not text:
+        return None
+    phones = CARD_PHONE_RE.findall(text)
+    return max(phones, key=len).strip() if phones else None
+
+
+def find_card_address(text: Optional[str]) -> Optional[str]:
+    """First results card line that reads like an address"""
+    for line in (text or "").split("\n"):
+        if len(line) > 10 and not line[0].isdigit() and not line.startswith("+"):
+            if "," in line or line in ADDRESS_HINTS:
+                return line.strip()
+    return None
+
+
+def is_ad_label(line: str) -> bool:
+    """True for "Ad", "Sponsored · …" and their translations; never part of a name"""
+    return line.split("·")[0].strip().lower() in AD_LABELS
+
+
+def is_listing_card(name: str, card_text: str) -> bool:
+    """False for ads, disclaimers and other non-business cards in the results feed"""
+    if name in NON_LISTING_NAMES or card_text in DISCLAIMER_MARKERS:
+        return False
+    return not any(is_ad_label(line) for line in card_text.split("\n"))
+
+
+def is_website_label(aria: Optional[str]) -> bool:
+    return aria in WEBSITE_KEYWORDS
+
+
+def is_skipped_link(href: Optional[str]) -> bool:
+    """Google's own and social links, which never count as the website"""
+    return not href or href in GOOGLE_DOMAINS or href in SOCIAL_DOMAINS
+
+
+def website_from_label(aria: Optional[str]) -> Optional[str]:
+    """URL or bare domain carried by a website button's aria-label"""
+    if not is_website_label(aria):
+        return None
+    match = URL_RE.search(aria)
+    if match:
+        return match.group()
+    match = DOMAIN_RE.search(aria)
+    if match and match.group() not in ("google.com", "maps.app"):
+        return f"https://{match.group()}"
+    return None
+
+
+def find_website(text: Optional[str]) -> Optional[str]:
+    """First non-Google URL (or www. host) in free text"""
+    if not text:
+        return None
+    for pattern in TEXT_URL_PATTERNS:
+        for match in pattern.findall(text):
+            if match not in GOOGLE_DOMAINS:
+                return f"https://{match}" if match.startswith("www.") else match
+    return None
+
+
+def parse_rating(text: Optional[str]) -> Optional[float]:
+    """'4.6 stars' / '4,6 étoiles' -> 4.6"""
+    match = RATING_RE.search(text or "")
+    return float(match.group(1).replace(",", ".")) if match else None
+
+
+def parse_count(text: Optional[str]) -> Optional[int]:
+    """'(1,234)' / '1 234 reviews' -> 1234"""
+    match = COUNT_RE.search(text or "")
+    if not match:
+        return None
+    digits = "".join(ch for ch in match.group() if ch.isdigit())
+    return int(digits) if digits else None
+
+
+def canonical_maps_url(url: Optional[str]) -> Optional[str]:
+    """
+    One stable URL per place: https, no fragment, no viewport, no query
+    except the place id of '?cid=' links (see maps_payload).
+    '/maps/place/Name/@50.1,14.4,17z/data=!4m6...?hl=en' keeps the name
+    and the data segment (which holds the place id).
+    """
+    if not url:
+        return url
+    parts = urlsplit(url)
+    path = unquote(parts.path)
+    match = PLACE_PATH_RE.match(path)
+    if match:
+        path = match.group(1) + (match.group(2) or "")
+    cid = parse_qs(parts.query).get("cid")
+    query = f"cid={cid[0]}" if cid else ""
+    return urlunsplit(("https", parts.netloc.lower() or "www.google.com", path, query, ""))
+
+
+# ─── Detail panel ───────────────────────────────────────────
+
+
+def _panel_address(panel: Dict) -> Optional[str]:
+    for item in panel["items"]:
+        if item["id"] == "address" and item["aria"]:
+            return parse_address_label(item["aria"])
+    for aria in panel["buttons"]:
+        # An address label should be reasonably long
+        if len(aria) > 15 and aria in ADDRESS_KEYWORDS:
+            return parse_address_label(aria)
+    return None
+
+
+def _panel_phone(panel: Dict) -> Optional[str]:
+    for item in panel["items"]:
+        if "phone" in item["id"] and item["aria"]:
+            # The first phone control decides, as long as it holds digits
+            phone = parse_phone_label(item["aria"])
+            if phone:
+                return phone
+            break
+    for aria in panel["buttons"]:
+        if aria in PHONE_KEYWORDS and PHONE_LABEL_RE.search(aria):
+            phone = parse_phone_label(aria)
+            if phone:
+                return phone
+    return find_phone(panel["text"])
+
+
+def _panel_website(panel: Dict) -> Optional[str]:
+    # Authority link: the panel's own "Website" action
+    for item in panel["items"]:
+        if item["id"] == "authority":
+            if item["href"].startswith("http"):
+                return item["href"]
+            break
+
+    # External link labelled as a website
+    for link in panel["links"]:
+        if is_website_label(link["aria"]) and "google.com" not in link["href"]:
+            return link["href"]
+
+    # Any other external business link (not Google, not social)
+    for link in panel["links"]:
+        if not is_skipped_link(link["href"]) and "." in link["href"]:
+            return link["href"]
+
+    # Website button whose label carries the URL or the bare domain
+    for aria in panel["buttons"]:
+        website = website_from_label(aria)
+        if website:
+            return website
+
+    # Last resort: a URL in the visible panel text
+    return find_website(panel["text"])
+
+
+def classify_panel(panel: Optional[Dict]) -> Dict:
+    """Address, phone and website from a DETAIL_PANEL_SCRIPT payload ('N/A' when absent)"""
+    if not panel:
+        return {"address": "N/A", "phone": "N/A", "website": "N/A", "has_website": "No"}
+    website = _panel_website(panel)
+    return {
+        "address": _panel_address(panel) or "N/A",
+        "phone": _panel_phone(panel) or "N/A",
+        "website": website or "N/A",
+        "has_website": "Yes" if website else "No",
+    }
+
+
+# ─── Batch ──────────────────────────────────────────────────
+
+
+def classify_panels(panels: Iterable[Optional[Dict]]) -> List[Dict]:
+    """classify_panel() over many stored payloads (re-extraction without a browser)"""
+    return [classify_panel(panel) for panel in panels]
+
+
+def parse_cards(card_texts: Iterable[Optional[str]]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """(phone, address) read from each results card's text"""
+    return [(find_card_phone(text), find_card_address(text)) for text in card_texts]
@@ -9,7 +9,6 @@ import logging
 import pandas as pd
 import os
 import zipfile
-import re
 from datetime import datetime
 from seleniumwire import webdriver  # Changed to seleniumwire for proxy support
 from selenium.webdriver.common.by import By
@@ -25,6 +24,11 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from field_parser import (
+    GOOGLE_DOMAINS, PHONE_KEYWORDS, PHONE_LABELS, DIGITS_RE,
+    canonical_maps_url, has_digit, is_website_label,
+    parse_address_label, parse_cards, parse_phone_label,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -390,34 +394,16 @@ def extract_business_data(driver, business_element, proxy_dict):
             # Get name and URL from the link
             name_link = business_element.find_element(By.CSS_SELECTOR, "a")
             data['name'] = name_link.get_attribute('aria-label')
-            data['maps_url'] = name_link.get_attribute('href').split('?')[0]
+            data['maps_url'] = canonical_maps_url(name_link.get_attribute('href'))
         except:
             pass
         
         # Try to get phone from the list view (it's often visible there!)
         try:
-            # Look for phone in the business card text
-            card_text = business_element.text
-            # Phone patterns: +34 xxx xx xx xx, +1 xxx xxx xxxx, etc.
-            import re
-            phone_pattern = r'\+?\d[\d\s\-\(\)]{8,}'
-            phones = re.findall(phone_pattern, card_text)
-            if phones:
-                # Get the longest match (most likely to be complete)
-                data['phone'] = max(phones, key=len).strip()
-        except:
-            pass
-        
-        # Try to get address from list view
-        try:
-            # Address is often in the card text too
-            lines = business_element.text.split('\n')
-            for line in lines:
-                # Look for address-like patterns (contains comma or street indicators)
-                if ',' in line or any(word in line.lower() for word in ['calle', 'street', 'rue', 'via', 'avenue', 'cl.', 'c.', 'av.']):
-                    if len(line) > 10 and not line.startswith(('+', '0', '1', '2', '3', '4', '5', '6', '7', '8', '9')):
-                        data['address'] = line.strip()
-                        break
+            # Phone and address are often visible in the card text
+            phone, address = parse_cards([business_element.text])[0]
+            data['phone'] = phone or data['phone']
+            data['address'] = address or data['address']
         except:
             pass
         
@@ -443,10 +429,7 @@ def extract_business_data(driver, business_element, proxy_dict):
                 if address_buttons:
                     aria_label = address_buttons[0].get_attribute('aria-label')
                     if aria_label:
-                        # Remove language-specific prefixes
-                        for prefix in ['Address: ', 'Adresse : ', 'Adresse: ', 'Dirección: ', 'Indirizzo: ', 'Adresa: ']:
-                            aria_label = aria_label.replace(prefix, '')
-                        data['address'] = aria_label.strip()
+                        data['address'] = parse_address_label(aria_label) or 'N/A'
                 
                 # Method 2: Look in all buttons for address-like content
                 if data['address'] == 'N/A':
@@ -455,9 +438,9 @@ def extract_business_data(driver, business_element, proxy_dict):
                         aria = btn.get_attribute('aria-label')
                         if aria and len(aria) > 15:
                             # Check if it looks like an address (has comma or numbers)
-                            if ',' in aria or any(char.isdigit() for char in aria):
+                            if ',' in aria or has_digit(aria):
                                 # Exclude phone numbers and other non-address content
-                                if not aria.startswith(('Phone', 'Téléphone', 'Tel', '+', '0')):
+                                if not aria.startswith(('+', '0')) and not PHONE_LABELS.has_label(aria):
                                     data['address'] = aria.strip()
                                     break
             except Exception as e:
@@ -471,9 +454,7 @@ def extract_business_data(driver, business_element, proxy_dict):
                 if phone_buttons:
                     aria_label = phone_buttons[0].get_attribute('aria-label')
                     if aria_label:
-                        for prefix in ['Phone: ', 'Téléphone : ', 'Telefon: ', 'Tel: ', 'Teléfono: ']:
-                            aria_label = aria_label.replace(prefix, '')
-                        data['phone'] = aria_label.strip()
+                        data['phone'] = parse_phone_label(aria_label) or 'N/A'
                 
                 # Method 2: Look for tel: links
                 if data['phone'] == 'N/A':
@@ -489,14 +470,13 @@ def extract_business_data(driver, business_element, proxy_dict):
                         aria = btn.get_attribute('aria-label')
                         if aria:
                             # Check if it looks like a phone number
-                            if any(word in aria.lower() for word in ['phone', 'téléphone', 'telefon', 'tel']):
+                            if aria in PHONE_KEYWORDS and has_digit(aria):
+                                data['phone'] = PHONE_LABELS.strip(aria)
+                                break
+                            # Or if it starts with + or 0 and holds enough digits
+                            elif aria.startswith(('+', '0')) and len(DIGITS_RE.findall(aria)) >= 8:
                                 data['phone'] = aria.strip()
                                 break
-                            # Or if it starts with + or contains only digits and spaces
-                            elif aria.startswith(('+', '0')) and any(char.isdigit() for char in aria):
-                                if len(aria.replace(' ', '').replace('+', '').replace('-', '')) >= 8:
-                                    data['phone'] = aria.strip()
-                                    break
             except Exception as e:
                 logging.debug(f"Phone extraction error: {e}")
         
@@ -509,7 +489,7 @@ def extract_business_data(driver, business_element, proxy_dict):
             if website_links:
                 href = website_links[0].get_attribute('href')
                 # Make sure it's not a Google link
-                if href and 'google.com' not in href and 'http' in href:
+                if href and 'http' in href and href not in GOOGLE_DOMAINS:
                     data['has_website'] = 'Yes'
             
             # Alternative: look for links with "website" in aria-label
@@ -519,11 +499,10 @@ def extract_business_data(driver, business_element, proxy_dict):
                     aria = link.get_attribute('aria-label')
                     href = link.get_attribute('href')
                     if aria and href:
-                        aria_lower = aria.lower()
                         # Check for website-related keywords
-                        if any(word in aria_lower for word in ['website', 'site web', 'webová stránka', 'sitio web']):
+                        if is_website_label(aria):
                             # Exclude Google Maps and Google-related links
-                            if 'http' in href and 'google.com' not in href and 'maps' not in href.lower():
+                            if 'http' in href and href not in GOOGLE_DOMAINS and 'maps' not in href.lower():
                                 data['has_website'] = 'Yes'
                                 break
         except Exception as e:
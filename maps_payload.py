@@ -0,0 +1,251 @@
+"""
+Google Maps XHR payload parsing
+Captures the JSON Maps loads while the results feed scrolls
+(`/search?tbm=map`, `/maps/preview/place`) and turns place records
+into the same business dict the click-based extraction produces.
+
+The payloads are deeply nested positional arrays with no schema, so every
+lookup goes through _dig() and a missing index simply yields None.
+"""
+
+import json
+import re
+import logging
+from datetime import datetime
+from typing import Optional, Dict, List, Set, Any
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+XSSI_PREFIX = ")]}'"
+FEATURE_ID_RE = re.compile(r"^0x[0-9a-f]+:0x([0-9a-f]+)$", re.IGNORECASE)
+# Feature id inside a place href: /maps/place/Name/data=!4m7!3m6!1s0x470b...:0x12ab!8m2...
+URL_FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", re.IGNORECASE)
+PAYLOAD_URL_MARKERS = ("/search?tbm=map", "tbm=map", "/maps/preview/place")
+
+# Positions inside a place record
+NAME = (11,)
+FEATURE_ID = (10,)
+FULL_ADDRESS = (39,)
+ADDRESS_PARTS = (2,)
+WEBSITE = (7, 0)
+PHONE = (178, 0, 0)
+RATING = (4, 7)
+REVIEWS = (4, 8)
+LATITUDE = (9, 2)
+LONGITUDE = (9, 3)
+
+
+def _dig(obj: Any, *path: int) -> Any:
+    """Safe nested index lookup; returns None on any missing level"""
+    for index in path:
+        if not isinstance(obj, list) or index >= len(obj):
+            return None
+        obj = obj[index]
+    return obj
+
+
+def _loads(text: str) -> Any:
+    """Strip the anti-XSSI prefix/suffix and decode JSON"""
+    text = text.strip()
+    if text.endswith('/*""*/'):
+        text = text[:-6]
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):]
+    return json.loads(text)
+
+
+def decode_payload(text: str) -> Any:
+    """
+    Decode a Maps XHR body. Search responses wrap the real payload as a
+    string in {"c": 0, "d": ")]}'\\n[...]"}, so unwrap that when present.
+    """
+    data = _loads(text)
+    if isinstance(data, dict) and isinstance(data.get("d"), str):
+        data = _loads(data["d"])
+    return data
+
+
+def _is_place(candidate: Any) -> bool:
+    return (
+        isinstance(candidate, list)
+        and len(candidate) > 11
+        and isinstance(candidate[11], str)
+        and isinstance(candidate[10], str)
+        and FEATURE_ID_RE.match(candidate[10]) is not None
+    )
+
+
+def iter_places(data: Any, _depth: int = 0):
+    """Yield every place record found anywhere in a decoded payload"""
+    if _depth > 12 or not isinstance(data, list):
+        return
+    if _is_place(data):
+        yield data
+        return
+    for item in data:
+        if isinstance(item, list):
+            yield from iter_places(item, _depth + 1)
+
+
+def normalize_name(name: str) -> str:
+    """Fallback key used to match a feed card to a payload record"""
+    return " ".join(name.lower().split())
+
+
+def feature_id_from_url(url: Optional[str]) -> Optional[str]:
+    """Place feature id ('0x...:0x...') from a card href or maps_url, if it has one"""
+    if not url:
+        return None
+    match = URL_FEATURE_ID_RE.search(unquote(url))
+    return match.group(1).lower() if match else None
+
+
+def place_feature_id(place: List) -> Optional[str]:
+    feature_id = _dig(place, *FEATURE_ID)
+    return feature_id.lower() if isinstance(feature_id, str) else None
+
+
+def place_to_business(place: List, proxy_used: str = "No proxy") -> Optional[Dict]:
+    """Convert a place record to the scraper's business dict"""
+    name = _dig(place, *NAME)
+    if not name:
+        return None
+
+    address = _dig(place, *FULL_ADDRESS)
+    if not isinstance(address, str):
+        parts = _dig(place, *ADDRESS_PARTS)
+        address = ", ".join(p for p in parts if isinstance(p, str)) if isinstance(parts, list) else None
+
+    phone = _dig(place, *PHONE)
+    website = _dig(place, *WEBSITE)
+    if not (isinstance(website, str) and website.startswith("http")):
+        website = None
+
+    maps_url = None
+    match = FEATURE_ID_RE.match(_dig(place, *FEATURE_ID) or "")
+    if match:
+        maps_url = f"https://maps.google.com/?cid={int(match.group(1), 16)}"
+
+    rating = _dig(place, *RATING)
+    reviews = _dig(place, *REVIEWS)
+
+    return {
+        "name": name.strip(),
+        "address": address.strip() if address else "N/A",
+        "phone": phone.strip() if isinstance(phone, str) and phone.strip() else "N/A",
+        "website": website or "N/A",
+        "has_website": "Yes" if website else "No",
+        "maps_url": maps_url,
+        "rating": rating if isinstance(rating, (int, float)) else None,
+        "reviews": reviews if isinstance(reviews, int) else None,
+        "latitude": _dig(place, *LATITUDE),
+        "longitude": _dig(place, *LONGITUDE),
+        "scraped_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "proxy_used": proxy_used,
+    }
+
+
+def missing_fields(business: Dict, required: List[str]) -> List[str]:
+    """Required fields that the payload did not provide"""
+    return [field for field in required if business.get(field) in (None, "", "N/A")]
+
+
+def merge_missing(business: Dict, record: Optional[Dict]) -> Dict:
+    """Fill fields the click path could not find from a payload record"""
+    if not record:
+        return business
+    for field, value in record.items():
+        if value in (None, "N/A") or field in ("scraped_date", "proxy_used"):
+            continue
+        if business.get(field) in (None, "", "N/A"):
+            business[field] = value
+    if business.get("website") not in (None, "", "N/A"):
+        business["has_website"] = "Yes"
+    return business
+
+
+class MapsPayloadCollector:
+    """
+    Listens to page responses and indexes place records by feature id.
+    A card is matched through the feature id in its href; by name only
+    when no id is available and the name is unique (chain branches in one
+    search share a name).
+
+    Sync API:  page.on("response", collector.on_response)
+    Async API: page.on("response", collector.on_response_async)
+    """
+
+    def __init__(self, proxy_used: str = "No proxy", keep_raw: bool = False):
+        self.proxy_used = proxy_used
+        self.places: Dict[str, Dict] = {}  # feature id -> business
+        self.names: Dict[str, Set[str]] = {}  # normalized name -> feature ids
+        self.responses_parsed = 0
+        # Raw place records per feature id, for the raw archive
+        self.keep_raw = keep_raw
+        self.raw: Dict[str, List] = {}
+
+    @staticmethod
+    def is_payload_url(url: str) -> bool:
+        return any(marker in url for marker in PAYLOAD_URL_MARKERS)
+
+    def ingest(self, text: str) -> int:
+        """Parse one response body; returns the number of new places"""
+        try:
+            data = decode_payload(text)
+        except (ValueError, TypeError) as e:
+            logger.debug(f"Unparseable Maps payload: {e}")
+            return 0
+
+        self.responses_parsed += 1
+        added = 0
+        for place in iter_places(data):
+            business = place_to_business(place, self.proxy_used)
+            if not business:
+                continue
+            key = place_feature_id(place)
+            self.names.setdefault(normalize_name(business["name"]), set()).add(key)
+            if self.keep_raw:
+                self.raw.setdefault(key, []).append(place)
+            existing = self.places.get(key)
+            if existing is None:
+                self.places[key] = business
+                added += 1
+            else:
+                # Same place again: preview/place responses are richer, keep any field we lacked
+                merge_missing(existing, business)
+        return added
+
+    def on_response(self, response):
+        """Sync Playwright response handler"""
+        if not self.is_payload_url(response.url):
+            return
+        try:
+            self.ingest(response.text())
+        except Exception as e:
+            logger.debug(f"Could not read Maps payload {response.url[:80]}: {e}")
+
+    async def on_response_async(self, response):
+        """Async Playwright response handler"""
+        if not self.is_payload_url(response.url):
+            return
+        try:
+            self.ingest(await response.text())
+        except Exception as e:
+            logger.debug(f"Could not read Maps payload {response.url[:80]}: {e}")
+
+    def _key(self, name: str, place_url: Optional[str]) -> Optional[str]:
+        feature_id = feature_id_from_url(place_url)
+        if feature_id:
+            return feature_id
+        candidates = self.names.get(normalize_name(name), ())
+        return next(iter(candidates)) if len(candidates) == 1 else None
+
+    def lookup(self, name: str, place_url: Optional[str] = None) -> Optional[Dict]:
+        """Payload record for a feed card (copy), or None"""
+        business = self.places.get(self._key(name, place_url))
+        return dict(business) if business else None
+
+    def raw_places(self, name: str, place_url: Optional[str] = None) -> List:
+        """Raw place records seen for a card (empty unless keep_raw)"""
+        return self.raw.get(self._key(name, place_url), [])
@@ -0,0 +1,177 @@
+"""
+Event-driven page waits and the politeness delay budget
+Render waits return as soon as the page is ready (selector, DOM condition,
+network idle). Deliberate anti-detection pauses go through PolitenessBudget
+so the two kinds of waiting are configured and reported separately.
+"""
+
+import time
+import random
+import asyncio
+import logging
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Card count in the results feed
+FEED_CARDS_JS = "document.querySelectorAll(\"div[role='feed'] > div > div\").length"
+
+# Detail panel shows the clicked business (heading matches the card name)
+PANEL_FOR_NAME_JS = """
+name => {
+    const wanted = name.trim().toLowerCase();
+    return [...document.querySelectorAll('h1')].some(h => {
+        const text = (h.textContent || '').trim().toLowerCase();
+        return text && (text === wanted || text.startsWith(wanted) || wanted.startsWith(text));
+    });
+}
+"""
+
+
+class WaitStats:
+    """Seconds spent waiting for the page, split by kind"""
+
+    def __init__(self):
+        self.render_wait = 0.0
+        self.render_waits = 0
+        self.render_timeouts = 0
+
+    def add(self, seconds: float, timed_out: bool = False):
+        self.render_wait += seconds
+        self.render_waits += 1
+        if timed_out:
+            self.render_timeouts += 1
+
+
+class PolitenessBudget:
+    """
+    Explicit anti-detection delays (REQUEST_DELAY_MIN/MAX per business).
+    POLITENESS_BUDGET_PER_JOB caps the total seconds per job (0 = no cap).
+    """
+
+    def __init__(
+        self,
+        min_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        budget: Optional[float] = None,
+    ):
+        self.min_delay = min_delay if min_delay is not None else settings.request_delay_min
+        self.max_delay = max_delay if max_delay is not None else settings.request_delay_max
+        self.budget = budget if budget is not None else settings.politeness_budget_per_job
+        self.spent = 0.0
+        self.pauses = 0
+
+    def _next_delay(self) -> float:
+        delay = random.uniform(self.min_delay, self.max_delay)
+        if self.budget:
+            delay = max(0.0, min(delay, self.budget - self.spent))
+        return delay
+
+    def pause(self) -> float:
+        delay = self._next_delay()
+        if delay > 0:
+            time.sleep(delay)
+            self.spent += delay
+            self.pauses += 1
+        return delay
+
+    async def pause_async(self) -> float:
+        delay = self._next_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            self.spent += delay
+            self.pauses += 1
+        return delay
+
+
+def summary(stats: WaitStats, politeness: PolitenessBudget) -> str:
+    return (
+        f"render waits {stats.render_wait:.1f}s ({stats.render_waits} waits, "
+        f"{stats.render_timeouts} timeouts), politeness {politeness.spent:.1f}s "
+        f"({politeness.pauses} pauses)"
+    )
+
+
+# ─── Sync API ──────────────────────────────────────────────────
+def wait_for_selector(page, selector: str, stats: WaitStats, timeout_ms: Optional[int] = None,
+                      state: str = "visible") -> bool:
+    """Wait until `selector` reaches `state`; False on timeout"""
+    timeout_ms = timeout_ms if timeout_ms is not None else settings.element_wait_timeout * 1000
+    start = time.monotonic()
+    try:
+        page.wait_for_selector(selector, state=state, timeout=timeout_ms)
+        stats.add(time.monotonic() - start)
+        return True
+    except Exception:
+        stats.add(time.monotonic() - start, timed_out=True)
+        return False
+
+
+def wait_for_function(page, expression: str, stats: WaitStats, arg=None,
+                      timeout_ms: Optional[int] = None) -> bool:
+    """Wait until a JS predicate is truthy; False on timeout"""
+    timeout_ms = timeout_ms if timeout_ms is not None else settings.element_wait_timeout * 1000
+    start = time.monotonic()
+    try:
+        page.wait_for_function(expression, arg=arg, timeout=timeout_ms)
+        stats.add(time.monotonic() - start)
+        return True
+    except Exception:
+        stats.add(time.monotonic() - start, timed_out=True)
+        return False
+
+
+def wait_for_network_idle(page, stats: WaitStats, timeout_ms: Optional[int] = None) -> bool:
+    """Short best-effort wait for in-flight XHRs (late panel buttons) to settle"""
+    timeout_ms = timeout_ms if timeout_ms is not None else settings.network_idle_timeout_ms
+    start = time.monotonic()
+    try:
+        page.wait_for_load_state("networkidle", timeout=timeout_ms)
+        stats.add(time.monotonic() - start)
+        return True
+    except Exception:
+        stats.add(time.monotonic() - start, timed_out=True)
+        return False
+
+
+# ─── Async API ─────────────────────────────────────────────────
+async def wait_for_selector_async(page, selector: str, stats: WaitStats,
+                                  timeout_ms: Optional[int] = None,
+                                  state: str = "visible") -> bool:
+    timeout_ms = timeout_ms if timeout_ms is not None else settings.element_wait_timeout * 1000
+    start = time.monotonic()
+    try:
+        await page.wait_for_selector(selector, state=state, timeout=timeout_ms)
+        stats.add(time.monotonic() - start)
+        return True
+    except Exception:
+        stats.add(time.monotonic() - start, timed_out=True)
+        return False
+
+
+async def wait_for_function_async(page, expression: str, stats: WaitStats, arg=None,
+                                  timeout_ms: Optional[int] = None) -> bool:
+    timeout_ms = timeout_ms if timeout_ms is not None else settings.element_wait_timeout * 1000
+    start = time.monotonic()
+    try:
+        await page.wait_for_function(expression, arg=arg, timeout=timeout_ms)
+        stats.add(time.monotonic() - start)
+        return True
+    except Exception:
+        stats.add(time.monotonic() - start, timed_out=True)
+        return False
+
+
+async def wait_for_network_idle_async(page, stats: WaitStats,
+                                      timeout_ms: Optional[int] = None) -> bool:
+    timeout_ms = timeout_ms if timeout_ms is not None else settings.network_idle_timeout_ms
+    start = time.monotonic()
+    try:
+        await page.wait_for_load_state("networkidle", timeout=timeout_ms)
+        stats.add(time.monotonic() - start)
+        return True
+    except Exception:
+        stats.add(time.monotonic() - start, timed_out=True)
+        return False
@@ -3,13 +3,25 @@ Smart Proxy Manager for Playwright
 Automatically detects and uses proxies if available, works without them if not
 """
 
+import threading
+import time
+import itertools
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterable
 import logging
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Circuit breaker states
+CLOSED = "closed"  # healthy, selectable
+OPEN = "open"  # tripped, skipped until the breaker cooldown ends
+HALF_OPEN = "half_open"  # cooldown over, one trial job decides
+
+INITIAL_SUCCESS = 0.75  # untested proxies rank below proven ones, above failing ones
+DEFAULT_LATENCY = 5.0  # seconds assumed until a proxy has been measured
+TRIAL_TIMEOUT = 1800.0  # a half-open trial never reported back is given up after this
+
 
 @dataclass
 class ProxyConfig:
@@ -30,20 +42,147 @@ class ProxyConfig:
 
         return config
 
+    def to_line(self) -> str:
+        """proxies.txt line (ip:port or ip:port:user:pass)"""
+        if self.username and self.password:
+            return f"{self.host}:{self.port}:{self.username}:{self.password}"
+        return f"{self.host}:{self.port}"
+
     def __str__(self):
         if self.username:
             return f"{self.username}:***@{self.host}:{self.port}"
         return f"{self.host}:{self.port}"
 
 
+@dataclass
+class ProxyHealth:
+    """Rolling health of one proxy (EWMAs weight recent jobs by `alpha`)"""
+
+    alpha: float = 0.3
+    latency_ewma: Optional[float] = None
+    success_ewma: float = INITIAL_SUCCESS
+    ban_score: float = 0.0  # EWMA of captcha / "unusual traffic" responses
+    consecutive_failures: int = 0
+    successes: int = 0
+    failures: int = 0
+    state: str = CLOSED
+    trips: int = 0  # times the breaker opened in a row
+    open_until: float = 0.0
+    cooldown_until: float = 0.0  # rest period between jobs
+    trial_until: float = 0.0  # half-open trial in flight (handed out, no result yet)
+    last_used: float = 0.0
+    last_used_seq: int = 0  # tie-breaker: least recently handed out first
+
+    def _ewma(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else self.alpha * sample + (1 - self.alpha) * current
+
+    def score(self) -> float:
+        """Higher is better: reliable, not banned, fast"""
+        latency = self.latency_ewma if self.latency_ewma is not None else DEFAULT_LATENCY
+        return self.success_ewma * (1 - self.ban_score) / (1 + latency)
+
+    def refresh_state(self, now: float):
+        if self.state == OPEN and now >= self.open_until:
+            self.state = HALF_OPEN
+
+    def is_available(self, now: float) -> bool:
+        self.refresh_state(now)
+        if self.state == HALF_OPEN and now < self.trial_until:
+            return False  # its one trial job is still running
+        return self.state != OPEN and now >= self.cooldown_until
+
+    def handed_out(self, now: float):
+        """A half-open proxy goes to one caller at a time until it reports back"""
+        if self.state == HALF_OPEN:
+            self.trial_until = now + TRIAL_TIMEOUT
+
+    def record_success(self, latency: Optional[float] = None):
+        self.trial_until = 0.0
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.success_ewma = self._ewma(self.success_ewma, 1.0)
+        self.ban_score = self._ewma(self.ban_score, 0.0)
+        if latency is not None:
+            self.latency_ewma = self._ewma(self.latency_ewma, latency)
+        self.state = CLOSED
+        self.trips = 0
+
+    def record_failure(self, now: float, max_failures: int, breaker_cooldown: float,
+                       breaker_max_cooldown: float, banned: bool = False):
+        self.trial_until = 0.0
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.success_ewma = self._ewma(self.success_ewma, 0.0)
+        self.ban_score = self._ewma(self.ban_score, 1.0 if banned else 0.0)
+
+        # A failed trial re-opens at once; a ban trips the breaker immediately
+        if self.state == HALF_OPEN or banned or self.consecutive_failures >= max_failures:
+            self.trips += 1
+            self.state = OPEN
+            self.open_until = now + min(breaker_cooldown * 2 ** (self.trips - 1), breaker_max_cooldown)
+
+    def to_record(self, proxy: "ProxyConfig", active: bool) -> Dict:
+        """Row for the proxies table (see db.PROXY_HEALTH_FIELDS)"""
+        return {
+            "proxy": str(proxy),
+            "host": proxy.host,
+            "port": int(proxy.port),
+            "username": proxy.username,
+            "success_count": self.successes,
+            "fail_count": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ewma": self.latency_ewma,
+            "success_ewma": self.success_ewma,
+            "ban_score": self.ban_score,
+            "breaker_state": self.state,
+            "breaker_trips": self.trips,
+            "open_until": self.open_until,
+            "last_used": self.last_used or None,
+            "is_active": active,
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict, alpha: float) -> "ProxyHealth":
+        success_ewma = record.get("success_ewma")
+        return cls(
+            alpha=alpha,
+            latency_ewma=record.get("latency_ewma"),
+            success_ewma=success_ewma if success_ewma is not None else INITIAL_SUCCESS,
+            ban_score=record.get("ban_score") or 0.0,
+            consecutive_failures=record.get("consecutive_failures") or 0,
+            successes=record.get("success_count") or 0,
+            failures=record.get("fail_count") or 0,
+            state=record.get("breaker_state") or CLOSED,
+            trips=record.get("breaker_trips") or 0,
+            open_until=record.get("open_until") or 0.0,
+            last_used=record.get("last_used") or 0.0,
+        )
+
+    def to_dict(self, now: float) -> Dict:
+        self.refresh_state(now)
+        return {
+            "state": self.state,
+            "score": round(self.score(), 4),
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "success_ewma": round(self.success_ewma, 3),
+            "ban_score": round(self.ban_score, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "open_for": max(0, round(self.open_until - now)) if self.state == OPEN else 0,
+            "cooldown_for": max(0, round(self.cooldown_until - now)),
+            "idle_for": round(now - self.last_used) if self.last_used else None,
+        }
+
+
 class SmartProxyManager:
     """
     Smart proxy manager that:
     - Automatically detects proxies.txt
     - Uses proxies if available
     - Works normally without proxies
-    - Rotates proxies automatically
-    - Tracks proxy health
+    - Picks the healthiest available proxy first (see ProxyHealth)
+    - Trips a circuit breaker on repeated failures or bans
     """
 
     def __init__(self, proxy_file: Optional[str] = None, max_failures: Optional[int] = None):
@@ -55,23 +194,100 @@ class SmartProxyManager:
             self.max_failures = (
                 max_failures if max_failures is not None else settings.max_proxy_failures
             )
+            self.ewma_alpha = settings.proxy_ewma_alpha
+            self.breaker_cooldown = settings.proxy_breaker_cooldown
+            self.breaker_max_cooldown = settings.proxy_breaker_max_cooldown
         except ImportError:
             # Fallback if config not available
             self.proxy_file = Path(proxy_file) if proxy_file else Path("proxies.txt")
             self.max_failures = max_failures if max_failures is not None else 3
+            self.ewma_alpha = 0.3
+            self.breaker_cooldown = 300
+            self.breaker_max_cooldown = 3600
+
+        # Shared by all scraper worker threads
+        self._lock = threading.RLock()
+        self._use_seq = itertools.count(1)
 
         self.proxies = self._load_proxies()
         self.current_index = 0
-        self.proxy_failures = {} # Track failures per proxy
+        self.health: Dict[str, ProxyHealth] = {}  # keyed by str(proxy)
+        self._known: Dict[str, ProxyConfig] = {str(p): p for p in self.proxies}
+        self._dirty = set()  # keys changed since the last drain_dirty()
+        self._reserved = set()  # keys held via reserve_proxy(), by any engine
+
+    @property
+    def proxy_failures(self) -> Dict[str, int]:
+        """Consecutive failures per proxy (proxies with none are omitted)"""
+        with self._lock:
+            return {
+                key: h.consecutive_failures
+                for key, h in self.health.items()
+                if h.consecutive_failures
+            }
+
+    def _health(self, proxy: ProxyConfig) -> ProxyHealth:
+        key = str(proxy)
+        health = self.health.get(key)
+        if health is None:
+            health = ProxyHealth(alpha=self.ewma_alpha)
+            self.health[key] = health
+        return health
 
     def reload_proxies(self):
-        """Reload proxies from file"""
-        self.proxies = self._load_proxies()
-        self.current_index = 0
-        self.proxy_failures = {}
+        """Reload proxies from file (health is kept, also for proxies that return later)"""
+        proxies = self._load_proxies()
+        with self._lock:
+            before = {str(p) for p in self.proxies}
+            self.proxies = proxies
+            self.current_index = 0
+            after = set()
+            for proxy in proxies:
+                key = str(proxy)
+                self._known[key] = proxy
+                after.add(key)
+            # Proxies that joined or left the list change is_active
+            self._dirty |= before ^ after
         logger.info(f"Reloaded {len(self.proxies)} proxies from {self.proxy_file}")
         return len(self.proxies)
 
+    def add_proxies(self, lines: Iterable[str]) -> int:
+        """Add proxies to the live pool without touching rotation or health"""
+        added = 0
+        with self._lock:
+            listed = {str(p) for p in self.proxies}
+            for line in lines:
+                proxy = self._parse_proxy(line)
+                if proxy is None or str(proxy) in listed:
+                    continue
+                self.proxies.append(proxy)
+                listed.add(str(proxy))
+                self._known[str(proxy)] = proxy
+                self._dirty.add(str(proxy))
+                added += 1
+        return added
+
+    def retire_proxies(self, lines: Iterable[str]) -> int:
+        """Drop proxies from the live pool (health is kept, stored as inactive)"""
+        keys = set()
+        for line in lines:
+            proxy = self._parse_proxy(line)
+            if proxy is not None:
+                keys.add(str(proxy))
+        with self._lock:
+            before = len(self.proxies)
+            self.proxies = [p for p in self.proxies if str(p) not in keys]
+            self._dirty |= keys & set(self._known)
+            return before - len(self.proxies)
+
+    def save_proxies(self) -> int:
+        """Write the live pool back to the proxy file"""
+        with self._lock:
+            lines = [p.to_line() for p in self.proxies]
+        with open(self.proxy_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        return len(lines)
+
     def _load_proxies(self) -> List[ProxyConfig]:
         """Load proxies from file if it exists and return them"""
         loaded_proxies: List[ProxyConfig] = []
@@ -137,47 +353,152 @@ class SmartProxyManager:
         """Check if proxies are available"""
         return len(self.proxies) > 0
 
-    def get_next_proxy(self) -> Optional[ProxyConfig]:
+    def get_next_proxy(self, exclude: Optional[Iterable[str]] = None) -> Optional[ProxyConfig]:
         """
-        Get next working proxy, or None if no proxies available
-        Automatically skips failed proxies
+        Get the healthiest available proxy, or None if none is available.
+        Skips proxies whose breaker is open, that are cooling down, or whose
+        str() is in `exclude`. Equal scores go to the least recently used.
         """
         if not self.has_proxies():
             return None
 
-        # Try to find a working proxy
-        attempts = 0
-        while attempts < len(self.proxies):
-            proxy = self.proxies[self.current_index % len(self.proxies)]
-            proxy_str = str(proxy)
-
-            # Skip if proxy has failed too many times
-            if self.proxy_failures.get(proxy_str, 0) >= self.max_failures:
-                logger.debug(f"Skipping failed proxy: {proxy_str}")
+        excluded = set(exclude or ())
+        now = time.time()
+        with self._lock:
+            best, best_key = None, None
+            for proxy in self.proxies:
+                key = str(proxy)
+                if key in excluded:
+                    continue
+                health = self._health(proxy)
+                if not health.is_available(now):
+                    continue
+                rank = (round(health.score(), 6), -health.last_used_seq)
+                if best_key is None or rank > best_key:
+                    best, best_key = proxy, rank
+
+            if best is not None:
+                health = self._health(best)
+                health.last_used = now
+                health.last_used_seq = next(self._use_seq)
+                health.handed_out(now)
+                self._dirty.add(str(best))
                 self.current_index += 1
-                attempts += 1
-                continue
-
-            self.current_index += 1
-            return proxy
+                return best
 
-        # All proxies have failed
-        logger.warning("All proxies have failed. Running without proxy.")
+        if self.all_circuits_open():
+            logger.warning("All proxies have failed. Running without proxy.")
         return None
 
-    def mark_proxy_success(self, proxy: ProxyConfig):
-        """Mark proxy as successful (reset failure count)"""
-        proxy_str = str(proxy)
-        if proxy_str in self.proxy_failures:
-            del self.proxy_failures[proxy_str]
+    def all_circuits_open(self) -> bool:
+        """True when every proxy's breaker is open (nothing to wait for)"""
+        now = time.time()
+        with self._lock:
+            for proxy in self.proxies:
+                health = self._health(proxy)
+                health.refresh_state(now)
+                if health.state != OPEN:
+                    return False
+        return True
+
+    # ─── Reservations (one user per proxy across engines) ─────
+    def reserve_proxy(self, exclude: Optional[Iterable[str]] = None) -> Optional[ProxyConfig]:
+        """
+        Like get_next_proxy, but skips proxies someone else reserved and
+        holds the one returned until release_proxy(). Worker threads, the
+        async engine and the refresher all reserve here, so an exit is
+        never shared between them.
+        """
+        with self._lock:
+            proxy = self.get_next_proxy(exclude=set(exclude or ()) | self._reserved)
+            if proxy is not None:
+                self._reserved.add(str(proxy))
+            return proxy
 
-    def mark_proxy_failure(self, proxy: ProxyConfig):
-        """Mark proxy as failed"""
+    def release_proxy(self, proxy: Optional[ProxyConfig], cooldown: float = 0):
+        """Give back a reserved proxy, optionally resting it for `cooldown` seconds"""
+        if proxy is None:
+            return
+        with self._lock:
+            self._reserved.discard(str(proxy))
+            if cooldown:
+                self._health(proxy).cooldown_until = time.time() + cooldown
+
+    def start_cooldown(self, proxy: ProxyConfig, seconds: float):
+        """Rest a proxy between jobs; it is not selectable until then"""
+        with self._lock:
+            self._health(proxy).cooldown_until = time.time() + seconds
+
+    def mark_proxy_success(self, proxy: ProxyConfig, latency: Optional[float] = None):
+        """Mark proxy as successful (closes its breaker, feeds the EWMAs)"""
+        with self._lock:
+            self._health(proxy).record_success(latency)
+            self._dirty.add(str(proxy))
+
+    def mark_proxy_failure(self, proxy: ProxyConfig, banned: bool = False):
+        """Mark proxy as failed; `banned` for captcha / unusual-traffic pages"""
         proxy_str = str(proxy)
-        self.proxy_failures[proxy_str] = self.proxy_failures.get(proxy_str, 0) + 1
-        logger.warning(
-            f"Proxy failed ({self.proxy_failures[proxy_str]}/{self.max_failures}): {proxy_str}"
-        )
+        with self._lock:
+            health = self._health(proxy)
+            health.record_failure(
+                time.time(), self.max_failures, self.breaker_cooldown,
+                self.breaker_max_cooldown, banned=banned,
+            )
+            self._dirty.add(proxy_str)
+            failures, state = health.consecutive_failures, health.state
+        reason = "banned" if banned else "failed"
+        logger.warning(f"Proxy {reason} ({failures}/{self.max_failures}, {state}): {proxy_str}")
+
+    def get_state(self) -> Dict:
+        """Snapshot of every proxy's health, best first"""
+        now = time.time()
+        with self._lock:
+            proxies = [
+                {"proxy": str(p), **self._health(p).to_dict(now)}
+                for p in self.proxies
+            ]
+        proxies.sort(key=lambda p: p["score"], reverse=True)
+        states = {CLOSED: 0, HALF_OPEN: 0, OPEN: 0}
+        for p in proxies:
+            states[p["state"]] += 1
+        return {"total": len(proxies), "states": states, "proxies": proxies}
+
+    # ─── Persistence (driven by proxy_store) ──────────────────
+    def restore_health(self, records: Dict[str, Dict]):
+        """Seed health from stored records; proxies already tracked are left alone"""
+        with self._lock:
+            restored = 0
+            # Replay in last-used order so LRU tie-breaking survives the restart
+            for key, record in sorted(records.items(), key=lambda item: item[1].get("last_used") or 0):
+                if key not in self._known:
+                    self._known[key] = ProxyConfig(
+                        record["host"], str(record["port"]), record.get("username")
+                    )
+                if key in self.health:
+                    continue
+                health = ProxyHealth.from_record(record, self.ewma_alpha)
+                health.last_used_seq = next(self._use_seq)
+                self.health[key] = health
+                restored += 1
+        logger.info(f"Restored health for {restored} proxies")
+        return restored
+
+    def drain_dirty(self) -> List[Dict]:
+        """Records for every proxy changed since the last call"""
+        with self._lock:
+            active = {str(p) for p in self.proxies}
+            records = [
+                self._health(self._known[key]).to_record(self._known[key], key in active)
+                for key in self._dirty
+                if key in self._known
+            ]
+            self._dirty.clear()
+        return records
+
+    def mark_dirty(self, keys: Iterable[str]):
+        """Queue proxies for the next flush again (e.g. after a failed write)"""
+        with self._lock:
+            self._dirty.update(keys)
 
     def get_playwright_config(self) -> Optional[Dict]:
         """
@@ -2,8 +2,9 @@ import requests
 import re
 import logging
 import time
-import concurrent.futures
-from typing import List, Set, Dict, Tuple
+import asyncio
+from urllib.parse import urlsplit
+from typing import List, Set, Dict, Tuple, Optional, Iterable, AsyncIterator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -107,40 +108,121 @@ def check_proxy(proxy, url="http://www.google.com/robots.txt", timeout=4):
         pass
     return False
 
-def verify_proxies(proxy_list: List[str], max_workers=100) -> List[str]:
+CHECK_URL = "http://www.google.com/robots.txt"
+
+
+async def check_proxy_async(proxy: str, url: str = CHECK_URL, timeout: float = 4) -> Optional[Tuple[str, int]]:
     """
-    Verify a list of proxies concurrently.
-    Returns sorted list of working proxy strings (IP:Port), sorted by latency.
+    Async check_proxy(): one plain HTTP request through the proxy over raw
+    asyncio streams (no thread, no session). Returns (proxy, latency_ms) or None.
     """
-    valid_proxies = []
-    logger.info(f"Verifying {len(proxy_list)} proxies with {max_workers} threads...")
-    
-    # Suppress obscure SSL warnings from urllib3
-    requests.packages.urllib3.disable_warnings()
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_proxy = {executor.submit(check_proxy, p): p for p in proxy_list}
-        completed = 0
-        total = len(proxy_list)
-        
-        for future in concurrent.futures.as_completed(future_to_proxy):
-            completed += 1
-            if completed % 100 == 0:
-                logger.info(f"Checked {completed}/{total}...")
-                
-            result = future.result()
+    host, port = proxy.rsplit(":", 1)
+    target = urlsplit(url)
+    request = (
+        f"GET {url} HTTP/1.1\r\n"
+        f"Host: {target.netloc}\r\n"
+        "User-Agent: Mozilla/5.0\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode()
+
+    writer = None
+
+    async def probe():
+        nonlocal writer
+        reader, writer = await asyncio.open_connection(host, int(port))
+        writer.write(request)
+        await writer.drain()
+        return await reader.readline()
+
+    start_time = time.monotonic()
+    try:
+        status_line = await asyncio.wait_for(probe(), timeout)
+        latency = int((time.monotonic() - start_time) * 1000)
+        parts = status_line.split()
+        if len(parts) >= 2 and parts[1] == b"200":
+            return (proxy, latency)
+    except (OSError, asyncio.TimeoutError, ValueError):
+        pass
+    finally:
+        if writer is not None:
+            writer.close()
+    return None
+
+
+async def iter_verified_proxies(
+    proxy_list: Iterable[str],
+    concurrency: int = 500,
+    target: Optional[int] = None,
+    timeout: float = 4,
+) -> AsyncIterator[Tuple[str, int]]:
+    """
+    Yield (proxy, latency_ms) for each working proxy as soon as it answers.
+    At most `concurrency` probes are in flight; once `target` proxies have
+    been found (or the consumer stops iterating) the remaining probes are
+    cancelled.
+    """
+    candidates = iter(proxy_list)
+    results: asyncio.Queue = asyncio.Queue()
+    checked = 0
+
+    async def worker():
+        nonlocal checked
+        for proxy in candidates:  # shared iterator: each candidate is probed once
+            result = await check_proxy_async(proxy, timeout=timeout)
+            checked += 1
+            if checked % 1000 == 0:
+                logger.info(f"Checked {checked} proxies...")
             if result:
-                valid_proxies.append({'proxy': result[0], 'latency': result[1]})
-    
-    # Sort by latency
-    valid_proxies.sort(key=lambda x: x['latency'])
-    
-    # Extract just the proxy strings
-    final_list = [p['proxy'] for p in valid_proxies]
-    
-    logger.info(f"Verification complete: {len(final_list)}/{total} proxies works")
+                await results.put(result)
+        await results.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    found = 0
+    running = len(workers)
+    try:
+        while running:
+            result = await results.get()
+            if result is None:
+                running -= 1
+                continue
+            found += 1
+            yield result
+            if target and found >= target:
+                logger.info(f"Found {found} working proxies after {checked} checks, stopping early")
+                break
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def verify_proxies_async(
+    proxy_list: List[str],
+    concurrency: int = 500,
+    target: Optional[int] = None,
+    timeout: float = 4,
+) -> List[str]:
+    """Async verify_proxies(): working proxy strings sorted by latency"""
+    logger.info(f"Verifying {len(proxy_list)} proxies with {concurrency} concurrent probes...")
+    valid_proxies = [
+        result async for result in iter_verified_proxies(proxy_list, concurrency, target, timeout)
+    ]
+    valid_proxies.sort(key=lambda x: x[1])
+    final_list = [proxy for proxy, _ in valid_proxies]
+    logger.info(f"Verification complete: {len(final_list)}/{len(proxy_list)} proxies works")
     return final_list
 
+
+def verify_proxies(proxy_list: List[str], max_workers: int = 500, target: Optional[int] = None,
+                   timeout: float = 4) -> List[str]:
+    """
+    Verify a list of proxies concurrently.
+    Returns sorted list of working proxy strings (IP:Port), sorted by latency.
+    Blocking wrapper around verify_proxies_async(); call it from a thread,
+    not from a running event loop.
+    """
+    return asyncio.run(verify_proxies_async(proxy_list, max_workers, target, timeout))
+
 if __name__ == "__main__":
     # Test run
     print("Fetching...")
@@ -0,0 +1,98 @@
+"""
+Durable proxy health
+Restores SmartProxyManager health from the proxies table at startup and
+flushes the proxies that changed back in one batched upsert every
+PROXY_HEALTH_FLUSH_INTERVAL seconds. Scraper threads only touch memory;
+the database work happens here, through the single writer.
+"""
+
+import threading
+import logging
+from typing import Optional
+
+from config import settings
+from db_writer import get_db_writer
+from proxy_manager import SmartProxyManager, get_proxy_manager
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyHealthStore:
+    """Load-once, flush-periodically bridge between the proxy manager and SQLite"""
+
+    def __init__(self, manager: Optional[SmartProxyManager] = None, interval: Optional[float] = None):
+        self._manager = manager
+        self.interval = interval or settings.proxy_health_flush_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters
+        self.flushes = 0
+        self.records_written = 0
+
+    @property
+    def manager(self) -> SmartProxyManager:
+        if self._manager is None:
+            self._manager = get_proxy_manager()
+        return self._manager
+
+    def load(self) -> int:
+        """Seed the manager with the stored health of every known proxy"""
+        records = get_db_writer().call('load_proxy_health')
+        return self.manager.restore_health(records)
+
+    def flush(self, wait: bool = False) -> int:
+        """Queue one upsert for every proxy changed since the last flush"""
+        records = self.manager.drain_dirty()
+        if not records:
+            return 0
+
+        keys = [record["proxy"] for record in records]
+        future = get_db_writer().submit('save_proxy_health', records)
+
+        def done(f):
+            if f.exception() is not None:
+                logger.error(f"Failed to save health of {len(keys)} proxies: {f.exception()}")
+                self.manager.mark_dirty(keys)
+            else:
+                self.flushes += 1
+                self.records_written += len(keys)
+
+        future.add_done_callback(done)
+        if wait:
+            try:
+                future.result()
+            except Exception:
+                pass  # logged by the callback
+        return len(records)
+
+    # ─── Lifecycle ─────────────────────────────────────────────
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Could not restore proxy health: {e}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="proxy-health-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flush loop and write whatever changed since the last flush"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush(wait=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Proxy health flush error: {e}")
+
+
+# Global instance
+proxy_store = ProxyHealthStore()
@@ -0,0 +1,113 @@
+"""
+Raw capture archive
+With RAW_ARCHIVE_ENABLED the scrapers keep what each business was parsed
+from (the DETAIL_PANEL_SCRIPT snapshot and/or the intercepted Maps place
+records) as one gzipped JSON file per place, addressed by the sha256 of
+its canonical maps_url. Records carry that canonical URL, the key the
+businesses table stores, so reextract.py can re-parse the archive offline
+and a parser fix reaches stored listings without scraping them again.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, List, Iterator
+
+from config import settings
+from field_parser import canonical_maps_url
+
+logger = logging.getLogger(__name__)
+
+# Bump when the record layout changes
+ARCHIVE_FORMAT = 1
+
+
+def archive_key(maps_url: str) -> str:
+    """Content address of a place: sha256 of its canonical maps URL"""
+    return hashlib.sha256(canonical_maps_url(maps_url).encode("utf-8")).hexdigest()
+
+
+class RawArchive:
+    """<dir>/ab/cd/<sha256>.json.gz per place; safe to share between threads"""
+
+    def __init__(self, directory: Optional[Path] = None, enabled: Optional[bool] = None):
+        self.directory = Path(directory or settings.raw_archive_dir)
+        self.enabled = settings.raw_archive_enabled if enabled is None else enabled
+
+        # Counters
+        self.writes = 0
+        self.bytes_written = 0
+
+    def path(self, maps_url: str) -> Path:
+        key = archive_key(maps_url)
+        # Two fan-out levels keep directories small at millions of places
+        return self.directory / key[:2] / key[2:4] / f"{key}.json.gz"
+
+    def put(
+        self,
+        maps_url: Optional[str],
+        name: str,
+        panel: Optional[Dict] = None,
+        places: Optional[List] = None,
+    ):
+        """Store the raw capture of one business (the latest capture wins)"""
+        if not self.enabled or not maps_url or (panel is None and not places):
+            return
+        maps_url = canonical_maps_url(maps_url)
+        record = {
+            "format": ARCHIVE_FORMAT,
+            "maps_url": maps_url,
+            "name": name,
+            "captured_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "panel": panel,
+            "places": places or [],
+        }
+        path = self.path(maps_url)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = gzip.compress(json.dumps(record, ensure_ascii=False).encode("utf-8"), compresslevel=6)
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug(f"Could not archive {maps_url}: {e}")
+            return
+        self.writes += 1
+        self.bytes_written += len(data)
+
+    def get(self, maps_url: str) -> Optional[Dict]:
+        """Archived record for a place, or None"""
+        return load_record(self.path(maps_url))
+
+    def paths(self) -> Iterator[Path]:
+        """Every archived file (no particular order)"""
+        if not self.directory.exists():
+            return iter(())
+        return self.directory.glob("*/*/*.json.gz")
+
+
+def load_record(path: Path) -> Optional[Dict]:
+    """Read one archive file; None if it is missing or damaged"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Unreadable archive file {path}: {e}")
+        return None
+
+
+# Global instance
+_raw_archive = None
+
+
+def get_raw_archive() -> RawArchive:
+    """Get or create the global raw archive"""
+    global _raw_archive
+    if _raw_archive is None:
+        _raw_archive = RawArchive()
+    return _raw_archive
@@ -0,0 +1,103 @@
+"""
+Offline re-extraction from the raw capture archive
+Re-parses every archived business (see raw_archive.py) with the current
+field parser on all CPU cores and writes improved fields back to the
+businesses table. No browser, no proxies, no network.
+
+    python reextract.py                 # re-parse and update the database
+    python reextract.py --dry-run       # parse only (timing, unreadable files)
+    python reextract.py --workers 4 --archive-dir /data/raw_archive
+"""
+
+import sys
+import time
+import logging
+import argparse
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+from typing import Optional, Dict
+
+from config import settings
+from db import Database
+from field_parser import classify_panel, canonical_maps_url
+from maps_payload import place_to_business, merge_missing
+from raw_archive import RawArchive, load_record
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("address", "phone", "website", "rating", "reviews")
+
+
+def reextract_record(record: Dict) -> Dict:
+    """Fields of one archived business, parsed the way the live scrape would"""
+    business = classify_panel(record["panel"]) if record.get("panel") else {}
+    for place in record.get("places") or []:
+        merge_missing(business, place_to_business(place))
+    row = {field: business.get(field) for field in FIELDS}
+    # Files written before records stored the canonical URL hold the raw href
+    row["maps_url"] = canonical_maps_url(record["maps_url"])
+    return row
+
+
+def _reextract_file(path: str) -> Optional[Dict]:
+    # Pool worker: one archive file in, one update row out
+    record = load_record(Path(path))
+    return reextract_record(record) if record else None
+
+
+def run(archive_dir: Path, db_path: Path, workers: int, batch_size: int, dry_run: bool) -> Dict:
+    archive = RawArchive(archive_dir, enabled=True)
+    db = None if dry_run else Database(str(db_path))
+    stats = {"files": 0, "unreadable": 0, "updated": 0}
+    started = time.perf_counter()
+
+    batch = []
+    paths = (str(path) for path in archive.paths())
+    try:
+        with Pool(workers) as pool:
+            for row in pool.imap_unordered(_reextract_file, paths, chunksize=256):
+                stats["files"] += 1
+                if row is None:
+                    stats["unreadable"] += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    stats["updated"] += db.update_business_fields(batch) if db else 0
+                    batch = []
+                if stats["files"] % 10000 == 0:
+                    logger.info(f"♻️ {stats['files']} archived businesses re-parsed...")
+            if db:
+                stats["updated"] += db.update_business_fields(batch)
+    finally:
+        if db:
+            db.close()
+
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-parse the raw capture archive into the database")
+    parser.add_argument("--archive-dir", type=Path, default=settings.raw_archive_dir)
+    parser.add_argument("--db", type=Path, default=settings.database_path)
+    parser.add_argument("--workers", type=int, default=cpu_count(), help="parser processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per database transaction")
+    parser.add_argument("--dry-run", action="store_true", help="parse only, leave the database alone")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if not args.archive_dir.exists():
+        logger.error(f"No raw archive at {args.archive_dir} (scrape with RAW_ARCHIVE_ENABLED=true)")
+        return 1
+
+    stats = run(args.archive_dir, args.db, args.workers, args.batch_size, args.dry_run)
+    logger.info(
+        f"✅ Re-extracted {stats['files']} businesses in {stats['seconds']}s with {args.workers} workers: "
+        f"{stats['updated']} updated, {stats['unreadable']} unreadable"
+        + (" (dry run)" if args.dry_run else "")
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
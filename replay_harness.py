@@ -0,0 +1,119 @@
+"""
+Offline record/replay harness
+HAR_MODE=record saves every request of a live run (pages and Maps XHRs,
+with bodies) to HAR_PATH; HAR_MODE=replay serves them back from disk
+through Playwright's route_from_har, so the scraper and the benchmark
+suite (tests/test_extraction_benchmark.py) run with no network.
+
+    HAR_MODE=record python scraper_playwright.py   # once, live
+    HAR_MODE=replay python scraper_playwright.py   # offline, repeatable
+
+Every context records its own file (see har_path_for): the direct
+connection writes HAR_PATH, proxied contexts write HAR_PATH with a suffix.
+"""
+
+import hashlib
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HAR_MODES = ("off", "record", "replay")
+
+# Locator plumbing that is built client-side without a browser round trip
+_LOCAL_CALLS = {
+    "locator", "nth", "filter", "frame_locator", "on", "once", "remove_listener",
+    "get_by_role", "get_by_text", "get_by_label", "get_by_placeholder",
+    "get_by_test_id", "get_by_title", "get_by_alt_text", "is_closed",
+}
+
+
+def har_path_for(har_path: Path, proxy_key: Optional[str] = None) -> Path:
+    """
+    HAR file of one context. Each context writes its HAR when it closes, so
+    contexts sharing a path would overwrite each other's recording. The
+    suffix is a digest, so proxy credentials never end up in file names.
+    """
+    if not proxy_key:
+        return har_path
+    digest = hashlib.sha1(proxy_key.encode()).hexdigest()[:12]
+    return har_path.with_name(f"{har_path.stem}-{digest}{har_path.suffix}")
+
+
+def har_context_options(mode: str, har_path: Path, proxy_key: Optional[str] = None) -> Dict:
+    """Extra new_context() options for the HAR mode"""
+    if mode == "record":
+        har_path = har_path_for(har_path, proxy_key)
+        har_path.parent.mkdir(parents=True, exist_ok=True)
+        logger.info(f"📼 Recording HAR to {har_path} (written when the context closes)")
+        return {"record_har_path": str(har_path), "record_har_mode": "full"}
+    return {}
+
+
+def attach_replay(context, har_path: Path, proxy_key: Optional[str] = None):
+    """
+    Serve every request of `context` from the HAR; unknown URLs are aborted.
+    Uses the context's own recording, or HAR_PATH when that exit was never recorded.
+    """
+    own = har_path_for(har_path, proxy_key)
+    if own.exists():
+        har_path = own
+    if not har_path.exists():
+        raise FileNotFoundError(f"No HAR to replay at {har_path} (record one with HAR_MODE=record)")
+    logger.info(f"📼 Replaying {har_path}")
+    context.route_from_har(str(har_path), not_found="abort")
+
+
+class DomQueryCounter:
+    """
+    Counts Playwright calls that cross into the browser.
+
+    wrap(page) returns a stand-in that forwards everything to the page and
+    wraps the locators it hands out, so `counter.total` after a run is the
+    number of DOM queries/actions the scraper made.
+    """
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def reset(self):
+        self.counts.clear()
+
+    def wrap(self, target):
+        return _Counted(target, self)
+
+
+class _Counted:
+    __slots__ = ("_target", "_counter")
+
+    def __init__(self, target, counter: DomQueryCounter):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_counter", counter)
+
+    def _wrap_result(self, result):
+        if isinstance(result, list):
+            return [self._wrap_result(item) for item in result]
+        if type(result).__name__ in ("Locator", "ElementHandle", "FrameLocator"):
+            return _Counted(result, self._counter)
+        return result
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return self._wrap_result(attr)  # e.g. Locator.first
+
+        def call(*args, **kwargs):
+            if name not in _LOCAL_CALLS:
+                self._counter.counts[name] += 1
+            return self._wrap_result(attr(*args, **kwargs))
+
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
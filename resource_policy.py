@@ -0,0 +1,117 @@
+"""
+Request filtering and traffic accounting for Playwright contexts
+Blocks resource types / URL patterns we never need (images, fonts, map
+tiles, analytics) and counts the bytes each job pulls through the proxy.
+"""
+
+import re
+import logging
+from typing import Optional, List
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _compile(patterns: List[str]) -> Optional["re.Pattern"]:
+    """Join regex patterns into one alternation (None when empty)"""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+class ResourcePolicy:
+    """
+    Allow/deny policy applied through context.route().
+
+    Order of evaluation:
+    1. URL matches an allow pattern   -> continue
+    2. resource type is blocked       -> abort
+    3. URL matches a block pattern    -> abort
+    4. anything else                  -> continue
+    """
+
+    def __init__(
+        self,
+        block_types: Optional[List[str]] = None,
+        block_patterns: Optional[List[str]] = None,
+        allow_patterns: Optional[List[str]] = None,
+    ):
+        self.block_types = set(
+            block_types if block_types is not None else settings.block_resource_types
+        )
+        self._block_re = _compile(
+            block_patterns if block_patterns is not None else settings.block_url_patterns
+        )
+        self._allow_re = _compile(
+            allow_patterns if allow_patterns is not None else settings.allow_url_patterns
+        )
+        self.blocked = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.block_types or self._block_re)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if self._allow_re is not None and self._allow_re.search(url):
+            return False
+        if resource_type in self.block_types:
+            return True
+        return self._block_re is not None and self._block_re.search(url) is not None
+
+    def handle_route(self, route):
+        """Sync route handler: context.route("**/*", policy.handle_route)"""
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    async def handle_route_async(self, route):
+        """Async route handler"""
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+
+class TrafficMeter:
+    """
+    Byte counter for one job. Attach to every page the job opens:
+        page.on("requestfinished", meter.on_request_finished)
+    """
+
+    def __init__(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.requests = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.bytes_in + self.bytes_out
+
+    def _add(self, sizes: dict):
+        self.requests += 1
+        self.bytes_out += sizes.get("requestHeadersSize", 0) + sizes.get("requestBodySize", 0)
+        self.bytes_in += sizes.get("responseHeadersSize", 0) + sizes.get("responseBodySize", 0)
+
+    def on_request_finished(self, request):
+        try:
+            self._add(request.sizes())
+        except Exception as e:
+            logger.debug(f"Could not size request {request.url[:80]}: {e}")
+
+    async def on_request_finished_async(self, request):
+        try:
+            self._add(await request.sizes())
+        except Exception as e:
+            logger.debug(f"Could not size request {request.url[:80]}: {e}")
+
+    def cost(self, cost_per_gb: float) -> float:
+        return self.total_bytes / (1024 ** 3) * cost_per_gb
+
+    def summary(self) -> str:
+        return f"{self.total_bytes / (1024 * 1024):.2f} MB over {self.requests} requests"
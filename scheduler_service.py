@@ -1,53 +1,101 @@
+import time
 import asyncio
 import logging
-from proxy_scraper import fetch_proxies, verify_proxies
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from config import settings
+from proxy_scraper import fetch_proxies, iter_verified_proxies
 from proxy_manager import get_proxy_manager
-from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class Candidate:
+    """A free proxy seen in the sources, and how its checks went"""
+
+    first_seen: float
+    last_checked: float = 0.0
+    failures: int = 0  # consecutive failed checks
+    latency: Optional[int] = None
+    working: bool = False
+
+
+class ProxyCandidatePool:
+    """
+    Every free proxy the sources have offered, with last-checked times.
+    A candidate is due for a check when it is new or stale; stale doubles
+    with each consecutive failure so dead entries are probed less and less
+    until they are retired.
+    """
+
+    def __init__(self, recheck_after: float, retire_after: int):
+        self.recheck_after = recheck_after
+        self.retire_after = retire_after
+        self.candidates: Dict[str, Candidate] = {}
+
+    def add(self, proxies: List[str], now: float) -> int:
+        added = 0
+        for proxy in proxies:
+            if proxy not in self.candidates:
+                self.candidates[proxy] = Candidate(first_seen=now)
+                added += 1
+        return added
+
+    def due(self, now: float, limit: int) -> List[str]:
+        """New or stale candidates; working ones first so the live pool stays fresh"""
+        due = [
+            (not c.working, c.last_checked, proxy)
+            for proxy, c in self.candidates.items()
+            if now - c.last_checked >= self.recheck_after * 2 ** c.failures
+        ]
+        due.sort()
+        return [proxy for _, _, proxy in due[:limit]]
+
+    def record(self, proxy: str, now: float, latency: Optional[int]) -> bool:
+        """Store a check result; True when the candidate should be retired"""
+        candidate = self.candidates[proxy]
+        candidate.last_checked = now
+        candidate.latency = latency
+        candidate.working = latency is not None
+        candidate.failures = 0 if candidate.working else candidate.failures + 1
+        if candidate.failures >= self.retire_after:
+            del self.candidates[proxy]
+            return True
+        return False
+
+    @property
+    def working(self) -> int:
+        return sum(1 for c in self.candidates.values() if c.working)
+
+
 class SchedulerService:
+    """
+    Keeps the free proxy pool fresh in small steps: sources are re-fetched
+    every PROXY_FETCH_INTERVAL, and every PROXY_REFRESH_INTERVAL the new and
+    stale candidates are verified and merged into the live proxy manager
+    (rotation and health are left alone).
+    """
+
     def __init__(self):
         self.running = False
         self.task = None
+        self.pool = ProxyCandidatePool(settings.proxy_recheck_after, settings.proxy_retire_after)
+        self.last_fetch = 0.0
 
     def start(self):
         if not self.running:
             self.running = True
             self.task = asyncio.create_task(self._run_loop())
-            logger.info("✅ Scheduler started: Will verify proxies every 8 hours")
+            logger.info(
+                f"✅ Scheduler started: refreshing proxies every {settings.proxy_refresh_interval}s"
+            )
 
     async def _run_loop(self):
-        logger.info("🕒 Scheduler: First background check will run in 8 hours (use 'Fetch' button for immediate run)")
         while self.running:
             try:
-                # Wait 8 hours
-                await asyncio.sleep(8 * 3600)
-
-                logger.info("🕒 Scheduler: Starting scheduled proxy update...")
-                
-                # Run content in thread to avoid blocking event loop
-                raw_proxies = await asyncio.to_thread(fetch_proxies)
-                
-                if raw_proxies:
-                    logger.info(f"🕒 Scheduler: Fetched {len(raw_proxies)} proxies. Verifying...")
-                    
-                    working_proxies = await asyncio.to_thread(verify_proxies, raw_proxies)
-                    
-                    if working_proxies:
-                        # Save
-                        proxy_file = Path("proxies.txt")
-                        with open(proxy_file, "w", encoding="utf-8") as f:
-                            f.write("\n".join(working_proxies))
-                        
-                        # Reload
-                        manager = get_proxy_manager()
-                        count = manager.reload_proxies()
-                        logger.info(f"🕒 Scheduler: Complete! Saved {count} verified proxies.")
-                    else:
-                        logger.warning("🕒 Scheduler: No working proxies found after verification.")
-                else:
-                    logger.warning("🕒 Scheduler: No proxies fetched.")
+                await asyncio.sleep(settings.proxy_refresh_interval)
+                await self.refresh()
 
             except asyncio.CancelledError:
                 logger.info("Scheduler task cancelled")
@@ -56,5 +104,53 @@ class SchedulerService:
                 logger.error(f"🕒 Scheduler Error: {e}")
                 await asyncio.sleep(60) # Retry after 1 min on error
 
+    async def refresh(self):
+        """One incremental step: maybe fetch, verify what is due, merge"""
+        now = time.time()
+        if now - self.last_fetch >= settings.proxy_fetch_interval:
+            # Run content in thread to avoid blocking event loop
+            raw_proxies = await asyncio.to_thread(fetch_proxies)
+            self.last_fetch = now
+            added = self.pool.add(raw_proxies, now)
+            logger.info(f"🕒 Scheduler: Fetched {len(raw_proxies)} proxies, {added} new candidates")
+
+        due = self.pool.due(now, settings.proxy_refresh_batch)
+        if not due:
+            return
+
+        logger.info(f"🕒 Scheduler: Verifying {len(due)} new or stale candidates...")
+        manager = get_proxy_manager()
+        working, batch, added = set(), [], 0
+        async for proxy, latency in iter_verified_proxies(
+            due,
+            concurrency=settings.proxy_verify_concurrency,
+            timeout=settings.proxy_verify_timeout,
+        ):
+            self.pool.record(proxy, time.time(), latency)
+            working.add(proxy)
+            # Workers can use good proxies before the pass finishes
+            batch.append(proxy)
+            if len(batch) >= 25:
+                added += manager.add_proxies(batch)
+                batch = []
+        added += manager.add_proxies(batch)
+
+        retired = []
+        checked_at = time.time()
+        for proxy in due:
+            if proxy not in working and self.pool.record(proxy, checked_at, None):
+                retired.append(proxy)
+
+        # A single failed check can be a transient timeout: live proxies only go
+        # once the candidate is retired (PROXY_RETIRE_AFTER failures in a row)
+        removed = manager.retire_proxies(retired)
+        if added or removed:
+            await asyncio.to_thread(manager.save_proxies)
+
+        logger.info(
+            f"🕒 Scheduler: {len(working)}/{len(due)} passed, +{added} live, -{removed} live, "
+            f"{len(retired)} retired ({len(self.pool.candidates)} candidates, {self.pool.working} working)"
+        )
+
 # Singleton instance
 scheduler = SchedulerService()
@@ -11,6 +11,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from seleniumwire import webdriver as wire_webdriver
 import config
+from field_parser import canonical_maps_url, parse_count, parse_rating
 
 logger = logging.getLogger(__name__)
 
@@ -173,19 +174,19 @@ class GoogleMapsScraper:
                     data['website'] = None
                 
                 # Maps URL
-                data['maps_url'] = self.driver.current_url
+                data['maps_url'] = canonical_maps_url(self.driver.current_url)
                 
                 # Rating
                 try:
                     rating_text = self.driver.find_element(By.CSS_SELECTOR, "div[role='img'][aria-label*='stars']").get_attribute('aria-label')
-                    data['rating'] = float(rating_text.split()[0])
+                    data['rating'] = parse_rating(rating_text)
                 except:
                     data['rating'] = None
                 
                 # Reviews
                 try:
                     reviews_text = self.driver.find_element(By.CSS_SELECTOR, "button[aria-label*='reviews']").text
-                    data['reviews'] = int(reviews_text.replace(',', '').replace('(', '').replace(')', ''))
+                    data['reviews'] = parse_count(reviews_text)
                 except:
                     data['reviews'] = None
                 
@@ -0,0 +1,700 @@
+"""
+Async Google Maps Business Scraper (playwright.async_api)
+Runs many searches concurrently on one event loop: one shared Chromium,
+one context per proxy (shared by the searches using that proxy), and a
+bounded number of pages in flight.
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from config import settings
+import timing
+from proxy_manager import get_proxy_manager, ProxyConfig
+from exceptions import ProxyBannedException
+from browser_pool import LAUNCH_ARGS, USER_AGENT, VIEWPORT, DIRECT_KEY
+from session_cache import get_session_cache
+from maps_payload import MapsPayloadCollector, missing_fields, merge_missing
+from detail_panel import DETAIL_PANEL_SCRIPT
+from field_parser import classify_panel, canonical_maps_url, is_listing_card
+from raw_archive import get_raw_archive
+from resource_policy import ResourcePolicy, TrafficMeter
+from page_waits import (
+    WaitStats,
+    PolitenessBudget,
+    FEED_CARDS_JS,
+    PANEL_FOR_NAME_JS,
+    wait_for_selector_async,
+    wait_for_function_async,
+    wait_for_network_idle_async,
+    summary as wait_summary,
+)
+from scraper_playwright import (
+    SEARCH_SELECTORS,
+    CONSENT_SELECTORS,
+    CONSENT_FORM_SELECTOR,
+    LANDING_SELECTOR,
+    RESULTS_SELECTOR,
+    BAN_PAGE_JS,
+    is_transport_error,
+)
+
+logger = logging.getLogger(__name__)
+
+# Maps UI without a place panel: a results list, or the search box of a "not found" page
+MAPS_APP_SELECTOR = ", ".join(SEARCH_SELECTORS + ["div[role='feed']"])
+
+
+class AsyncGoogleMapsScraper:
+    """
+    asyncio-native Google Maps scraper.
+
+    Usage:
+        async with AsyncGoogleMapsScraper() as scraper:
+            businesses = await scraper.scrape("plumbers", "Prague", "Czech Republic")
+            results = await scraper.scrape_many([("dentists", "Madrid", "Spain"), ...])
+
+    `scrape` has the same contract as GoogleMapsScraper.scrape; every call
+    works on its own page, so concurrent calls never share state.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_contexts: Optional[int] = None):
+        self.proxy_manager = get_proxy_manager()
+        self.max_concurrency = max_concurrency or settings.async_max_concurrent_pages
+        self.max_contexts = max_contexts or settings.browser_pool_max_contexts
+
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._contexts: "OrderedDict[str, BrowserContext]" = OrderedDict()
+        # Searches holding each context; a context is only closed once it has none
+        self._users: Dict[BrowserContext, int] = {}
+        self._warm = set()  # context keys started from a saved session
+        self._saved = set()  # context keys whose session is already cached
+        self.sessions = get_session_cache()
+        self.archive = get_raw_archive()
+        self._start_lock = asyncio.Lock()
+        self._context_lock = asyncio.Lock()
+        self._pages = asyncio.Semaphore(self.max_concurrency)
+        self.policy = ResourcePolicy()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # ─── Browser lifecycle ─────────────────────────────────────
+    async def start(self) -> Browser:
+        """Launch the shared browser (idempotent)"""
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            logger.info("🚀 Launching async Chromium instance")
+            self._browser = await self._playwright.chromium.launch(
+                headless=settings.headless_mode,
+                args=LAUNCH_ARGS,
+            )
+            self._contexts.clear()
+            self._users.clear()
+            self._warm.clear()
+            self._saved.clear()
+            return self._browser
+
+    async def close(self):
+        """Close every context, the browser and the Playwright driver"""
+        for context in set(self._contexts.values()) | set(self._users):
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._contexts.clear()
+        self._users.clear()
+        self._warm.clear()
+        self._saved.clear()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.debug(f"Browser close error: {e}")
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _acquire_context(self, proxy: Optional[ProxyConfig]) -> BrowserContext:
+        """
+        The context bound to `proxy`, created if needed; every search that
+        acquires one must hand it back with _release_context.
+        """
+        browser = await self.start()
+        key = str(proxy) if proxy else DIRECT_KEY
+        async with self._context_lock:
+            context = self._contexts.get(key)
+            if context is None:
+                options = {"viewport": VIEWPORT, "user_agent": USER_AGENT, "locale": self.sessions.locale}
+                if proxy:
+                    options["proxy"] = proxy.to_playwright_config()
+                state = await asyncio.to_thread(self.sessions.get, key)
+                if state is not None:
+                    options["storage_state"] = state
+                    self._warm.add(key)
+                    self._saved.add(key)
+                context = await browser.new_context(**options)
+                if self.policy.enabled:
+                    await context.route("**/*", self.policy.handle_route_async)
+                self._contexts[key] = context
+            self._contexts.move_to_end(key)
+            self._users[context] = self._users.get(context, 0) + 1
+            await self._evict_idle_contexts()
+        return context
+
+    async def _release_context(self, context: BrowserContext):
+        """Drop one user; a discarded context is closed when its last user leaves"""
+        async with self._context_lock:
+            users = self._users.get(context, 0) - 1
+            if users > 0:
+                self._users[context] = users
+                return
+            self._users.pop(context, None)
+            if context not in self._contexts.values():
+                await self._close_context(context)
+            await self._evict_idle_contexts()
+
+    async def _evict_idle_contexts(self):
+        # Caller holds _context_lock. Contexts in use are never evicted.
+        excess = len(self._contexts) - self.max_contexts
+        for key in [key for key, context in self._contexts.items() if context not in self._users]:
+            if excess <= 0:
+                break
+            logger.debug(f"Evicting browser context: {key}")
+            self._warm.discard(key)
+            self._saved.discard(key)
+            await self._close_context(self._contexts.pop(key))
+            excess -= 1
+
+    @staticmethod
+    async def _close_context(context: BrowserContext):
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _save_session(self, proxy: Optional[ProxyConfig]):
+        """Cache a context's cookies once it got past consent (once per context)"""
+        key = str(proxy) if proxy else DIRECT_KEY
+        context = self._contexts.get(key)
+        if context is None or key in self._saved or not self.sessions.enabled:
+            return
+        try:
+            state = await context.storage_state()
+            await asyncio.to_thread(self.sessions.put, key, state)
+            self._saved.add(key)
+        except Exception as e:
+            logger.debug(f"Could not read storage state for {key}: {e}")
+
+    async def _discard_context(self, proxy: Optional[ProxyConfig], context: BrowserContext):
+        """
+        Retire a context whose proxy failed (cookies/session may be burnt):
+        later searches get a fresh one, and it is closed once the searches
+        still using it release it.
+        """
+        key = str(proxy) if proxy else DIRECT_KEY
+        async with self._context_lock:
+            if self._contexts.get(key) is not context:
+                return  # already replaced by another search
+            del self._contexts[key]
+            self.sessions.discard(key)
+            self._warm.discard(key)
+            self._saved.discard(key)
+
+    # ─── Public API ────────────────────────────────────────────
+    async def scrape(
+        self,
+        category: str,
+        city: str,
+        country: str = "",
+        max_results: Optional[int] = None,
+        proxy: Optional[ProxyConfig] = None,
+        traffic: Optional[TrafficMeter] = None,
+        timer: Optional[timing.JobTimer] = None,
+    ) -> List[Dict]:
+        """
+        Scrape businesses from Google Maps
+
+        Args:
+            category: Business category (e.g., "plumbers", "dentists")
+            city: City name
+            country: Country name (optional)
+            max_results: Maximum results to scrape (uses config default if None)
+            proxy: Proxy for the first attempt (optional)
+            traffic: Meter that receives the bytes this search transfers (optional)
+            timer: Collects this search's phase timings (a new one if None)
+
+        Returns:
+            List of business dictionaries
+        """
+        max_results = max_results or settings.max_results_per_job
+        search_query = f"{category} in {city}"
+        if country:
+            search_query += f", {country}"
+
+        logger.info(f"[async] Starting scrape: {search_query} (target {max_results})")
+        max_proxy_retries = 5
+        waits = WaitStats()
+        politeness = PolitenessBudget()
+
+        timer = timer or timing.JobTimer()
+        timing_token = timing.activate(timer)
+        try:
+            async with self._pages:
+                for attempt in range(max_proxy_retries + 1):  # +1 for final no-proxy attempt
+                    current_proxy = reserved = None
+                    if attempt == 0 and proxy:
+                        current_proxy = proxy
+                    elif attempt < max_proxy_retries:
+                        # Reserved like a worker's exit, so no worker shares it meanwhile
+                        current_proxy = reserved = self.proxy_manager.reserve_proxy()
+                    timing.set_proxy(str(current_proxy) if current_proxy else None)
+
+                    page = None
+                    context = None
+                    try:
+                        context = await self._acquire_context(current_proxy)
+                        page = await context.new_page()
+                        page.set_default_timeout(settings.page_load_timeout * 1000)
+                        if traffic is not None:
+                            page.on("requestfinished", traffic.on_request_finished_async)
+
+                        payloads = None
+                        if settings.extraction_mode == "network":
+                            payloads = MapsPayloadCollector(
+                                str(current_proxy) if current_proxy else "No proxy",
+                                keep_raw=self.archive.enabled,
+                            )
+                            page.on("response", payloads.on_response_async)
+
+                        latency = await self._open_search(page, search_query, waits, current_proxy)
+                        await self._save_session(current_proxy)
+                        businesses = await self._scroll_and_extract(
+                            page, max_results, current_proxy, payloads, waits, politeness
+                        )
+
+                        logger.info(f"[async] ✅ Scraped {len(businesses)} businesses: {search_query}")
+                        logger.info(f"[async] ⏱️ Waits: {wait_summary(waits, politeness)}")
+                        if current_proxy:
+                            self.proxy_manager.mark_proxy_success(current_proxy, latency)
+                        return businesses
+
+                    except Exception as e:
+                        logger.error(f"[async] ❌ Attempt {attempt + 1} failed for {search_query}: {e}")
+                        if current_proxy:
+                            self.proxy_manager.mark_proxy_failure(
+                                current_proxy, banned=isinstance(e, ProxyBannedException)
+                            )
+                        if context is not None:
+                            await self._discard_context(current_proxy, context)
+                        if attempt >= max_proxy_retries:
+                            raise
+                        await asyncio.sleep(2)
+
+                    finally:
+                        if page is not None:
+                            try:
+                                await page.close()
+                            except Exception:
+                                pass
+                        if context is not None:
+                            await self._release_context(context)
+                        self.proxy_manager.release_proxy(reserved)
+            return []
+        finally:
+            timing.deactivate(timing_token)
+            logger.info(f"[async] ⏱️ {search_query}: {timer.summary()}")
+
+    async def scrape_many(
+        self, queries: List[Tuple[str, str, str]], max_results: Optional[int] = None
+    ) -> List:
+        """
+        Run several (category, city, country) searches concurrently.
+        Returns one entry per query: the business list, or the exception it raised.
+        """
+        tasks = [
+            self.scrape(category, city, country, max_results)
+            for category, city, country in queries
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def visit_place(
+        self,
+        maps_url: str,
+        name: str,
+        proxy: Optional[ProxyConfig] = None,
+        traffic: Optional[TrafficMeter] = None,
+    ) -> Optional[Dict]:
+        """
+        Open a stored listing straight from its maps_url (no search, no
+        scrolling) and read its detail panel.
+
+        Returns:
+            address/phone/website/has_website, or None when Maps rendered
+            without a place (a results list or "not found": listing removed
+            or URL no longer valid). A consent wall or any other page raises,
+            since it says nothing about the listing.
+        """
+        max_proxy_retries = 2
+        waits = WaitStats()
+
+        async with self._pages:
+            for attempt in range(max_proxy_retries + 1):  # +1 for final no-proxy attempt
+                current_proxy = reserved = None
+                if attempt == 0 and proxy:
+                    current_proxy = proxy
+                elif attempt < max_proxy_retries:
+                    # Reserved like a worker's exit, so no worker shares it meanwhile
+                    current_proxy = reserved = self.proxy_manager.reserve_proxy()
+
+                page = None
+                context = None
+                try:
+                    context = await self._acquire_context(current_proxy)
+                    page = await context.new_page()
+                    page.set_default_timeout(settings.page_load_timeout * 1000)
+                    if traffic is not None:
+                        page.on("requestfinished", traffic.on_request_finished_async)
+
+                    started = time.monotonic()
+                    await page.goto(maps_url, wait_until="domcontentloaded", timeout=60000)
+                    latency = time.monotonic() - started
+                    timing.record("navigation", latency)
+                    if await page.evaluate(BAN_PAGE_JS):
+                        raise ProxyBannedException("Google served an unusual-traffic page")
+                    with timing.span("consent"):
+                        await self._pass_consent(page, waits, current_proxy)
+
+                    panel = None
+                    phase = timing.Stopwatch()
+                    if await wait_for_selector_async(page, "div[role='main'] h1", waits):
+                        await wait_for_selector_async(
+                            page, "div[role='main'] button[data-item-id]", waits, timeout_ms=3000
+                        )
+                        await wait_for_network_idle_async(page, waits)
+                        phase.lap("panel_wait")
+                        panel = await page.evaluate(DETAIL_PANEL_SCRIPT, name)
+                        phase.lap("panel_extract")
+                    elif not await self._maps_rendered(page):
+                        raise Exception(f"No Maps page for {name} (landed on {page.url[:100]})")
+                    await self._save_session(current_proxy)
+
+                    if current_proxy:
+                        self.proxy_manager.mark_proxy_success(current_proxy, latency)
+                    if not panel:
+                        logger.info(f"[async] No place panel for {name} at {maps_url}")
+                        return None
+                    if self.archive.enabled:
+                        await asyncio.to_thread(self.archive.put, maps_url, name, panel)
+                    return classify_panel(panel)
+
+                except Exception as e:
+                    logger.error(f"[async] ❌ Attempt {attempt + 1} failed for {name}: {e}")
+                    if current_proxy:
+                        self.proxy_manager.mark_proxy_failure(
+                            current_proxy, banned=isinstance(e, ProxyBannedException)
+                        )
+                    if context is not None:
+                        await self._discard_context(current_proxy, context)
+                    if attempt >= max_proxy_retries:
+                        raise
+                    await asyncio.sleep(2)
+
+                finally:
+                    if page is not None:
+                        try:
+                            await page.close()
+                        except Exception:
+                            pass
+                    if context is not None:
+                        await self._release_context(context)
+                    self.proxy_manager.release_proxy(reserved)
+        return None
+
+    # ─── Page steps ────────────────────────────────────────────
+    async def _open_search(
+        self, page: Page, search_query: str, waits: WaitStats, proxy: Optional[ProxyConfig] = None
+    ):
+        """
+        Open Google Maps, pass the consent wall and submit the search.
+        Returns the landing page latency in seconds (for proxy health).
+        """
+        started = time.monotonic()
+        await page.goto("https://www.google.com/maps", wait_until="domcontentloaded", timeout=60000)
+        latency = time.monotonic() - started
+        timing.record("navigation", latency)
+        if await page.evaluate(BAN_PAGE_JS):
+            raise ProxyBannedException("Google served an unusual-traffic page")
+        await wait_for_selector_async(page, LANDING_SELECTOR, waits)
+        with timing.span("consent"):
+            await self._pass_consent(page, waits, proxy)
+        search_timer = timing.Stopwatch()
+
+        search_box = None
+        for selector in SEARCH_SELECTORS:
+            try:
+                candidate = page.locator(selector).first
+                await candidate.wait_for(state="visible", timeout=10000)
+                search_box = candidate
+                break
+            except Exception:
+                continue
+        if search_box is None:
+            raise Exception("Search box not found with any selector")
+
+        await search_box.click()
+        await search_box.fill(search_query)
+        await search_box.press("Enter")
+        await wait_for_selector_async(page, RESULTS_SELECTOR, waits, state="attached")
+        search_timer.lap("search")
+        return latency
+
+    async def _pass_consent(self, page: Page, waits: WaitStats, proxy: Optional[ProxyConfig]):
+        """
+        Accept consent unless the context is warm. A warm context that still
+        lands on the consent form has a stale session: accept again and let
+        _save_session() store the new cookies.
+        """
+        key = str(proxy) if proxy else DIRECT_KEY
+        warm = key in self._warm
+        if await page.locator(CONSENT_FORM_SELECTOR).count() > 0:
+            if warm:
+                logger.info(f"🍪 Saved session for {key} got the consent wall again, re-accepting")
+            self._warm.discard(key)
+            self._saved.discard(key)
+            await self._handle_consent(page, waits)
+        elif not warm:
+            await self._handle_consent(page, waits)
+
+    @staticmethod
+    async def _maps_rendered(page: Page) -> bool:
+        """Maps itself rendered (search box or results feed), past any consent wall"""
+        if await page.locator(CONSENT_FORM_SELECTOR).count() > 0:
+            return False
+        return await page.locator(MAPS_APP_SELECTOR).count() > 0
+
+    async def _handle_consent(self, page: Page, waits: WaitStats):
+        """Handle Google consent popup"""
+        try:
+            for s in CONSENT_SELECTORS:
+                locator = page.locator(s)
+                if await locator.count() > 0 and await locator.first.is_visible():
+                    logger.info(f"Found consent button: {s}")
+                    await locator.first.click()
+                    await wait_for_selector_async(page, ", ".join(SEARCH_SELECTORS), waits)
+                    return
+        except Exception as e:
+            logger.warning(f"Consent handling error: {e}")
+
+    async def _scroll_and_extract(
+        self,
+        page: Page,
+        max_results: int,
+        proxy: Optional[ProxyConfig],
+        payloads: Optional[MapsPayloadCollector] = None,
+        waits: Optional[WaitStats] = None,
+        politeness: Optional[PolitenessBudget] = None,
+    ) -> List[Dict]:
+        """Scroll through results and extract business data"""
+        waits = waits or WaitStats()
+        politeness = politeness or PolitenessBudget()
+        businesses: List[Dict] = []
+        await page.wait_for_selector("div[role='feed']", timeout=10000)
+
+        previous_card_count = 0
+        no_new_results_count = 0
+        seen_names = set()
+
+        while len(businesses) < max_results:
+            business_cards = await page.locator("div[role='feed'] > div > div").all()
+
+            for card in business_cards[previous_card_count:]:
+                if len(businesses) >= max_results:
+                    break
+                try:
+                    business_data = await self._extract_business_data(
+                        page, card, proxy, payloads, waits, politeness
+                    )
+                except Exception as e:
+                    if is_transport_error(e) or page.is_closed():
+                        # Proxy/page died: fail the attempt rather than skip the rest of the feed
+                        raise
+                    logger.debug(f"Error extracting business: {e}")
+                    continue
+                if business_data and business_data["name"] not in seen_names:
+                    seen_names.add(business_data["name"])
+                    businesses.append(business_data)
+                    logger.info(f"  [async {len(businesses)}/{max_results}] {business_data['name']}")
+
+            current_card_count = len(business_cards)
+            if current_card_count == previous_card_count:
+                no_new_results_count += 1
+                if no_new_results_count >= 3:
+                    logger.warning("No new results after 3 scrolls, stopping")
+                    break
+            else:
+                no_new_results_count = 0
+            previous_card_count = current_card_count
+
+            if len(businesses) < max_results:
+                with timing.span("scroll"):
+                    await page.evaluate("""
+                        const feed = document.querySelector('div[role="feed"]');
+                        if (feed) {
+                            feed.scrollTo(0, feed.scrollHeight);
+                        }
+                    """)
+                    await wait_for_function_async(
+                        page,
+                        f"n => {FEED_CARDS_JS} > n",
+                        waits,
+                        arg=current_card_count,
+                        timeout_ms=settings.scroll_pause_max * 1000,
+                    )
+
+        return businesses
+
+    async def _archive(
+        self,
+        business: Dict,
+        payloads: Optional[MapsPayloadCollector],
+        panel: Optional[Dict] = None,
+    ):
+        """Keep what a business was parsed from, for offline re-extraction"""
+        if self.archive.enabled:
+            places = payloads.raw_places(business["name"], business.get("maps_url")) if payloads else None
+            await asyncio.to_thread(
+                self.archive.put, business.get("maps_url"), business["name"], panel, places
+            )
+
+    async def _extract_business_data(
+        self,
+        page: Page,
+        card,
+        proxy: Optional[ProxyConfig],
+        payloads: Optional[MapsPayloadCollector] = None,
+        waits: Optional[WaitStats] = None,
+        politeness: Optional[PolitenessBudget] = None,
+    ) -> Optional[Dict]:
+        """Click a result card and read name, address, phone and website"""
+        waits = waits or WaitStats()
+        politeness = politeness or PolitenessBudget()
+        phase = timing.Stopwatch()
+        card_text = await card.inner_text()
+        if not card_text or len(card_text) < 10:
+            return None
+
+        name = card_text.split("\n")[0].strip() or "N/A"
+        if not is_listing_card(name, card_text):
+            return None
+
+        business_link = card.locator("a[href*='/maps/place/']").first
+        if await card.locator("a[href*='/maps/place/']").count() == 0:
+            return None
+        place_url = canonical_maps_url(await business_link.get_attribute("href"))
+
+        # Network mode: the feed's XHR payload usually has everything already
+        payload_record = payloads.lookup(name, place_url) if payloads else None
+        if payload_record and not missing_fields(payload_record, settings.network_required_fields):
+            if place_url:
+                payload_record["maps_url"] = place_url
+            await self._archive(payload_record, payloads)
+            phase.lap("card_payload")
+            return payload_record
+
+        if not await business_link.is_visible(timeout=1000):
+            return None
+        try:
+            await business_link.click(timeout=2000)
+        except PlaywrightTimeoutError as e:
+            # Covered or detached link: skip this card
+            logger.debug(f"Could not click card for {name}: {e}")
+            return None
+        phase.lap("card_click")
+
+        business_data = {
+            "name": name,
+            "address": "N/A",
+            "phone": "N/A",
+            "website": "N/A",
+            "has_website": "No",
+            "maps_url": place_url or canonical_maps_url(page.url),
+            "scraped_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "proxy_used": str(proxy) if proxy else "No proxy",
+        }
+
+        # Panel shows this business, action buttons rendered, late XHRs settled
+        if not await wait_for_function_async(page, PANEL_FOR_NAME_JS, waits, arg=name):
+            logger.debug(f"Detail panel for {name} did not open")
+        elif not await wait_for_selector_async(
+            page, "div[role='main'] button[data-item-id]", waits, timeout_ms=3000
+        ):
+            logger.debug(f"Detail panel not fully loaded for {name}")
+        await wait_for_network_idle_async(page, waits)
+        phase.lap("panel_wait")
+
+        # Every field in one round trip, classified in Python
+        try:
+            panel = await page.evaluate(DETAIL_PANEL_SCRIPT, name)
+        except Exception as e:
+            logger.debug(f"Detail panel read failed for {name}: {e}")
+            panel = None
+        business_data.update(classify_panel(panel))
+        phase.lap("panel_extract")
+
+        merge_missing(business_data, payload_record)
+        await self._archive(business_data, payloads, panel)
+
+        # Politeness pause before the next click
+        with timing.span("politeness"):
+            await politeness.pause_async()
+        return business_data
+
+
+# Global instance shared by the FastAPI app (one event loop, one browser)
+_async_scraper = None
+
+
+def get_async_scraper() -> AsyncGoogleMapsScraper:
+    """Get or create the global async scraper instance"""
+    global _async_scraper
+    if _async_scraper is None:
+        _async_scraper = AsyncGoogleMapsScraper()
+    return _async_scraper
+
+
+async def close_async_scraper():
+    """Close the global async scraper (FastAPI shutdown hook)"""
+    global _async_scraper
+    if _async_scraper is not None:
+        await _async_scraper.close()
+        _async_scraper = None
+
+
+if __name__ == "__main__":
+    async def _demo():
+        async with AsyncGoogleMapsScraper() as scraper:
+            results = await scraper.scrape_many(
+                [("plumbers", "Prague", "Czech Republic"), ("dentists", "Brno", "Czech Republic")],
+                max_results=10,
+            )
+            for result in results:
+                print(result if isinstance(result, Exception) else f"{len(result)} businesses")
+
+    asyncio.run(_demo())
@@ -1,18 +1,78 @@
 """
 Scraper controller - manages scraper state and execution
 Uses Playwright-based scraper for Google Maps scraping
+Runs a pool of workers; each worker owns its DB connection, browser and proxy
 """
+import os
+import socket
 import threading
 import time
+import random
 import logging
 from datetime import datetime
+import timing
+import search_cache
 from db import Database
+from db_writer import get_db_writer
+from event_bus import event_bus
 from proxy_manager import get_proxy_manager
 from scraper_playwright import GoogleMapsScraper
+from browser_pool import get_browser_pool, close_browser_pool
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+DIRECT_EXIT = "direct"
+
+
+def to_business_row(biz, category, city, country):
+    """Map a scraper business dict to a `businesses` table row"""
+    return {
+        'name': biz.get('name'),
+        'category': category,
+        'city': city,
+        'country': country,
+        'address': biz.get('address'),
+        'phone': biz.get('phone'),
+        'website': biz.get('website') if biz.get('has_website') == 'Yes' else None,
+        'maps_url': biz.get('maps_url'),
+        'rating': biz.get('rating'),
+        'reviews': biz.get('reviews')
+    }
+
+
+class ScraperWorker:
+    """State and control flags of a single worker thread"""
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.thread = None
+        self.status = 'stopped'  # stopped, running, paused, cooldown, error
+        self.current_job = None
+        self.current_proxy = None
+        self.exit = None  # reserved proxy (None = direct), swapped on in-job failover
+        self.jobs_done = 0
+        # Lease owner id, unique across processes and hosts sharing the queue
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{worker_id}"
+        self.lease_lost = False
+
+        # Control flags
+        self.should_stop = False
+        self.should_pause = False
+        self.should_skip = False
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def to_dict(self):
+        return {
+            'worker_id': self.worker_id,
+            'status': self.status,
+            'current_job': self.current_job,
+            'current_proxy': self.current_proxy,
+            'jobs_done': self.jobs_done,
+        }
+
 
 class ScraperController:
     """Singleton controller for scraper"""
@@ -31,13 +91,21 @@ class ScraperController:
             return
 
         self._initialized = True
-        self.db = Database(str(settings.database_path))
+        self.db = Database(str(settings.database_path), stats_ttl=settings.stats_cache_ttl)
         self.proxy_manager = get_proxy_manager()
 
         # State
         self.status = 'stopped'  # stopped, running, paused, error
-        self.current_job = None
-        self.thread = None
+        self.workers = {}
+
+        # Exit (proxy or direct connection) bookkeeping shared by workers
+        self._exit_lock = threading.Lock()
+        self._exits_in_use = set()  # the direct exit; proxies are reserved in the proxy manager
+        self._exit_ready_at = {}
+        self._stats_lock = threading.Lock()
+        # One lease heartbeat thread, alive while any worker is
+        self._heartbeat_lock = threading.Lock()
+        self._heartbeat_thread = None
 
         # Statistics
         self.stats = {
@@ -53,104 +121,145 @@ class ScraperController:
 
         # Control flags
         self.should_stop = False
-        self.should_pause = False
-        self.should_skip = False
-        
+
         # Config (dynamic)
         self.max_results = settings.max_results_per_job
 
+    @property
+    def current_job(self):
+        """Job of the first busy worker (kept for single-worker clients)"""
+        for worker in self.workers.values():
+            if worker.current_job:
+                return worker.current_job
+        return None
+
     def set_config(self, max_results: int):
         """Update scraper configuration"""
         self.max_results = max_results
         logger.info(f"Updated max_results to {max_results}")
 
+    def _select_workers(self, worker_id=None):
+        """Workers addressed by a control call (all of them if worker_id is None)"""
+        if worker_id is None:
+            return list(self.workers.values())
+        worker = self.workers.get(worker_id)
+        return [worker] if worker else []
+
     def start(self):
-        """Start scraper in background thread"""
+        """Start scraper worker threads"""
         if self.status == 'running':
             return {'success': False, 'error': 'Already running'}
 
+        # Jobs left running by a crashed process come back once their lease expires
+        get_db_writer().call('requeue_expired_jobs')
+
         # Check for pending jobs
-        jobs = self.db.get_pending_jobs()
-        if not jobs:
+        pending = self.db.count_jobs('pending')
+        if not pending:
             return {'success': False, 'error': 'No pending jobs. Add jobs first.'}
 
         self.should_stop = False
-        self.should_pause = False
         self.status = 'running'
         self.stats['started_at'] = datetime.now().isoformat()
         self.stats['error_message'] = None
         self.stats['businesses_scraped'] = 0
 
-        self.thread = threading.Thread(target=self._run_scraper, daemon=True)
-        self.thread.start()
+        worker_count = max(1, min(settings.scraper_workers, pending))
+        self.workers = {}
+        for worker_id in range(1, worker_count + 1):
+            worker = ScraperWorker(worker_id)
+            worker.status = 'running'
+            worker.thread = threading.Thread(
+                target=self._run_worker, args=(worker,), daemon=True,
+                name=f"scraper-worker-{worker_id}"
+            )
+            self.workers[worker_id] = worker
+            worker.thread.start()
 
-        return {'success': True, 'message': f'Started with {len(jobs)} pending jobs'}
+        self._ensure_heartbeat()
+        self._publish_status()
 
-    def pause(self):
-        """Pause scraper"""
-        if self.status != 'running':
+        return {
+            'success': True,
+            'message': f'Started {worker_count} worker(s) with {pending} pending jobs'
+        }
+
+    def pause(self, worker_id=None):
+        """Pause all workers, or a single one"""
+        workers = [w for w in self._select_workers(worker_id) if w.is_alive()]
+        if self.status != 'running' or not workers:
             return {'success': False, 'error': 'Not running'}
 
-        self.should_pause = True
-        self.status = 'paused'
+        for worker in workers:
+            worker.should_pause = True
+            worker.status = 'paused'
+        if worker_id is None:
+            self.status = 'paused'
+        self._publish_status()
         return {'success': True}
 
-    def resume(self):
-        """Resume scraper"""
-        if self.status != 'paused':
+    def resume(self, worker_id=None):
+        """Resume all workers, or a single one"""
+        workers = [w for w in self._select_workers(worker_id) if w.should_pause]
+        if not workers:
             return {'success': False, 'error': 'Not paused'}
 
-        self.should_pause = False
+        for worker in workers:
+            worker.should_pause = False
+            worker.status = 'running'
         self.status = 'running'
+        self._publish_status()
         return {'success': True}
 
-    def stop(self):
-        """Stop scraper"""
-        self.should_stop = True
-        self.status = 'stopped'
+    def stop(self, worker_id=None):
+        """Stop all workers, or a single one"""
+        for worker in self._select_workers(worker_id):
+            worker.should_stop = True
+        if worker_id is None:
+            self.should_stop = True
+            self.status = 'stopped'
+        self._publish_status()
         return {'success': True}
 
-    def skip_current(self):
-        """Skip current job"""
-        if self.status != 'running':
+    def skip_current(self, worker_id=None):
+        """Skip the current job of all workers, or of a single one"""
+        workers = [w for w in self._select_workers(worker_id) if w.current_job]
+        if self.status != 'running' or not workers:
             return {'success': False, 'error': 'Not running'}
 
-        self.should_skip = True
+        for worker in workers:
+            worker.should_skip = True
         return {'success': True}
 
     def force_unstuck(self):
         """Force unstuck scraper"""
         # Reset running jobs to pending
-        cursor = self.db.conn.cursor()
-        cursor.execute('UPDATE jobs SET status = "pending" WHERE status = "running"')
-        self.db.conn.commit()
-        reset_count = cursor.rowcount
+        reset_count = get_db_writer().call('reset_running_jobs')
 
         self.status = 'stopped'
-        self.current_job = None
         self.should_stop = True
+        for worker in self.workers.values():
+            worker.should_stop = True
+            worker.current_job = None
 
+        self._publish_status()
+        self._publish_stats()
         return {'success': True, 'jobs_reset': reset_count}
 
     def get_status(self):
         """Get current status"""
-        # Update job counts
-        cursor = self.db.conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM jobs')
-        self.stats['total_jobs'] = cursor.fetchone()[0]
-
-        cursor.execute('SELECT COUNT(*) FROM jobs WHERE status = "completed"')
-        self.stats['completed_jobs'] = cursor.fetchone()[0]
-
-        cursor.execute('SELECT COUNT(*) FROM jobs WHERE status = "pending"')
-        pending = cursor.fetchone()[0]
-
-        cursor.execute('SELECT COUNT(*) FROM businesses')
-        total_businesses = cursor.fetchone()[0]
+        # Job and business counts from the cached, trigger-maintained counters
+        db_stats = self.db.get_statistics()
+        jobs = db_stats['jobs']
+        self.stats['total_jobs'] = sum(jobs.values())
+        self.stats['completed_jobs'] = jobs.get('completed', 0)
+        pending = jobs.get('pending', 0)
+        total_businesses = db_stats['total_businesses']
 
         return {
             'status': self.status,
             'current_job': self.current_job,
+            'workers': [w.to_dict() for w in self.workers.values()],
             'stats': {
                 **self.stats,
                 'total_businesses': total_businesses,
@@ -158,122 +267,347 @@ class ScraperController:
             }
         }
 
-    def _run_scraper(self):
-        """Main scraper loop (runs in background thread)"""
-        # Create thread-local DB connection
-        local_db = Database(str(settings.database_path))
-        
+    # ─── Live feed ─────────────────────────────────────────────
+    def _publish_status(self):
+        event_bus.publish(
+            'status',
+            status=self.status,
+            workers=[w.to_dict() for w in self.workers.values()],
+        )
+
+    def _publish_stats(self):
+        """Push fresh counters once, read on the writer's connection after pending writes"""
+        future = get_db_writer().submit(lambda db: db.get_statistics(fresh=True))
+        future.add_done_callback(
+            lambda f: event_bus.publish('stats', **f.result()) if f.exception() is None else None
+        )
+
+    # ─── Job leases ────────────────────────────────────────────
+    def _ensure_heartbeat(self):
+        """Start the heartbeat thread unless one is still running"""
+        with self._heartbeat_lock:
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(
+                    target=self._heartbeat_loop, daemon=True, name="job-heartbeat"
+                )
+                self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self):
+        """Extend the lease of every job in progress until all workers exit"""
+        writer = get_db_writer()
+        while True:
+            time.sleep(settings.job_heartbeat_interval)
+            with self._heartbeat_lock:
+                workers = [w for w in self.workers.values() if w.is_alive()]
+                if not workers:
+                    # A later start() sees no thread and launches a new one
+                    self._heartbeat_thread = None
+                    return
+            for worker in workers:
+                job = worker.current_job
+                if not job or worker.lease_lost:
+                    continue
+                future = writer.submit(
+                    'heartbeat_job', job['id'], worker.owner_id, settings.job_lease_seconds
+                )
+                future.add_done_callback(
+                    lambda f, worker=worker, job_id=job['id']: self._on_heartbeat(worker, job_id, f)
+                )
+
+    def _on_heartbeat(self, worker, job_id, future):
+        if future.exception() is None and future.result():
+            return
+        current = worker.current_job
+        if current and current['id'] == job_id:
+            logger.warning(
+                f"Worker {worker.worker_id} lost the lease on job #{job_id}, abandoning it"
+            )
+            worker.lease_lost = True
+
+    # ─── Exits (proxy / direct) with per-exit cooldown ─────────
+    def _reserve_exit(self):
+        """
+        Reserve the healthiest proxy that nobody holds and that is off
+        cooldown (the proxy manager tracks reservations, cooldowns and
+        breakers).
+        Falls back to the direct connection when no proxies are configured
+        or every proxy's breaker is open. Returns (found, proxy); proxy is
+        None for direct.
+        """
+        now = time.time()
+        with self._exit_lock:
+            if self.proxy_manager.has_proxies():
+                proxy = self.proxy_manager.reserve_proxy()
+                if proxy is not None:
+                    return True, proxy
+                if not self.proxy_manager.all_circuits_open():
+                    # Proxies exist but all are busy or cooling down
+                    return False, None
+
+            if DIRECT_EXIT in self._exits_in_use or self._exit_ready_at.get(DIRECT_EXIT, 0) > now:
+                return False, None
+            self._exits_in_use.add(DIRECT_EXIT)
+            return True, None
+
+    def _release_exit(self, proxy):
+        """Return an exit to the pool and start its cooldown"""
+        key = str(proxy) if proxy else DIRECT_EXIT
+        cooldown = random.randint(settings.proxy_cooldown_min, settings.proxy_cooldown_max)
+        with self._exit_lock:
+            if proxy:
+                self.proxy_manager.release_proxy(proxy, cooldown)
+            else:
+                self._exits_in_use.discard(key)
+                self._exit_ready_at[key] = time.time() + cooldown
+        logger.info(f"Exit {key} cooling down for {cooldown}s")
+
+    def _replace_exit(self, worker):
+        """
+        In-job failover: reserve another free proxy for the worker and
+        release the one it held. Returns None (the scraper goes direct)
+        when no other proxy is free.
+        """
+        proxy = self.proxy_manager.reserve_proxy()
+        if proxy is None:
+            return None
+        self._release_exit(worker.exit)
+        worker.exit = proxy
+        return proxy
+
+    def _wait_for_exit(self, worker):
+        """Block until an exit is free; returns (found, proxy)"""
+        waiting_logged = False
+        while not (worker.should_stop or self.should_stop):
+            found, proxy = self._reserve_exit()
+            if found:
+                return True, proxy
+            if not waiting_logged:
+                logger.info(f"Worker {worker.worker_id}: all exits busy or cooling down, waiting...")
+                waiting_logged = True
+            worker.status = 'cooldown'
+            time.sleep(1)
+        return False, None
+
+    # ─── Worker loop ───────────────────────────────────────────
+    def _run_worker(self, worker):
+        """Worker loop (runs in its own thread)"""
+        # All writes go through the shared writer thread
+        writer = get_db_writer()
+        # Warm browser shared by every job this worker runs
+        browser_pool = get_browser_pool()
+
         try:
-            while not self.should_stop:
+            while not (worker.should_stop or self.should_stop):
                 # Check pause
-                while self.should_pause and not self.should_stop:
+                while worker.should_pause and not (worker.should_stop or self.should_stop):
                     time.sleep(1)
 
-                if self.should_stop:
+                if worker.should_stop or self.should_stop:
                     break
 
-                # Get next job
-                jobs = local_db.get_pending_jobs()
-                if not jobs:
-                    logger.info("No pending jobs — scraper finished")
+                # Reserve an exit before claiming, so a claimed job never waits
+                found, proxy = self._wait_for_exit(worker)
+                if not found:
                     break
-
-                job = jobs[0]
-                self._process_job(job, local_db)
-
-                # Delay between jobs (anti-detection)
-                if not self.should_stop:
-                    import random
-                    delay = random.randint(30, 90)
-                    logger.info(f"Waiting {delay}s before next job...")
-                    for _ in range(delay):
-                        if self.should_stop:
-                            break
-                        time.sleep(1)
+                worker.exit = proxy
+
+                try:
+                    job = writer.call(
+                        'claim_next_job', worker.owner_id, settings.job_lease_seconds
+                    )
+                    if not job:
+                        logger.info(f"Worker {worker.worker_id}: no pending jobs — finished")
+                        break
+
+                    worker.status = 'paused' if worker.should_pause else 'running'
+                    self._process_job(job, writer, worker, proxy, browser_pool)
+                finally:
+                    self._release_exit(worker.exit)
+                    worker.exit = None
 
         except Exception as e:
-            logger.error(f"Scraper error: {e}")
-            self.status = 'error'
+            logger.error(f"Worker {worker.worker_id} error: {e}")
+            worker.status = 'error'
             self.stats['error_message'] = str(e)
+            event_bus.publish('error', worker_id=worker.worker_id, message=str(e))
 
         finally:
-            self.status = 'stopped'
-            logger.info("Scraper stopped")
-
-    def _process_job(self, job, db):
-        """Process single job using Playwright scraper"""
+            close_browser_pool()
+            if worker.status != 'error':
+                worker.status = 'stopped'
+            worker.current_job = None
+            logger.info(f"Worker {worker.worker_id} stopped")
+
+            if not any(w.is_alive() for w in self.workers.values() if w is not worker):
+                self.status = 'error' if worker.status == 'error' else 'stopped'
+                logger.info("Scraper stopped")
+            self._publish_status()
+
+    def _process_job(self, job, writer, worker, proxy=None, browser_pool=None):
+        """Process single (already claimed) job using Playwright scraper"""
         job_id = job['id']
         category = job['category']
         city = job['city']
         country = job['country']
 
-        self.current_job = {
+        worker.current_job = {
             'id': job_id,
             'category': category,
             'city': city,
-            'country': country
+            'country': country,
+            'worker_id': worker.worker_id
         }
+        worker.current_proxy = str(proxy) if proxy else None
+        self.stats['current_proxy'] = worker.current_proxy
+
+        logger.info(f"Worker {worker.worker_id} starting job #{job_id}: {category} in {city}, {country}")
+        worker.should_skip = False
+        worker.lease_lost = False
+
+        def should_cancel():
+            return worker.should_stop or worker.should_skip or self.should_stop or worker.lease_lost
+
+        def on_business(business):
+            self.stats['current_business'] = business.get('name', '')
+            event_bus.publish(
+                'business_scraped',
+                worker_id=worker.worker_id,
+                job_id=job_id,
+                name=business.get('name'),
+                has_website=business.get('has_website') == 'Yes',
+            )
 
-        logger.info(f"Starting job #{job_id}: {category} in {city}, {country}")
-        db.update_job_status(job_id, 'running')
-        self.should_skip = False
+        def on_proxy(current):
+            worker.current_proxy = str(current) if current else None
+            self.stats['current_proxy'] = worker.current_proxy
+            event_bus.publish('proxy_switched', worker_id=worker.worker_id, proxy=worker.current_proxy)
+
+        event_bus.publish('job_started', worker_id=worker.worker_id, job=worker.current_job)
+        outcome = 'failed'
 
         scraper = None
+        saved_count = 0
+        job_timer = timing.JobTimer(job_id, worker.current_proxy)
+        timing_token = timing.activate(job_timer)
         try:
-            # Create Playwright scraper
-            scraper = GoogleMapsScraper()
+            # Search cache: a fresh search is skipped, or only its new listings are opened
+            cached = search_cache.lookup(self.db, category, city, country)
+            if cached.fresh and settings.search_cache_mode == 'skip':
+                writer.submit('update_job_status', job_id, 'completed', 0)
+                logger.info(
+                    f"♻️ Job #{job_id}: searched {cached.last_scraped:%Y-%m-%d %H:%M} "
+                    f"({cached.result_count} listings), within SEARCH_CACHE_TTL - not re-scraped"
+                )
+                outcome = 'cached'
+                return
+            if cached.known:
+                logger.info(f"♻️ Job #{job_id}: {len(cached.known)} listings seen recently, opening only new ones")
+
+            # Create Playwright scraper (reuses the worker's warm browser)
+            scraper = GoogleMapsScraper(
+                browser_pool=browser_pool,
+                should_cancel=should_cancel,
+                on_business=on_business,
+                on_proxy=on_proxy,
+                next_proxy=lambda: self._replace_exit(worker),
+            )
 
             # Run scrape
             businesses = scraper.scrape(
                 category=category,
                 city=city,
                 country=country,
-                max_results=self.max_results
+                max_results=self.max_results,
+                proxy=proxy,
+                known_urls=cached.known,
             )
 
-            if not businesses:
-                logger.warning(f"No results for {category} in {city}")
-                db.update_job_status(job_id, 'completed', 0)
+            def record_search():
+                # Whole runs only, with the listings whose businesses are now stored
+                search_cache.record(
+                    writer, category, city, country, scraper.listings,
+                    completed=scraper.completed and not should_cancel(),
+                )
+
+            if not businesses and not should_cancel():
+                if scraper.known_skipped:
+                    logger.info(f"Job #{job_id}: no new listings ({scraper.known_skipped} seen recently)")
+                else:
+                    logger.warning(f"No results for {category} in {city}")
+                record_search()
+                writer.submit('update_job_status', job_id, 'completed', 0)
+                outcome = 'completed'
                 return
 
-            # Save businesses to DB
-            saved_count = 0
-            for biz in businesses:
-                if self.should_stop or self.should_skip:
-                    break
-
-                biz_data = {
-                    'name': biz.get('name'),
-                    'category': category,
-                    'city': city,
-                    'country': country,
-                    'address': biz.get('address'),
-                    'phone': biz.get('phone'),
-                    'website': biz.get('website') if biz.get('has_website') == 'Yes' else None,
-                    'maps_url': None, # Scraper doesn't return this yet?
-                    'reviews': biz.get('reviews')
-                }
-                
-                # Use local db
-                db.add_business(biz_data)
-                saved_count += 1
-                self.stats['businesses_scraped'] += 1
-                self.stats['current_business'] = biz.get('name', '')
+            # Save businesses to DB in one transaction
+            if businesses:
+                rows = [to_business_row(biz, category, city, country) for biz in businesses]
+                with timing.span('db_write'):
+                    result = writer.call('add_businesses', rows)
+                saved_count = result['inserted']
+                with self._stats_lock:
+                    self.stats['businesses_scraped'] += saved_count
+                self.stats['current_business'] = businesses[-1].get('name', '')
+                logger.info(
+                    f"Job #{job_id}: {result['inserted']} new, {result['duplicates']} already in DB"
+                )
+                record_search()
 
             # Also save to CSV
-            scraper.save_to_csv(category, city)
-
-            if self.should_skip:
-                self.db.update_job_status(job_id, 'failed', error='Skipped by user')
+            if businesses:
+                with timing.span('csv_write'):
+                    scraper.save_to_csv(category, city)
+
+            if worker.lease_lost:
+                # Requeued (and maybe reclaimed) elsewhere; its status is not ours to set
+                logger.info(f"Job #{job_id} abandoned after losing its lease")
+                outcome = 'abandoned'
+            elif worker.should_skip:
+                writer.submit('update_job_status', job_id, 'failed', error='Skipped by user')
                 logger.info(f"Job #{job_id} skipped")
+                outcome = 'skipped'
+            elif worker.should_stop or self.should_stop:
+                writer.submit('update_job_status', job_id, 'pending')
+                logger.info(f"Job #{job_id} interrupted by stop, returned to queue")
+                outcome = 'requeued'
             else:
-                self.db.update_job_status(job_id, 'completed', saved_count)
+                writer.submit('update_job_status', job_id, 'completed', saved_count)
                 logger.info(f"Job #{job_id} completed: {saved_count} businesses saved to DB")
+                outcome = 'completed'
+            worker.jobs_done += 1
 
         except Exception as e:
             logger.error(f"Job #{job_id} failed: {e}")
-            self.db.update_job_status(job_id, 'failed', error=str(e))
+            if not worker.lease_lost:
+                writer.submit('update_job_status', job_id, 'failed', error=str(e))
             self.stats['error_message'] = str(e)
+            event_bus.publish('error', worker_id=worker.worker_id, job_id=job_id, message=str(e))
 
         finally:
-            self.current_job = None
+            timing.deactivate(timing_token)
+            writer.submit('save_job_timings', job_id, job_timer.rows())
+            logger.info(f"⏱️ Job #{job_id}: {job_timer.summary()}")
+            if scraper is not None:
+                self._record_traffic(job_id, scraper, saved_count, writer)
+            worker.current_job = None
+            worker.current_proxy = None
+            event_bus.publish(
+                'job_finished',
+                worker_id=worker.worker_id,
+                job_id=job_id,
+                outcome=outcome,
+                saved=saved_count,
+                businesses_scraped=self.stats['businesses_scraped'],
+            )
+            self._publish_stats()
+
+    def _record_traffic(self, job_id, scraper, saved_count, writer):
+        """Persist per-job bytes and log the proxy cost per lead"""
+        traffic = scraper.traffic
+        writer.submit('record_job_traffic', job_id, traffic.total_bytes, scraper.requests_blocked)
+        if settings.proxy_cost_per_gb and saved_count:
+            cost = traffic.cost(settings.proxy_cost_per_gb)
+            logger.info(
+                f"💰 Job #{job_id}: {traffic.summary()} ≈ ${cost:.4f} "
+                f"(${cost / saved_count:.5f} per lead)"
+            )
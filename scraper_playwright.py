@@ -3,33 +3,132 @@ Google Maps Business Scraper using Playwright
 Integrates with Smart Proxy Manager and centralized configuration
 """
 
-import random
 import time
 import logging
 from datetime import datetime
-from typing import Optional, List, Dict
-from playwright.sync_api import sync_playwright, Page
+from typing import Optional, List, Dict, Set, Callable
+from playwright.sync_api import Page, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
 import pandas as pd
 
 from config import settings, ensure_directories
-from proxy_manager import get_proxy_manager
+from proxy_manager import get_proxy_manager, ProxyConfig
+from exceptions import ProxyBannedException
+import timing
+from browser_pool import BrowserPool, get_browser_pool, close_browser_pool
+from maps_payload import MapsPayloadCollector, missing_fields, merge_missing
+from detail_panel import DETAIL_PANEL_SCRIPT
+from field_parser import classify_panel, canonical_maps_url, is_listing_card
+from raw_archive import get_raw_archive
+from resource_policy import TrafficMeter
+from page_waits import (
+    WaitStats,
+    PolitenessBudget,
+    FEED_CARDS_JS,
+    PANEL_FOR_NAME_JS,
+    wait_for_selector,
+    wait_for_function,
+    wait_for_network_idle,
+    summary as wait_summary,
+)
 from logging_config import setup_logging
 
 # Setup logging with rotation
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Captcha / "unusual traffic" interstitial served to flagged exits
+BAN_PAGE_JS = """
+() => location.href.includes('/sorry/')
+    || /unusual traffic/i.test((document.body && document.body.innerText || '').slice(0, 2000))
+"""
+
+# Google Maps search box selectors (ordered by reliability)
+# Google removed 'searchboxinput' ID in 2026 - input[name='q'] is now primary
+SEARCH_SELECTORS = [
+    "input[name='q']",
+    "input[role='combobox']",
+    "input[id='searchboxinput']",
+]
+
+# Common consent buttons
+CONSENT_SELECTORS = [
+    "button[aria-label*='Accept all']",
+    "button:has-text('Accept all')",
+    "span:has-text('Accept all')",
+    "form[action*='consent'] button",
+    "button[jsname='b3VHJd']",
+]
+
+# Consent wall (consent.google.com redirect or interstitial)
+CONSENT_FORM_SELECTOR = "form[action*='consent']"
+
+# First thing worth acting on after navigation: the search box or a consent wall
+LANDING_SELECTOR = ", ".join(SEARCH_SELECTORS + [CONSENT_FORM_SELECTOR])
+
+# Results rendered: a feed, or a single place opened directly
+RESULTS_SELECTOR = "div[role='feed'], div[role='main'] h1"
+
+# Playwright errors that mean the page, browser or exit died, not one bad card
+TRANSPORT_ERROR_MARKERS = ("net::ERR_", "NS_ERROR_", "has been closed", "Target closed", "Connection closed")
+
+
+def is_transport_error(error: Exception) -> bool:
+    """True for timeouts and dead connections: fail over instead of skipping the card"""
+    if isinstance(error, PlaywrightTimeoutError):
+        return True
+    return isinstance(error, PlaywrightError) and any(
+        marker in str(error) for marker in TRANSPORT_ERROR_MARKERS
+    )
+
 
 class GoogleMapsScraper:
     """Google Maps business scraper using Playwright"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        browser_pool: Optional[BrowserPool] = None,
+        should_cancel: Optional[Callable[[], bool]] = None,
+        on_business: Optional[Callable[[Dict], None]] = None,
+        on_proxy: Optional[Callable[[Optional[ProxyConfig]], None]] = None,
+        next_proxy: Optional[Callable[[], Optional[ProxyConfig]]] = None,
+    ):
         self.proxy_manager = get_proxy_manager()
+        # Failover source; the controller passes one that swaps its worker's exit
+        self.next_proxy = next_proxy or self._reserve_own_proxy
+        self._own_proxy: Optional[ProxyConfig] = None  # reserved by _reserve_own_proxy
+        self.browser_pool = browser_pool or get_browser_pool()
+        self.should_cancel = should_cancel or (lambda: False)
+        # Progress hooks (live dashboard feed)
+        self.on_business = on_business or (lambda business: None)
+        self.on_proxy = on_proxy or (lambda proxy: None)
         self.businesses = []
+        # Resume point: feed cards already handled (survives proxy failover)
+        self.cards_processed = 0
+        self.seen_names = set()
+        # Search cache: listings to scroll past (delta mode), and every listing
+        # whose record was returned; only meaningful once `completed` is set
+        self.known_urls: Set[str] = set()
+        self.listings: Dict[str, str] = {}
+        self.known_skipped = 0
+        self.completed = False  # the feed was read to the end or to max_results
         self.current_proxy = None
+        self.payloads: Optional[MapsPayloadCollector] = None
+        self.archive = get_raw_archive()
+        # Per-job bandwidth accounting (across all proxy attempts)
+        self.traffic = TrafficMeter()
+        self.requests_blocked = 0
+        # Render waits and deliberate politeness pauses are accounted separately
+        self.waits = WaitStats()
+        self.politeness = PolitenessBudget()
 
     def scrape(
-        self, category: str, city: str, country: str = "", max_results: Optional[int] = None
+        self,
+        category: str,
+        city: str,
+        country: str = "",
+        max_results: Optional[int] = None,
+        proxy: Optional[ProxyConfig] = None,
+        known_urls: Optional[Set[str]] = None,
     ) -> List[Dict]:
         """
         Scrape businesses from Google Maps
@@ -39,9 +138,13 @@ class GoogleMapsScraper:
             city: City name
             country: Country name (optional)
             max_results: Maximum results to scrape (uses config default if None)
+            proxy: Proxy reserved by the caller for the first attempt (optional)
+            known_urls: Canonical maps_urls seen recently (search cache delta
+                mode); their cards are not opened but count toward max_results
 
         Returns:
-            List of business dictionaries
+            List of business dictionaries. If every attempt fails after some
+            businesses were extracted, the partial list is returned.
         """
         max_results = max_results or settings.max_results_per_job
         search_query = f"{category} in {city}"
@@ -54,67 +157,85 @@ class GoogleMapsScraper:
 
         max_proxy_retries = 5  # Try up to 5 different proxies per job
 
-        for attempt in range(max_proxy_retries + 1):  # +1 for final no-proxy attempt
-            try:
-                with sync_playwright() as playwright:
+        self.traffic = TrafficMeter()
+        self.waits = WaitStats()
+        self.politeness = PolitenessBudget()
+        # Kept across attempts: a replacement proxy continues where the last one stopped
+        self.businesses = []
+        self.cards_processed = 0
+        self.seen_names = set()
+        self.known_urls = known_urls or set()
+        self.listings = {}
+        self.known_skipped = 0
+        self.completed = False
+        blocked_before = self.browser_pool.policy.blocked
+
+        try:
+            for attempt in range(max_proxy_retries + 1):  # +1 for final no-proxy attempt
+                page = None
+                try:
                     # Get a single proxy for this attempt
                     self.current_proxy = None
-                    proxy_config = None
-                    
-                    if attempt < max_proxy_retries:
-                        proxy = self.proxy_manager.get_next_proxy()
+
+                    if attempt == 0 and proxy:
+                        self.current_proxy = proxy
+                        logger.info(f"Using assigned proxy (attempt 1/{max_proxy_retries}): {proxy}")
+                    elif attempt < max_proxy_retries:
+                        proxy = self.next_proxy()
                         if proxy:
                             self.current_proxy = proxy
-                            proxy_config = proxy.to_playwright_config()
                             logger.info(f"Using proxy (attempt {attempt + 1}/{max_proxy_retries}): {proxy}")
                         else:
                             logger.info("No working proxy available. Trying without proxy.")
                     else:
                         logger.info(f"Attempt {attempt + 1}: Trying WITHOUT proxy")
 
-                    # Build launch options
-                    launch_options = {
-                        "headless": settings.headless_mode,
-                        "args": [
-                            "--disable-blink-features=AutomationControlled",
-                            "--disable-dev-shm-usage",
-                            "--no-sandbox",
-                        ],
-                    }
-                    if proxy_config:
-                        launch_options["proxy"] = proxy_config
-
-                    browser = playwright.chromium.launch(**launch_options)
-
-                    context = browser.new_context(
-                        viewport={"width": 1920, "height": 1080},
-                        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    )
-                    page = context.new_page()
-                    page.set_default_timeout(settings.page_load_timeout * 1000)
+                    self.on_proxy(self.current_proxy)
+                    timing.set_proxy(str(self.current_proxy) if self.current_proxy else None)
+
+                    # Warm browser from the pool, isolated context per proxy
+                    page = self.browser_pool.new_page(self.current_proxy)
+                    page.on("requestfinished", self.traffic.on_request_finished)
+
+                    # Network mode: index place records from Maps XHR payloads
+                    self.payloads = None
+                    if settings.extraction_mode == "network":
+                        self.payloads = MapsPayloadCollector(
+                            str(self.current_proxy) if self.current_proxy else "No proxy",
+                            keep_raw=self.archive.enabled,
+                        )
+                        page.on("response", self.payloads.on_response)
 
                     # Navigate to Google Maps
                     logger.info("Navigating to Google Maps...")
+                    started = time.monotonic()
                     page.goto("https://www.google.com/maps", wait_until="domcontentloaded", timeout=60000)
-
-                    time.sleep(random.uniform(3, 5))
-                    
-                    # Handle Consent
-                    self._handle_consent(page)
+                    latency = time.monotonic() - started
+                    timing.record("navigation", latency)
+                    if page.evaluate(BAN_PAGE_JS):
+                        raise ProxyBannedException("Google served an unusual-traffic page")
+
+                    wait_for_selector(page, LANDING_SELECTOR, self.waits)
+
+                    # Handle Consent (a saved session has already accepted it, unless the wall is back)
+                    with timing.span("consent"):
+                        warm = self.browser_pool.is_warm(self.current_proxy)
+                        if page.locator(CONSENT_FORM_SELECTOR).count() > 0:
+                            if warm:
+                                logger.info("🍪 Saved session got the consent wall again, re-accepting")
+                            self.browser_pool.expire_session(self.current_proxy)
+                            self._handle_consent(page)
+                        elif warm:
+                            logger.info("♨️ Warm session, skipping consent check")
+                        else:
+                            self._handle_consent(page)
+                    search_timer = timing.Stopwatch()
 
                     # Search for businesses
                     logger.info(f"Searching for: {search_query}")
-                    
-                    # Google Maps search box selectors (ordered by reliability)
-                    # Google removed 'searchboxinput' ID in 2026 - input[name='q'] is now primary
-                    search_selectors = [
-                        "input[name='q']",
-                        "input[role='combobox']",
-                        "input[id='searchboxinput']",
-                    ]
-                    
+
                     search_box = None
-                    for selector in search_selectors:
+                    for selector in SEARCH_SELECTORS:
                         try:
                             logger.info(f"Trying search selector: {selector}")
                             candidate = page.locator(selector).first
@@ -124,7 +245,7 @@ class GoogleMapsScraper:
                             break
                         except Exception:
                             logger.debug(f"Selector {selector} not found, trying next...")
-                    
+
                     if search_box is None:
                         # Save debug info
                         timestamp = int(time.time())
@@ -134,109 +255,174 @@ class GoogleMapsScraper:
                             f.write(page.content())
                         logger.info(f"📄 Saved debug HTML")
                         raise Exception("Search box not found with any selector")
-                    
+
                     try:
                         search_box.click()
-                        time.sleep(1)
                         search_box.fill(search_query)
-                        time.sleep(1)
                         search_box.press("Enter")
                     except Exception as e:
                         logger.error(f"Failed to interact with search box: {e}")
                         raise
 
-                    # Wait for results to load
-                    time.sleep(random.uniform(3, 5))
+                    # Past consent: keep the cookies for the next context on this exit
+                    self.browser_pool.save_session(self.current_proxy)
 
-                    # Scroll and extract businesses
-                    self.businesses = []
-                    self._scroll_and_extract(page, max_results)
+                    # Wait for results to render
+                    wait_for_selector(page, RESULTS_SELECTOR, self.waits, state="attached")
+                    search_timer.lap("search")
+
+                    # Scroll and extract businesses (resumes after cards_processed)
+                    if self.cards_processed:
+                        logger.info(
+                            f"⏩ Resuming after {self.cards_processed} cards "
+                            f"({len(self.businesses)} businesses kept)"
+                        )
+                    feed_read = self._scroll_and_extract(page, max_results)
 
                     logger.info(f"✅ Scraped {len(self.businesses)} businesses")
+                    if self.known_skipped:
+                        logger.info(f"♻️ {self.known_skipped} recently seen listings not re-opened")
 
                     # Mark proxy as successful if used
                     if self.current_proxy:
-                        self.proxy_manager.mark_proxy_success(self.current_proxy)
+                        self.proxy_manager.mark_proxy_success(self.current_proxy, latency)
 
-                    browser.close()
+                    self.completed = feed_read and not self.should_cancel()
                     return self.businesses
 
-            except Exception as e:
-                logger.error(f"❌ Attempt {attempt + 1} failed: {e}")
-
-                # Mark proxy as failed
-                if self.current_proxy:
-                    self.proxy_manager.mark_proxy_failure(self.current_proxy)
+                except Exception as e:
+                    logger.error(f"❌ Attempt {attempt + 1} failed: {e}")
 
-                # If we have more retries, continue to next proxy
-                if attempt < max_proxy_retries:
-                    logger.info(f"🔄 Retrying with a different proxy...")
-                    time.sleep(2)  # Brief pause before retry
-                    continue
-                else:
-                    logger.error(f"❌ All {max_proxy_retries + 1} attempts failed. Giving up on this job.")
-                    raise
+                    # Mark proxy as failed and drop its (possibly burnt) context
+                    if self.current_proxy:
+                        self.proxy_manager.mark_proxy_failure(
+                            self.current_proxy, banned=isinstance(e, ProxyBannedException)
+                        )
+                    self.browser_pool.discard_context(self.current_proxy)
 
+                    # If we have more retries, continue to next proxy
+                    if attempt < max_proxy_retries:
+                        logger.info(f"🔄 Retrying with a different proxy...")
+                        time.sleep(2)  # Brief pause before retry
+                        continue
+                    else:
+                        logger.error(f"❌ All {max_proxy_retries + 1} attempts failed. Giving up on this job.")
+                        if self.businesses:
+                            logger.warning(f"Returning {len(self.businesses)} businesses scraped before the failure")
+                            return self.businesses
+                        raise
 
-    def _scroll_and_extract(self, page: Page, max_results: int):
-        """Scroll through results and extract business data"""
+                finally:
+                    if page is not None:
+                        try:
+                            page.close()
+                        except Exception:
+                            pass
+        finally:
+            self.requests_blocked = self.browser_pool.policy.blocked - blocked_before
+            logger.info(
+                f"📶 Traffic: {self.traffic.summary()}, {self.requests_blocked} requests blocked"
+            )
+            logger.info(f"⏱️ Waits: {wait_summary(self.waits, self.politeness)}")
+            self.browser_pool.job_finished()
+            self.proxy_manager.release_proxy(self._own_proxy)
+            self._own_proxy = None
+
+    def _reserve_own_proxy(self) -> Optional[ProxyConfig]:
+        """Failover without a controller: reserve a proxy, giving back the last one"""
+        self.proxy_manager.release_proxy(self._own_proxy)
+        self._own_proxy = self.proxy_manager.reserve_proxy()
+        return self._own_proxy
+
+    def _scroll_and_extract(self, page: Page, max_results: int) -> bool:
+        """
+        Scroll through results and extract business data.
+        Starts at self.cards_processed, so after a proxy failover the first
+        cards are only scrolled past, not clicked again. Errors that break
+        the page propagate so scrape() can fail over and resume.
+        Returns False when the results feed never rendered.
+        """
         try:
             # Wait for results panel
             page.wait_for_selector("div[role='feed']", timeout=10000)
+        except Exception as e:
+            logger.error(f"Error during scroll and extract: {e}")
+            return False
 
-            previous_card_count = 0
-            no_new_results_count = 0
-            seen_names = set()
+        previous_card_count = 0
+        no_new_results_count = 0
 
-            while len(self.businesses) < max_results:
-                # Get all potential business cards
-                business_cards = page.locator("div[role='feed'] > div > div").all()
+        while not self._target_reached(max_results):
+            if self.should_cancel():
+                logger.info("Scrape cancelled")
+                break
 
-                logger.info(
-                    f"Found {len(business_cards)} cards, extracted {len(self.businesses)} businesses so far..."
-                )
+            # Get all potential business cards
+            business_cards = page.locator("div[role='feed'] > div > div").all()
 
-                # Extract data from new cards (use card count for pagination, not business count)
-                for card in business_cards[previous_card_count:]:
-                    if len(self.businesses) >= max_results:
-                        break
+            logger.info(
+                f"Found {len(business_cards)} cards, extracted {len(self.businesses)} businesses so far..."
+            )
 
-                    try:
-                        business_data = self._extract_business_data(page, card)
-                        if business_data:
-                            biz_name = business_data.get("name", "")
-                            # Skip duplicates by name
-                            if biz_name in seen_names:
-                                logger.debug(f"Skipping duplicate: {biz_name}")
-                                continue
-                            seen_names.add(biz_name)
+            # Extract data from new cards (use card count for pagination, not business count)
+            for card in business_cards[self.cards_processed:]:
+                if self._target_reached(max_results) or self.should_cancel():
+                    break
+
+                try:
+                    business_data = self._extract_business_data(page, card)
+                    if business_data:
+                        biz_name = business_data.get("name", "")
+                        # Skip duplicates by name (also across failover attempts)
+                        if biz_name in self.seen_names:
+                            logger.debug(f"Skipping duplicate: {biz_name}")
+                        else:
+                            self.seen_names.add(biz_name)
                             self.businesses.append(business_data)
+                            if business_data.get("maps_url"):
+                                self.listings[business_data["maps_url"]] = biz_name
+                            self.on_business(business_data)
                             logger.info(
                                 f"  [{len(self.businesses)}/{max_results}] {business_data['name']}"
                             )
-                    except Exception as e:
-                        logger.debug(f"Error extracting business: {e}")
-                        continue
-
-                # Check if we got new cards
-                current_card_count = len(business_cards)
-                if current_card_count == previous_card_count:
-                    no_new_results_count += 1
-                    if no_new_results_count >= 3:
-                        logger.warning("No new results after 3 scrolls, stopping")
-                        break
-                else:
-                    no_new_results_count = 0
+                except Exception as e:
+                    if is_transport_error(e):
+                        # Proxy/page died mid-card: leave it for the next attempt
+                        raise
+                    logger.debug(f"Error extracting business: {e}")
+                if page.is_closed():
+                    # Browser/proxy died mid-card: leave it for the next attempt
+                    raise Exception(f"Page closed at card {self.cards_processed + 1}")
+                self.cards_processed += 1
+
+            # Check if we got new cards
+            current_card_count = len(business_cards)
+            if current_card_count == previous_card_count:
+                no_new_results_count += 1
+                if no_new_results_count >= 3:
+                    logger.warning("No new results after 3 scrolls, stopping")
+                    break
+            else:
+                no_new_results_count = 0
 
-                previous_card_count = current_card_count
+            previous_card_count = current_card_count
 
-                # Scroll to load more results
-                if len(self.businesses) < max_results:
+            # Scroll to load more results; stop waiting as soon as new cards render
+            if not self._target_reached(max_results):
+                with timing.span("scroll"):
                     self._scroll_results_panel(page)
-                    time.sleep(random.uniform(settings.scroll_pause_min, settings.scroll_pause_max))
+                    wait_for_function(
+                        page,
+                        f"n => {FEED_CARDS_JS} > n",
+                        self.waits,
+                        arg=current_card_count,
+                        timeout_ms=settings.scroll_pause_max * 1000,
+                    )
+        return True
 
-        except Exception as e:
-            logger.error(f"Error during scroll and extract: {e}")
+    def _target_reached(self, max_results: int) -> bool:
+        # Known listings count too, so a delta run reads as deep into the feed as a full one
+        return len(self.businesses) + self.known_skipped >= max_results
 
     def _scroll_results_panel(self, page: Page):
         """Scroll the results panel to load more businesses"""
@@ -252,6 +438,7 @@ class GoogleMapsScraper:
 
     def _extract_business_data(self, page: Page, card) -> Optional[Dict]:
         """Extract data from a business card"""
+        phase = timing.Stopwatch()
         try:
             # Get card text
             card_text = card.inner_text()
@@ -264,38 +451,42 @@ class GoogleMapsScraper:
             lines = card_text.split("\n")
             name = lines[0].strip() if lines else "N/A"
 
-            # Skip ads, non-business entries, and UI elements
-            skip_keywords = [
-                "ad",
-                "sponsored",
-                "google",
-                "résultats",
-                "results",
-                "certains de ces",
-                "les prix sont",
-                "partager",
-            ]
-            if any(skip in name.lower() for skip in skip_keywords):
+            # Skip ads, non-business entries, UI elements and info/disclaimer cards
+            if not is_listing_card(name, card_text):
                 logger.debug(f"Skipping non-business card: {name}")
                 return None
 
-            # Skip if the card contains info/disclaimer text
-            if (
-                "personnalisés" in card_text.lower()
-                or "partenaires de google" in card_text.lower()
-                or "envoyer un lien" in card_text.lower()
-            ):
-                logger.debug(f"Skipping info/disclaimer card")
-                return None
-
             # Check if this card has a business link (to avoid clicking share buttons, etc.)
+            place_url = None
             try:
                 has_business_link = card.locator("a[href*='/maps/place/']").count() > 0
                 if not has_business_link:
                     logger.debug(f"Skipping card without business link: {name}")
                     return None
-            except Exception:
-                pass
+                place_url = card.locator("a[href*='/maps/place/']").first.get_attribute("href")
+            except Exception as e:
+                if is_transport_error(e):
+                    raise
+
+            # Search cache: leave recently seen listings closed
+            listing_url = canonical_maps_url(place_url)
+            if listing_url and listing_url in self.known_urls:
+                self.known_skipped += 1
+                logger.debug(f"Skipping {name}: seen within SEARCH_CACHE_TTL")
+                return None
+
+            # Network mode: the feed's XHR payload usually has everything already
+            payload_record = self.payloads.lookup(name, place_url) if self.payloads else None
+            if payload_record:
+                missing = missing_fields(payload_record, settings.network_required_fields)
+                if not missing:
+                    if listing_url:
+                        payload_record["maps_url"] = listing_url
+                    self._archive(payload_record)
+                    logger.debug(f"Extracted {name} from Maps payload (no click)")
+                    phase.lap("card_payload")
+                    return payload_record
+                logger.debug(f"Payload for {name} lacks {missing}, falling back to click")
 
             # Try to click the card to get more details
             try:
@@ -303,14 +494,13 @@ class GoogleMapsScraper:
                 business_link = card.locator("a[href*='/maps/place/']").first
                 if business_link.is_visible(timeout=1000):
                     business_link.click(timeout=2000)
-                    # Wait for detail panel to fully load (website button loads last)
-                    time.sleep(random.uniform(4, 6))
                 else:
                     logger.debug(f"Business link not visible for {name}")
                     return None
             except Exception as e:
                 logger.debug(f"Could not click card for {name}: {e}")
                 return None
+            phase.lap("card_click")
 
             # Initialize business data
             business_data = {
@@ -319,279 +509,59 @@ class GoogleMapsScraper:
                 "phone": "N/A",
                 "website": "N/A",
                 "has_website": "No",
-                "maps_url": page.url,
+                "maps_url": listing_url or canonical_maps_url(page.url),
                 "scraped_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "proxy_used": str(self.current_proxy) if self.current_proxy else "No proxy",
             }
 
-            # Wait for detail panel to be fully visible
-            try:
-                page.wait_for_selector("div[role='main']", timeout=5000)
-                # Extra wait for action buttons (website/phone/etc) to render
-                page.wait_for_selector("div[role='main'] button", timeout=3000)
-            except Exception:
+            # Wait until the panel shows this business, then for its action
+            # buttons; the website button arrives with the last XHRs
+            if not wait_for_function(page, PANEL_FOR_NAME_JS, self.waits, arg=name):
+                logger.debug(f"Detail panel for {name} did not open")
+            elif not wait_for_selector(
+                page, "div[role='main'] button[data-item-id]", self.waits, timeout_ms=3000
+            ):
                 logger.debug(f"Detail panel not fully loaded for {name}")
+            wait_for_network_idle(page, self.waits)
+            phase.lap("panel_wait")
 
-            # Extract address - try multiple methods
-            try:
-                # Method 1: Button with data-item-id='address'
-                address_button = page.locator("button[data-item-id='address']").first
-                if address_button.is_visible(timeout=2000):
-                    aria_label = address_button.get_attribute("aria-label")
-                    if aria_label:
-                        # Remove common prefixes
-                        for prefix in ["Address: ", "Adresse: ", "Dirección: ", "Adresa: "]:
-                            aria_label = aria_label.replace(prefix, "")
-                        business_data["address"] = aria_label.strip()
-                        logger.debug(f"Address found (method 1): {business_data['address']}")
-            except Exception as e:
-                logger.debug(f"Address method 1 failed: {e}")
-
-            # Method 2: Look for address in aria-label of buttons
-            if business_data["address"] == "N/A":
-                try:
-                    buttons = page.locator(
-                        "button[aria-label*='Address'], button[aria-label*='Adresa']"
-                    ).all()
-                    for btn in buttons:
-                        aria = btn.get_attribute("aria-label")
-                        if aria and len(aria) > 15:  # Address should be reasonably long
-                            for prefix in ["Address: ", "Adresse: ", "Dirección: ", "Adresa: "]:
-                                aria = aria.replace(prefix, "")
-                            business_data["address"] = aria.strip()
-                            logger.debug(f"Address found (method 2): {business_data['address']}")
-                            break
-                except Exception as e:
-                    logger.debug(f"Address method 2 failed: {e}")
-
-            # Extract phone - try multiple methods
-            phone_prefixes = [
-                "Phone: ",
-                "Téléphone: ",
-                "Tel: ",
-                "Telefon: ",
-                "Numéro de téléphone : ",
-                "Numéro de téléphone: ",
-                "Telefonnummer: ",
-                "Número de teléfono: ",
-                "Teléfono: ",
-                "Telefone: ",
-            ]
+            # Every field in one round trip, classified in Python
             try:
-                # Method 1: Button with phone data-item-id
-                phone_button = page.locator("button[data-item-id*='phone']").first
-                if phone_button.is_visible(timeout=2000):
-                    aria_label = phone_button.get_attribute("aria-label")
-                    if aria_label:
-                        for prefix in phone_prefixes:
-                            aria_label = aria_label.replace(prefix, "")
-                        # Only accept if it looks like a phone number
-                        cleaned = aria_label.strip()
-                        if any(c.isdigit() for c in cleaned):
-                            business_data["phone"] = cleaned
-                            logger.debug(f"Phone found (method 1): {business_data['phone']}")
+                panel = page.evaluate(DETAIL_PANEL_SCRIPT, name)
             except Exception as e:
-                logger.debug(f"Phone method 1 failed: {e}")
-
-            # Method 2: Look for phone in aria-labels
-            if business_data["phone"] == "N/A":
-                try:
-                    buttons = page.locator(
-                        "button[aria-label*='Phone'], button[aria-label*='Telefon'], button[aria-label*='téléphone'], button[aria-label*='Numéro']"
-                    ).all()
-                    for btn in buttons:
-                        aria = btn.get_attribute("aria-label")
-                        if aria:
-                            import re
-                            if re.search(r"[\d\s\-\+\(\)]{9,}", aria):
-                                for prefix in phone_prefixes:
-                                    aria = aria.replace(prefix, "")
-                                cleaned = aria.strip()
-                                if any(c.isdigit() for c in cleaned):
-                                    business_data["phone"] = cleaned
-                                    logger.debug(
-                                        f"Phone found (method 2): {business_data['phone']}"
-                                    )
-                                    break
-                except Exception as e:
-                    logger.debug(f"Phone method 2 failed: {e}")
+                logger.debug(f"Detail panel read failed for {name}: {e}")
+                panel = None
+            business_data.update(classify_panel(panel))
+            phase.lap("panel_extract")
 
-            # Method 3: Look for phone in text content of detail panel
-            if business_data["phone"] == "N/A":
-                try:
-                    import re
-                    detail_panel = page.locator("div[role='main']").first
-                    if detail_panel.is_visible(timeout=1000):
-                        panel_text = detail_panel.inner_text()
-                        phone_patterns = [
-                            r"\+\d{1,4}\s?\d{3}\s?\d{3}\s?\d{3,4}",
-                            r"\d{3}\s?\d{3}\s?\d{3,4}",
-                        ]
-                        for pattern in phone_patterns:
-                            matches = re.findall(pattern, panel_text)
-                            if matches:
-                                business_data["phone"] = matches[0].strip()
-                                logger.debug(f"Phone found (method 3): {business_data['phone']}")
-                                break
-                except Exception as e:
-                    logger.debug(f"Phone method 3 failed: {e}")
-
-            # ─── Extract website - MULTIPLE METHODS ─────────────────
-            import re
-
-            # Method 1: Primary selector - data-item-id='authority'
-            try:
-                website_link = page.locator("a[data-item-id='authority']").first
-                if website_link.is_visible(timeout=3000):
-                    href = website_link.get_attribute("href")
-                    if href and href.startswith("http"):
-                        business_data["website"] = href
-                        business_data["has_website"] = "Yes"
-                        logger.debug(f"Website found (method 1): {href}")
-            except Exception as e:
-                logger.debug(f"Website method 1 failed: {e}")
-
-            # Method 2: Look for links with aria-label containing 'website'
-            if business_data["has_website"] == "No":
-                try:
-                    website_selectors = [
-                        "a[aria-label*='Website']",
-                        "a[aria-label*='website']",
-                        "a[aria-label*='Site Web']",
-                        "a[aria-label*='site web']",
-                        "a[aria-label*='Webová stránka']",
-                        "a[aria-label*='Webseite']",
-                        "a[aria-label*='Sitio web']",
-                        "a[aria-label*='Site internet']",
-                    ]
-                    for sel in website_selectors:
-                        try:
-                            link = page.locator(sel).first
-                            if link.is_visible(timeout=500):
-                                href = link.get_attribute("href")
-                                if href and href.startswith("http") and "google.com" not in href:
-                                    business_data["website"] = href
-                                    business_data["has_website"] = "Yes"
-                                    logger.debug(f"Website found (method 2): {href}")
-                                    break
-                        except Exception:
-                            continue
-                except Exception as e:
-                    logger.debug(f"Website method 2 failed: {e}")
-
-            # Method 3: Scan all action buttons in detail panel for website icon/text
-            if business_data["has_website"] == "No":
-                try:
-                    # Google Maps uses action buttons, website is one of them
-                    action_links = page.locator("div[role='main'] a[href^='http']").all()
-                    for link in action_links:
-                        try:
-                            href = link.get_attribute("href")
-                            aria = link.get_attribute("aria-label") or ""
-                            # Skip Google's own links
-                            if not href or any(skip in href for skip in [
-                                "google.com", "goo.gl", "maps.app", "play.google",
-                                "support.google", "accounts.google", "policies.google"
-                            ]):
-                                continue
-                            # Skip social media and known non-website links
-                            if any(skip in href for skip in [
-                                "facebook.com", "instagram.com", "twitter.com",
-                                "youtube.com", "linkedin.com", "tiktok.com"
-                            ]):
-                                continue
-                            # If aria-label mentions website or the link is a business URL
-                            if ("website" in aria.lower() or "web" in aria.lower()
-                                    or "site" in aria.lower()):
-                                business_data["website"] = href
-                                business_data["has_website"] = "Yes"
-                                logger.debug(f"Website found (method 3, aria): {href}")
-                                break
-                            # Accept if it looks like a real external business URL
-                            if href.startswith("http") and "." in href:
-                                business_data["website"] = href
-                                business_data["has_website"] = "Yes"
-                                logger.debug(f"Website found (method 3, link): {href}")
-                                break
-                        except Exception:
-                            continue
-                except Exception as e:
-                    logger.debug(f"Website method 3 failed: {e}")
-
-            # Method 4: Check all buttons with aria-labels for website info
-            if business_data["has_website"] == "No":
-                try:
-                    all_buttons = page.locator("div[role='main'] button[aria-label]").all()
-                    for btn in all_buttons:
-                        try:
-                            aria = btn.get_attribute("aria-label") or ""
-                            aria_lower = aria.lower()
-                            # Check if button mentions a website
-                            if any(kw in aria_lower for kw in [
-                                "website", "site web", "webová stránka",
-                                "webseite", "sitio web", "site internet", "sito web"
-                            ]):
-                                # The aria-label often contains the URL
-                                url_match = re.search(r'https?://[^\s,]+', aria)
-                                if url_match:
-                                    business_data["website"] = url_match.group()
-                                    business_data["has_website"] = "Yes"
-                                    logger.debug(f"Website found (method 4, button): {url_match.group()}")
-                                    break
-                                # Sometimes just the domain name is in the aria-label
-                                domain_match = re.search(r'([a-zA-Z0-9-]+\.[a-z]{2,})', aria)
-                                if domain_match and domain_match.group() not in ['google.com', 'maps.app']:
-                                    business_data["website"] = f"https://{domain_match.group()}"
-                                    business_data["has_website"] = "Yes"
-                                    logger.debug(f"Website found (method 4, domain): {domain_match.group()}")
-                                    break
-                        except Exception:
-                            continue
-                except Exception as e:
-                    logger.debug(f"Website method 4 failed: {e}")
-
-            # Method 5: Last resort - check visible text for website URL patterns
-            if business_data["has_website"] == "No":
-                try:
-                    detail_panel = page.locator("div[role='main']").first
-                    if detail_panel.is_visible(timeout=1000):
-                        panel_text = detail_panel.inner_text()
-                        # Look for URL patterns in the text
-                        url_patterns = [
-                            r'(https?://[^\s<>"]+)',
-                            r'(www\.[a-zA-Z0-9-]+\.[a-zA-Z]{2,}[^\s]*)',
-                        ]
-                        for pattern in url_patterns:
-                            matches = re.findall(pattern, panel_text)
-                            for match in matches:
-                                if not any(skip in match for skip in [
-                                    'google.com', 'goo.gl', 'maps.app'
-                                ]):
-                                    if match.startswith("www."):
-                                        match = f"https://{match}"
-                                    business_data["website"] = match
-                                    business_data["has_website"] = "Yes"
-                                    logger.debug(f"Website found (method 5, text): {match}")
-                                    break
-                            if business_data["has_website"] == "Yes":
-                                break
-                except Exception as e:
-                    logger.debug(f"Website method 5 failed: {e}")
+            # Fields the panel did not show may still be in the payload
+            merge_missing(business_data, payload_record)
+            self._archive(business_data, panel)
 
             if business_data["has_website"] == "Yes":
                 logger.info(f"  ✅ Website: {business_data['website']}")
             else:
                 logger.info(f"  ❌ No website found for: {name}")
 
-            # Small delay before next extraction
-            time.sleep(random.uniform(settings.request_delay_min, settings.request_delay_max))
+            # Politeness pause before the next click
+            with timing.span("politeness"):
+                self.politeness.pause()
 
             return business_data
 
         except Exception as e:
+            # Timeouts and dead connections are the proxy's fault, not this card's
+            if is_transport_error(e) or page.is_closed():
+                raise
             logger.debug(f"Error extracting business data: {e}")
             return None
 
+    def _archive(self, business: Dict, panel: Optional[Dict] = None):
+        """Keep what a business was parsed from, for offline re-extraction"""
+        if self.archive.enabled:
+            places = self.payloads.raw_places(business["name"], business.get("maps_url")) if self.payloads else None
+            self.archive.put(business.get("maps_url"), business["name"], panel, places)
+
     def save_to_csv(self, category: str, city: str) -> str:
         """Save scraped businesses to CSV - produces two files:
         1. All businesses (general file)
@@ -638,20 +608,11 @@ class GoogleMapsScraper:
     def _handle_consent(self, page):
         """Handle Google consent popup"""
         try:
-            # Common consent buttons
-            selectors = [
-                # Keep list simple to match indentation
-                "button[aria-label*='Accept all']",
-                "button:has-text('Accept all')",
-                "span:has-text('Accept all')",
-                "form[action*='consent'] button",
-                "button[jsname='b3VHJd']"
-            ]
-            for s in selectors:
+            for s in CONSENT_SELECTORS:
                 if page.locator(s).count() > 0 and page.locator(s).first.is_visible():
                     logger.info(f"Found consent button: {s}")
                     page.locator(s).first.click()
-                    time.sleep(2)
+                    wait_for_selector(page, ", ".join(SEARCH_SELECTORS), self.waits)
                     return
         except Exception as e:
             logger.warning(f"Consent handling error: {e}")
@@ -695,6 +656,9 @@ def main(category: str, city: str, country: str = "", max_results: Optional[int]
         logger.error(f"❌ Scraping failed: {e}")
         raise
 
+    finally:
+        close_browser_pool()
+
 
 if __name__ == "__main__":
     # Example usage
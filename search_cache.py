@@ -0,0 +1,100 @@
+"""
+Search result cache
+Remembers, per normalized search (category × city × country), which
+listings (canonical maps_url) a scrape found and when. The cache is
+kept apart from the jobs table, so clearing or re-adding a job does
+not mean scraping a fresh search again.
+
+SEARCH_CACHE_MODE decides what a cached search saves:
+    skip   a search scraped within SEARCH_CACHE_TTL is not run again
+    delta  the search runs, but only listings not seen within the TTL
+           are opened (known ones are scrolled past)
+    off    no caching
+"""
+
+import logging
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Set
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_MODES = ("off", "skip", "delta")
+
+
+def search_key(category: str, city: str, country: Optional[str] = "") -> str:
+    """'Plumbers ', 'PRAGUE', 'Czech  Republic' -> 'plumbers|prague|czech republic'"""
+    parts = (unicodedata.normalize("NFKC", part or "").casefold() for part in (category, city, country))
+    return "|".join(" ".join(part.split()) for part in parts)
+
+
+def enabled() -> bool:
+    return settings.search_cache_mode != "off" and settings.search_cache_ttl > 0
+
+
+@dataclass
+class CachedSearch:
+    key: str
+    last_scraped: Optional[datetime] = None
+    result_count: int = 0
+    known: Set[str] = field(default_factory=set)  # listings seen within the TTL
+
+    @property
+    def fresh(self) -> bool:
+        if self.last_scraped is None:
+            return False
+        return datetime.now() - self.last_scraped < timedelta(seconds=settings.search_cache_ttl)
+
+
+def lookup(db, category: str, city: str, country: Optional[str] = "") -> CachedSearch:
+    """
+    What the cache knows about a search (empty when caching is off).
+    Reads through `db`, a reader Database, so it never queues behind the
+    writer thread's commits.
+    """
+    cached = CachedSearch(search_key(category, city, country))
+    if not enabled():
+        return cached
+
+    entry = db.get_search_cache(cached.key)
+    if entry:
+        last_scraped = entry["last_scraped"]
+        cached.last_scraped = (
+            datetime.fromisoformat(last_scraped) if isinstance(last_scraped, str) else last_scraped
+        )
+        cached.result_count = entry["result_count"]
+        if settings.search_cache_mode == "delta":
+            since = datetime.now() - timedelta(seconds=settings.search_cache_ttl)
+            cached.known = set(db.get_search_results(cached.key, since))
+    return cached
+
+
+def record(
+    writer,
+    category: str,
+    city: str,
+    country: Optional[str],
+    listings: Dict[str, str],
+    completed: bool = True,
+) -> bool:
+    """
+    Store the listings (maps_url -> name) a search saved; an empty dict
+    still marks the search as scraped now. A run that did not complete
+    (cancelled, feed never rendered, partial list after failover) is not
+    recorded, since skip mode would otherwise hide the rest of the search.
+    Returns True when the write was queued.
+    """
+    if not enabled() or not completed:
+        return False
+    writer.submit(
+        "save_search_results",
+        search_key(category, city, country),
+        category,
+        city,
+        country,
+        list(listings.items()),
+    )
+    return True
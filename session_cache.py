@@ -0,0 +1,98 @@
+"""
+Warm session cache
+Saves a context's Playwright storage_state (cookies + localStorage, incl.
+Google's consent cookies) per proxy and locale, so a new context for the
+same exit starts past the consent wall. Entries expire after
+SESSION_CACHE_TTL seconds and are dropped when their proxy fails.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Dict
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionCache:
+    """One JSON file per (proxy, locale); safe to share between threads"""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        ttl: Optional[int] = None,
+        locale: Optional[str] = None,
+    ):
+        self.directory = Path(directory or settings.session_cache_dir)
+        self.ttl = ttl if ttl is not None else settings.session_cache_ttl
+        self.locale = locale or settings.browser_locale
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _path(self, key: str) -> Path:
+        # Hash: keys contain masked credentials and characters unfit for file names
+        digest = hashlib.sha1(f"{key}|{self.locale}".encode()).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Saved storage_state for an exit, or None if missing or expired"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            age = time.time() - path.stat().st_mtime
+            if age > self.ttl:
+                path.unlink(missing_ok=True)
+                self.misses += 1
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return state
+
+    def put(self, key: str, state: Dict):
+        """Store an exit's storage_state (written atomically)"""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug(f"Could not save session for {key}: {e}")
+
+    def discard(self, key: str):
+        """Forget an exit's session (its cookies may be burnt)"""
+        if not self.enabled:
+            return
+        self._path(key).unlink(missing_ok=True)
+
+
+# Global instance
+_session_cache = None
+
+
+def get_session_cache() -> SessionCache:
+    """Get or create the global session cache"""
+    global _session_cache
+    if _session_cache is None:
+        _session_cache = SessionCache()
+    return _session_cache
@@ -0,0 +1,55 @@
+"""Tests for the chunked CSV export"""
+
+import csv
+import gzip
+import io
+
+from csv_stream import BOM, iter_csv, iter_csv_bytes, open_readonly, write_csv
+from db import Database
+
+QUERY = "SELECT name, address FROM businesses ORDER BY id"
+
+
+def make_db(tmp_path, count):
+    path = str(tmp_path / "leads.db")
+    db = Database(path)
+    db.add_businesses([{"name": f"Shop {i}", "address": f"Ulice {i}, Praha"} for i in range(count)])
+    db.close()
+    return path
+
+
+def test_iter_csv_yields_header_then_chunks(tmp_path):
+    """Test the header comes first with a BOM and rows arrive chunk_size at a time"""
+    conn = open_readonly(make_db(tmp_path, 5))
+    chunks = list(iter_csv(conn, QUERY, chunk_size=2))
+    conn.close()
+
+    assert chunks[0] == BOM + "name,address\r\n"
+    assert len(chunks) == 4  # header + 2 + 2 + 1
+    rows = list(csv.reader(io.StringIO("".join(chunks).lstrip(BOM))))
+    assert rows[1] == ["Shop 0", "Ulice 0, Praha"]
+    assert len(rows) == 6
+
+
+def test_iter_csv_bytes_gzip_round_trip(tmp_path):
+    """Test the gzip stream decompresses to the plain CSV"""
+    conn = open_readonly(make_db(tmp_path, 3))
+    plain = b"".join(iter_csv_bytes(conn, QUERY, chunk_size=1))
+    compressed = b"".join(iter_csv_bytes(conn, QUERY, chunk_size=1, compress=True))
+    conn.close()
+
+    assert gzip.decompress(compressed) == plain
+    assert plain.decode("utf-8").startswith(BOM + "name,address")
+
+
+def test_write_csv_counts_rows(tmp_path):
+    """Test write_csv writes every row and returns the count"""
+    conn = open_readonly(make_db(tmp_path, 3))
+    output = tmp_path / "export.csv"
+    assert write_csv(conn, QUERY, (), output, chunk_size=2) == 3
+    conn.close()
+
+    with open(output, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["name", "address"]
+    assert rows[-1] == ["Shop 2", "Ulice 2, Praha"]
@@ -0,0 +1,167 @@
+"""Tests for the sqlite Database layer"""
+
+import pytest
+
+from db import Database, NO_WEBSITE, STALENESS
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "leads.db"))
+    yield database
+    database.close()
+
+
+def business(name, address, maps_url=None):
+    return {"name": name, "category": "plumber", "city": "Prague", "country": "CZ",
+            "address": address, "maps_url": maps_url}
+
+
+def test_add_business_skips_duplicates(db):
+    """Test a duplicate business returns None and leaves no open transaction"""
+    first = db.add_business(business("Joe's Plumbing", "Main St 1", "https://maps.google.com/?cid=1"))
+    assert first is not None
+    assert db.add_business(business("Joe's Plumbing", "Other St 2", "https://maps.google.com/?cid=1")) is None
+    assert db.add_business(business("Joe's Plumbing", "Main St 1")) is None
+    assert not db.conn.in_transaction
+    assert db.conn.execute("SELECT COUNT(*) FROM businesses").fetchone()[0] == 1
+
+
+def test_add_businesses_counts_inserted_rows(db):
+    """Test a batch insert reports inserted rows and duplicates"""
+    rows = [business(f"Shop {i}", f"Street {i}", f"https://maps.google.com/?cid={i}") for i in range(3)]
+    assert db.add_businesses(rows) == {"inserted": 3, "duplicates": 0}
+    assert db.add_businesses(rows + [business("Shop 9", "Street 9")]) == {"inserted": 1, "duplicates": 3}
+
+
+def test_add_job_ignores_existing_job(db):
+    """Test re-adding a queued job returns None"""
+    assert db.add_job("plumber", "Prague", "CZ") is not None
+    assert db.add_job("plumber", "Prague", "CZ") is None
+    assert db.count_jobs("pending") == 1
+
+
+def test_group_commit_defers_the_commit(db, tmp_path):
+    """Test writes inside group_commit() are invisible to other connections until it exits"""
+    reader = Database(str(tmp_path / "leads.db"))
+    try:
+        with db.group_commit():
+            db.add_job("plumber", "Prague", "CZ")
+            db.add_business(business("Joe's Plumbing", "Main St 1"))
+            assert reader.count_jobs() == 0
+        assert reader.count_jobs() == 1
+        assert reader.conn.execute("SELECT COUNT(*) FROM businesses").fetchone()[0] == 1
+    finally:
+        reader.close()
+
+
+def test_claim_next_job_takes_oldest_pending_once(db):
+    """Test jobs are claimed oldest first and never twice"""
+    first = db.add_job("plumber", "Prague", "CZ")
+    second = db.add_job("roofer", "Prague", "CZ")
+
+    job = db.claim_next_job("worker-1")
+    assert job["id"] == first
+    assert job["status"] == "running" and job["worker_id"] == "worker-1"
+    assert db.claim_next_job("worker-2")["id"] == second
+    assert db.claim_next_job("worker-3") is None
+    assert db.count_jobs("running") == 2
+
+
+def test_expired_lease_is_requeued_and_reclaimed(db):
+    """Test a job whose lease ran out goes back to the queue and its old owner loses it"""
+    job_id = db.add_job("plumber", "Prague", "CZ")
+    db.claim_next_job("worker-1", lease_seconds=-1)
+
+    job = db.claim_next_job("worker-2")
+    assert job["id"] == job_id and job["worker_id"] == "worker-2"
+    assert db.heartbeat_job(job_id, "worker-1") is False
+    assert db.heartbeat_job(job_id, "worker-2") is True
+
+
+def test_heartbeat_keeps_the_lease(db):
+    """Test a heartbeat extends an expired lease before anyone requeues it"""
+    job_id = db.add_job("plumber", "Prague", "CZ")
+    db.claim_next_job("worker-1", lease_seconds=-1)
+
+    assert db.heartbeat_job(job_id, "worker-1", lease_seconds=300) is True
+    assert db.requeue_expired_jobs() == 0
+    assert db.claim_next_job("worker-2") is None
+
+
+def test_finished_job_releases_its_lease(db):
+    """Test completing or requeueing a job clears the lease"""
+    job_id = db.add_job("plumber", "Prague", "CZ")
+    db.claim_next_job("worker-1")
+    db.update_job_status(job_id, "pending")
+
+    row = db.conn.execute("SELECT status, worker_id, lease_expires_at FROM jobs").fetchone()
+    assert tuple(row) == ("pending", None, None)
+    assert db.heartbeat_job(job_id, "worker-1") is False
+    assert db.claim_next_job("worker-2")["id"] == job_id
+
+
+def stored_business(db, website="N/A", **fields):
+    row = business("Joe's Plumbing", "Main St 1", "https://maps.google.com/?cid=1")
+    row.update(website=website, phone="+420 111 222 333", **fields)
+    return db.add_business(row)
+
+
+def test_apply_business_refresh_logs_changes(db):
+    """Test changed fields are updated and logged, and 'N/A' never overwrites a value"""
+    business_id = stored_business(db)
+    db.mark_refresh_failed(business_id)
+
+    changed = db.apply_business_refresh(business_id, {
+        "address": "Main St 1", "phone": "N/A", "website": "https://joes.example",
+    })
+    assert changed == ["website"]
+
+    row = db.conn.execute(
+        "SELECT phone, website, refresh_failures, last_updated FROM businesses"
+    ).fetchone()
+    assert row["phone"] == "+420 111 222 333"
+    assert row["website"] == "https://joes.example"
+    assert row["refresh_failures"] == 0
+    assert row["last_updated"] is not None
+
+    [change] = db.get_business_changes(business_id)
+    assert (change["field"], change["old_value"], change["new_value"]) == ("website", "N/A", "https://joes.example")
+    assert db.apply_business_refresh(business_id, {"website": "https://joes.example"}) == []
+
+
+def test_refresh_candidates_back_off_and_give_up(db):
+    """Test errored visits back off, and listings without a place stop after max_failures"""
+    business_id = stored_business(db)
+    assert db.get_businesses_to_refresh(3600, 10) == []  # scraped just now
+    db.conn.execute("UPDATE businesses SET scraped_at = datetime('now', '-2 hours')")
+    db.conn.commit()
+    assert [b["id"] for b in db.get_businesses_to_refresh(3600, 10)] == [business_id]
+
+    db.mark_refresh_attempt(business_id)
+    assert db.get_businesses_to_refresh(3600, 10, retry_after=600) == []
+    db.conn.execute("UPDATE businesses SET last_refresh_attempt = datetime('now', '-20 minutes')")
+    db.conn.commit()
+    assert len(db.get_businesses_to_refresh(3600, 10, retry_after=600)) == 1
+
+    for _ in range(3):
+        db.mark_refresh_failed(business_id)
+    db.conn.execute("UPDATE businesses SET last_refresh_attempt = datetime('now', '-20 minutes')")
+    db.conn.commit()
+    assert db.get_businesses_to_refresh(3600, 10, max_failures=4, retry_after=600) != []
+    assert db.get_businesses_to_refresh(3600, 10, max_failures=3, retry_after=600) == []
+
+
+def test_refresh_candidates_use_the_index(db):
+    """Test the refresh query is a range scan of idx_business_refresh"""
+    db.conn.execute("ANALYZE")
+    plan = " ".join(
+        row["detail"] for row in db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM businesses "
+            f"WHERE {NO_WEBSITE} = 1 AND {STALENESS} < datetime('now') "
+            "AND (last_refresh_attempt IS NULL OR last_refresh_attempt < datetime('now')) "
+            f"ORDER BY {STALENESS} LIMIT 10"
+        )
+    )
+    assert "idx_business_refresh" in plan
+    assert "TEMP B-TREE" not in plan
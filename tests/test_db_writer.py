@@ -0,0 +1,86 @@
+"""Tests for the single-writer persistence thread"""
+
+import threading
+
+import pytest
+
+from db import Database
+from db_writer import DatabaseWriter
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "leads.db")
+    Database(path).close()
+    return path
+
+
+def blocker():
+    """A write that holds the writer thread until released"""
+    started, release = threading.Event(), threading.Event()
+
+    def operation(db):
+        started.set()
+        release.wait(5)
+
+    return operation, started, release
+
+
+def test_failing_write_is_isolated_in_its_group(db_path):
+    """Test one failing op fails only its own Future, not the rest of the group commit"""
+    writer = DatabaseWriter(db_path, max_queue=10, max_batch=10)
+    operation, started, release = blocker()
+    writer.submit(operation)
+    assert started.wait(5)
+
+    def insert_then_fail(db):
+        db.add_job("electrician", "Brno", "CZ")
+        raise ValueError("bad row")
+
+    before = writer.commits
+    first = writer.submit("add_job", "plumber", "Prague", "CZ")
+    failing = writer.submit(insert_then_fail)
+    last = writer.submit("add_job", "roofer", "Prague", "CZ")
+    release.set()
+
+    assert first.result(5) is not None
+    assert last.result(5) is not None
+    with pytest.raises(ValueError):
+        failing.result(5)
+    writer.stop()
+
+    assert writer.commits == before + 2  # the blocker's group, then the three queued writes
+    assert writer.failures == 1
+    db = Database(db_path)
+    jobs = {row["category"] for row in db.get_pending_jobs()}
+    db.close()
+    assert jobs == {"plumber", "roofer"}
+
+
+def test_full_queue_blocks_submit(db_path):
+    """Test submit() waits for room instead of growing the queue"""
+    writer = DatabaseWriter(db_path, max_queue=1, max_batch=10)
+    operation, started, release = blocker()
+    writer.submit(operation)
+    assert started.wait(5)
+    writer.submit("add_job", "plumber", "Prague", "CZ")  # fills the queue
+
+    submitted = threading.Event()
+
+    def submit_more():
+        writer.submit("add_job", "roofer", "Prague", "CZ")
+        submitted.set()
+
+    thread = threading.Thread(target=submit_more, daemon=True)
+    thread.start()
+    assert not submitted.wait(0.3)
+    assert writer.pending == 1
+
+    release.set()
+    assert submitted.wait(5)
+    thread.join(5)
+    writer.stop()
+
+    db = Database(db_path)
+    assert db.count_jobs("pending") == 2
+    db.close()
@@ -0,0 +1,136 @@
+"""
+Offline extraction benchmarks (replayed from a recorded HAR, no network)
+
+Record a fixture once, then benchmark against it:
+    HAR_MODE=record python scraper_playwright.py
+    pytest tests/test_extraction_benchmark.py --benchmark-autosave
+    pytest tests/test_extraction_benchmark.py --benchmark-compare --benchmark-compare-fail=mean:10%
+
+DOM query counts are checked against tests/benchmarks/dom_queries.json.
+Write it with UPDATE_DOM_BASELINE=1 on the first run against a new HAR and
+after an intended change; without a baseline the check fails.
+"""
+
+import os
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("playwright.sync_api")
+
+from config import settings
+from browser_pool import BrowserPool
+from page_waits import PolitenessBudget, WaitStats, wait_for_selector
+from replay_harness import DomQueryCounter
+from scraper_playwright import GoogleMapsScraper, SEARCH_SELECTORS, RESULTS_SELECTOR
+
+HAR = Path(os.environ.get("HAR_PATH", settings.har_path))
+# Must match the search the HAR was recorded with
+QUERY = os.environ.get("HAR_QUERY", "plumbers in Prague, Czech Republic")
+MAX_RESULTS = int(os.environ.get("HAR_MAX_RESULTS", "20"))
+
+BASELINE = Path(__file__).parent / "benchmarks" / "dom_queries.json"
+TOLERANCE = 1.10
+
+pytestmark = pytest.mark.skipif(
+    not HAR.exists(), reason=f"no HAR fixture at {HAR} (record one with HAR_MODE=record)"
+)
+
+
+@pytest.fixture(scope="module")
+def replay_pool():
+    previous = settings.har_mode
+    settings.har_mode = "replay"
+    pool = BrowserPool()
+    pool.sessions.ttl = 0  # replay only: never read or touch saved live sessions
+    yield pool
+    pool.close()
+    settings.har_mode = previous
+
+
+@pytest.fixture
+def scraper(replay_pool):
+    scraper = GoogleMapsScraper(browser_pool=replay_pool)
+    scraper.waits = WaitStats()
+    scraper.politeness = PolitenessBudget(0, 0)  # time the page work, not the politeness sleeps
+    return scraper
+
+
+def open_results(scraper, pool):
+    """A replayed page showing the search results"""
+    pool.discard_context(None)  # fresh page state for every round
+    page = pool.new_page(None)
+    page.goto("https://www.google.com/maps", wait_until="domcontentloaded")
+    scraper._handle_consent(page)
+    search_box = page.locator(", ".join(SEARCH_SELECTORS)).first
+    search_box.fill(QUERY)
+    search_box.press("Enter")
+    wait_for_selector(page, RESULTS_SELECTOR, scraper.waits, state="attached")
+    return page
+
+
+def check_dom_queries(name, per_business):
+    """Fail when a run needs more DOM queries per business than the baseline"""
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    if os.environ.get("UPDATE_DOM_BASELINE"):
+        baseline[name] = round(per_business, 2)
+        BASELINE.parent.mkdir(exist_ok=True)
+        BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        return
+    assert name in baseline, (
+        f"No DOM query baseline for {name} in {BASELINE}: "
+        f"run once with UPDATE_DOM_BASELINE=1 and commit it"
+    )
+    assert per_business <= baseline[name] * TOLERANCE, (
+        f"{name}: {per_business:.1f} DOM queries per business, baseline {baseline[name]}"
+    )
+
+
+def test_scroll_and_extract(benchmark, scraper, replay_pool):
+    """Whole results feed: scrolling plus extraction of MAX_RESULTS businesses"""
+    counter = DomQueryCounter()
+
+    def setup():
+        scraper.businesses, scraper.cards_processed, scraper.seen_names = [], 0, set()
+        scraper.payloads = None
+        counter.reset()
+        return (counter.wrap(open_results(scraper, replay_pool)), MAX_RESULTS), {}
+
+    benchmark.pedantic(scraper._scroll_and_extract, setup=setup, rounds=3)
+
+    found = len(scraper.businesses)
+    assert found > 0
+    per_business = counter.total / found
+    benchmark.extra_info.update({
+        "businesses": found,
+        "seconds_per_business": benchmark.stats.stats.mean / found,
+        "dom_queries": counter.total,
+        "dom_queries_per_business": per_business,
+        "dom_query_breakdown": dict(counter.counts),
+    })
+    check_dom_queries("scroll_and_extract", per_business)
+
+
+def test_extract_business_data(benchmark, scraper, replay_pool):
+    """One card: click, wait for the panel, read every field"""
+    page = open_results(scraper, replay_pool)
+    scraper.payloads = None
+    listing = page.locator("div[role='feed'] > div > div:has(a[href*='/maps/place/'])").first
+    assert listing.count()
+
+    counter = DomQueryCounter()
+    counted_page = counter.wrap(page)
+    card = counter.wrap(listing)
+    business = benchmark.pedantic(
+        scraper._extract_business_data, args=(counted_page, card), rounds=5
+    )
+
+    assert business is None or business["name"]
+    per_business = counter.total / 5
+    benchmark.extra_info.update({
+        "dom_queries_per_business": per_business,
+        "dom_query_breakdown": dict(counter.counts),
+    })
+    check_dom_queries("extract_business_data", per_business)
@@ -0,0 +1,148 @@
+"""Tests for field parser module"""
+
+from field_parser import (
+    KeywordMatcher,
+    LabelTrie,
+    canonical_maps_url,
+    classify_panel,
+    classify_panels,
+    find_website,
+    is_listing_card,
+    parse_address_label,
+    parse_cards,
+    parse_count,
+    parse_phone_label,
+    parse_rating,
+)
+
+
+def panel(items=(), buttons=(), links=(), text=""):
+    return {"items": list(items), "buttons": list(buttons), "links": list(links), "text": text}
+
+
+def item(id="", aria="", href=""):
+    return {"id": id, "aria": aria, "href": href}
+
+
+def test_keyword_matcher_finds_any_keyword():
+    """Test Aho-Corasick matching, including overlapping keywords"""
+    matcher = KeywordMatcher(["he", "she", "hers", "site web"])
+
+    assert matcher.search("USHERS") == "she"
+    assert matcher.search("voir le Site Web") == "site web"
+    assert matcher.search("nothing here") == "he"
+    assert matcher.search("none") is None
+    assert "ahis" not in matcher
+
+
+def test_label_trie_strips_localized_prefixes():
+    """Test label stripping across locales and colon spacing"""
+    labels = LabelTrie(["Tel", "Telefon", "Téléphone", "Numéro de téléphone"])
+
+    assert labels.strip("Telefon: 602 123 456") == "602 123 456"
+    assert labels.strip("Tel: 602 123 456") == "602 123 456"
+    assert labels.strip("Numéro de téléphone : 01 23 45 67 89") == "01 23 45 67 89"
+    assert labels.strip("Téléphone : 01 23") == "01 23"
+    # A label only counts when followed by a colon
+    assert labels.strip("Telčská 5, Praha") == "Telčská 5, Praha"
+
+
+def test_parse_labels():
+    """Test address and phone aria-labels"""
+    assert parse_address_label("Adresse : 1 Rue de Rivoli, Paris") == "1 Rue de Rivoli, Paris"
+    assert parse_address_label("Dirección: Calle Mayor 1") == "Calle Mayor 1"
+    assert parse_phone_label("Phone: +420 602 123 456") == "+420 602 123 456"
+    assert parse_phone_label("Phone: call us") is None
+    assert parse_phone_label(None) is None
+
+
+def test_classify_panel_primary_controls():
+    """Test address, phone and website from the panel's data-item-id controls"""
+    result = classify_panel(panel(items=[
+        item("address", "Address: Main St 1, Prague"),
+        item("phone:tel:+420602123456", "Phone: +420 602 123 456"),
+        item("authority", "Website: example.cz", "https://example.cz/"),
+    ]))
+
+    assert result == {
+        "address": "Main St 1, Prague",
+        "phone": "+420 602 123 456",
+        "website": "https://example.cz/",
+        "has_website": "Yes",
+    }
+
+
+def test_classify_panel_fallbacks():
+    """Test fallbacks: social links skipped, website from a button label, phone from text"""
+    result = classify_panel(panel(
+        buttons=["Website: plumber.cz"],
+        links=[item(href="https://www.facebook.com/plumber")],
+        text="Open 24h\nCall 602 123 456",
+    ))
+
+    assert result["address"] == "N/A"
+    assert result["phone"] == "602 123 456"
+    assert result["website"] == "https://plumber.cz"
+    assert result["has_website"] == "Yes"
+
+
+def test_classify_panel_without_payload():
+    """Test a missing panel yields empty fields"""
+    assert classify_panels([None]) == [
+        {"address": "N/A", "phone": "N/A", "website": "N/A", "has_website": "No"}
+    ]
+
+
+def test_find_website_skips_google():
+    """Test URL extraction from text ignores Google links"""
+    assert find_website("see https://maps.app.goo.gl/x or www.example.com") == "https://www.example.com"
+    assert find_website("no links") is None
+
+
+def test_parse_cards():
+    """Test phone and address read from results card text"""
+    card = "Joe's Plumbing\n4.8(120)\nPlumber · Main Street 12, Prague\n+420 602 123 456"
+
+    assert parse_cards([card, ""]) == [
+        ("+420 602 123 456", "Plumber · Main Street 12, Prague"),
+        (None, None),
+    ]
+
+
+def test_rating_and_count():
+    """Test rating and review count parsing"""
+    assert parse_rating("4,6 étoiles") == 4.6
+    assert parse_rating("4.6 stars") == 4.6
+    assert parse_count("(1,234)") == 1234
+    assert parse_count("no reviews") is None
+
+
+def test_canonical_maps_url():
+    """Test place URLs collapse to one stable form"""
+    url = (
+        "https://www.google.com/maps/place/Joe%27s+Plumbing/@50.08,14.42,17z/"
+        "data=!4m6!3m5!1s0x470b:0x1234!8m2?hl=en&entry=ttu"
+    )
+
+    assert canonical_maps_url(url) == (
+        "https://www.google.com/maps/place/Joe's+Plumbing/data=!4m6!3m5!1s0x470b:0x1234!8m2"
+    )
+    assert canonical_maps_url("http://www.google.com/maps/place/Joe%27s+Plumbing") == (
+        "https://www.google.com/maps/place/Joe's+Plumbing"
+    )
+    assert canonical_maps_url("https://maps.google.com/?cid=123&hl=en") == (
+        "https://maps.google.com/?cid=123"
+    )
+    assert canonical_maps_url(None) is None
+
+
+def test_is_listing_card():
+    """Test ads and info cards are skipped while names containing 'ad' survive"""
+    assert is_listing_card("Bradley Plumbing", "Bradley Plumbing\n4.8(120)\nPlumber · Main St 1")
+    assert is_listing_card("Broadway Cafe", "Broadway Cafe\nCafe · Broadway 12")
+    assert is_listing_card("Ad Astra Dental", "Ad Astra Dental\nDentist · Ulice 5")
+
+    assert not is_listing_card("Sponsored", "Sponsored\nJoe's Plumbing\nPlumber")
+    assert not is_listing_card("Joe's Plumbing", "Joe's Plumbing\nAd · joesplumbing.com\nPlumber")
+    assert not is_listing_card("Résultats", "Résultats\nCertains de ces résultats")
+    assert not is_listing_card("Info", "Info\nRésultats personnalisés selon vos partenaires de Google")
@@ -0,0 +1,59 @@
+"""Tests for Maps XHR payload parsing"""
+
+import json
+
+from maps_payload import MapsPayloadCollector, feature_id_from_url
+
+
+def place(feature_id, name, address):
+    record = [None] * 40
+    record[10] = feature_id
+    record[11] = name
+    record[39] = address
+    return record
+
+
+def payload(*places):
+    return ")]}'\n" + json.dumps([[list(places)]])
+
+
+def card_href(name, feature_id):
+    return f"https://www.google.com/maps/place/{name}/data=!4m7!3m6!1s{feature_id}!8m2!3d50.1!4d14.4"
+
+
+def test_feature_id_from_url():
+    """Test the feature id is read from plain and URL-encoded hrefs"""
+    assert feature_id_from_url(card_href("Cafe", "0x470B:0x1A")) == "0x470b:0x1a"
+    assert feature_id_from_url("https://www.google.com/maps/place/Cafe/data=!1s0x1%3A0x2") == "0x1:0x2"
+    assert feature_id_from_url("https://maps.google.com/?cid=26") is None
+    assert feature_id_from_url(None) is None
+
+
+def test_chain_branches_stay_apart():
+    """Test branches sharing a name are matched by feature id, never merged"""
+    collector = MapsPayloadCollector()
+    collector.ingest(payload(
+        place("0x1:0xa", "Starbucks", "Main St 1"),
+        place("0x1:0xb", "Starbucks", "Station Rd 9"),
+    ))
+
+    first = collector.lookup("Starbucks", card_href("Starbucks", "0x1:0xa"))
+    second = collector.lookup("Starbucks", card_href("Starbucks", "0x1:0xb"))
+    assert first["address"] == "Main St 1"
+    assert second["address"] == "Station Rd 9"
+    # Ambiguous name without an id: no guess
+    assert collector.lookup("Starbucks") is None
+    # An id the payload did not include: no fallback to another branch
+    assert collector.lookup("Starbucks", card_href("Starbucks", "0x1:0xc")) is None
+
+
+def test_unique_name_fallback_and_merge():
+    """Test a unique name matches without an id, and repeats of one place merge"""
+    collector = MapsPayloadCollector(keep_raw=True)
+    collector.ingest(payload(place("0x2:0xa", "Joe's Plumbing", None)))
+    collector.ingest(payload(place("0x2:0xa", "Joe's Plumbing", "Main St 1")))
+
+    record = collector.lookup("joe's  plumbing")
+    assert record["address"] == "Main St 1"
+    assert record["maps_url"] == "https://maps.google.com/?cid=10"
+    assert len(collector.raw_places("Joe's Plumbing")) == 2
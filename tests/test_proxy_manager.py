@@ -127,3 +127,89 @@ def test_proxy_manager_no_proxies_returns_none():
 
     config = manager.get_playwright_config()
     assert config is None
+
+
+def test_proxy_manager_prefers_healthier_proxy(temp_proxy_file):
+    """Test that a fast, reliable proxy is picked before slower ones"""
+    manager = SmartProxyManager(str(temp_proxy_file))
+    slow, fast = manager.proxies[0], manager.proxies[1]
+
+    manager.mark_proxy_success(slow, latency=4.0)
+    manager.mark_proxy_success(fast, latency=0.5)
+
+    assert str(manager.get_next_proxy()) == str(fast)
+
+
+def test_proxy_manager_ban_opens_breaker(temp_proxy_file):
+    """Test that a single ban takes the proxy out of rotation"""
+    manager = SmartProxyManager(str(temp_proxy_file))
+    proxy = manager.proxies[0]
+
+    manager.mark_proxy_failure(proxy, banned=True)
+
+    picked = {str(manager.get_next_proxy()) for _ in range(4)}
+    assert str(proxy) not in picked
+
+    state = manager.get_state()
+    assert state["states"]["open"] == 1
+    banned = next(p for p in state["proxies"] if p["proxy"] == str(proxy))
+    assert banned["ban_score"] > 0
+
+
+def test_proxy_manager_half_open_single_trial(temp_proxy_file):
+    """Test that a half-open proxy is handed to one caller until it reports back"""
+    manager = SmartProxyManager(str(temp_proxy_file))
+    proxy = manager.proxies[0]
+    others = {str(p) for p in manager.proxies[1:]}
+
+    manager.mark_proxy_failure(proxy, banned=True)
+    manager.health[str(proxy)].open_until = 0  # breaker cooldown over
+    assert str(manager.get_next_proxy(exclude=others)) == str(proxy)
+    assert manager.get_next_proxy(exclude=others) is None
+
+    manager.mark_proxy_success(proxy)
+    assert str(manager.get_next_proxy(exclude=others)) == str(proxy)
+
+
+def test_proxy_manager_cooldown_and_exclude(temp_proxy_file):
+    """Test that cooling and excluded proxies are skipped"""
+    manager = SmartProxyManager(str(temp_proxy_file))
+    first, second, third = manager.proxies
+
+    manager.start_cooldown(first, 60)
+    proxy = manager.get_next_proxy(exclude={str(second)})
+
+    assert str(proxy) == str(third)
+    assert not manager.all_circuits_open()
+
+
+def test_proxy_manager_reservations(temp_proxy_file):
+    """Test that a reserved proxy is held until released"""
+    manager = SmartProxyManager(str(temp_proxy_file))
+
+    held = [manager.reserve_proxy() for _ in range(3)]
+    assert len({str(p) for p in held}) == 3
+    assert manager.reserve_proxy() is None
+
+    manager.release_proxy(held[0])
+    assert str(manager.reserve_proxy()) == str(held[0])
+
+    manager.release_proxy(held[1], cooldown=60)
+    assert manager.reserve_proxy() is None
+
+
+def test_proxy_manager_health_survives_restart(temp_proxy_file):
+    """Test that drained health records restore into a fresh manager"""
+    manager = SmartProxyManager(str(temp_proxy_file))
+    proxy = manager.get_next_proxy()
+    manager.mark_proxy_success(proxy, latency=1.5)
+    manager.mark_proxy_failure(proxy)
+
+    records = {r["proxy"]: r for r in manager.drain_dirty()}
+    assert manager.drain_dirty() == []
+
+    restarted = SmartProxyManager(str(temp_proxy_file))
+    assert restarted.restore_health(records) == 1
+    health = restarted.health[str(proxy)]
+    assert health.latency_ewma == 1.5
+    assert restarted.proxy_failures.get(str(proxy), 0) == 1
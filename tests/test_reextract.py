@@ -0,0 +1,32 @@
+"""Tests for offline re-extraction from the raw archive"""
+
+from db import Database
+from raw_archive import RawArchive, load_record
+from reextract import reextract_record
+
+
+def test_reextract_updates_row_stored_under_other_href(tmp_path):
+    """Test an archived href with tracking params still finds the stored row"""
+    stored = "https://www.google.com/maps/place/Joe%27s+Plumbing/@50.08,14.42,17z/data=!4m2!1s0x1"
+    archived = "https://www.google.com/maps/place/Joe's+Plumbing/data=!4m2!1s0x1?hl=en&entry=ttu"
+
+    db = Database(str(tmp_path / "leads.db"))
+    db.add_businesses([{"name": "Joe's Plumbing", "address": "N/A", "maps_url": stored}])
+
+    archive = RawArchive(tmp_path / "raw_archive", enabled=True)
+    panel = {
+        "items": [{"id": "address", "aria": "Address: Main St 1, Prague", "href": ""}],
+        "buttons": [],
+        "links": [],
+        "text": "",
+    }
+    archive.put(archived, "Joe's Plumbing", panel)
+    [path] = archive.paths()
+    assert path == archive.path(stored)
+
+    row = reextract_record(load_record(path))
+    assert db.update_business_fields([row]) == 1
+
+    address = db.conn.execute("SELECT address FROM businesses").fetchone()[0]
+    assert address == "Main St 1, Prague"
+    db.close()
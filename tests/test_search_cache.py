@@ -0,0 +1,93 @@
+"""Tests for the search result cache"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import search_cache
+from config import settings
+from db import Database
+
+
+class InlineWriter:
+    """DatabaseWriter stand-in that applies writes immediately"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def submit(self, operation, *args, **kwargs):
+        return getattr(self.db, operation)(*args, **kwargs)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "search_cache_ttl", 86400)
+    database = Database(str(tmp_path / "leads.db"))
+    yield database
+    database.close()
+
+
+LISTINGS = {
+    "https://www.google.com/maps/place/A/data=!1s0x1:0xa": "A",
+    "https://www.google.com/maps/place/B/data=!1s0x1:0xb": "B",
+}
+
+
+def age(db, days):
+    """Move every cached search and listing `days` into the past"""
+    past = datetime.now() - timedelta(days=days)
+    db.conn.execute("UPDATE search_cache SET last_scraped = ?", (past,))
+    db.conn.execute("UPDATE search_results SET seen_at = ?", (past,))
+    db.conn.commit()
+
+
+def test_search_key_normalizes():
+    """Test case, spacing and Unicode form do not split a search"""
+    assert search_cache.search_key("Plumbers ", "PRAGUE", "Czech  Republic") == "plumbers|prague|czech republic"
+    assert search_cache.search_key("Café", "Brno") == search_cache.search_key("Café", "brno")
+
+
+def test_skip_mode_marks_fresh_search(db, monkeypatch):
+    """Test a recorded search reads as fresh in skip mode, with no known listings loaded"""
+    monkeypatch.setattr(settings, "search_cache_mode", "skip")
+    assert not search_cache.lookup(db, "Plumbers", "Prague", "CZ").fresh
+
+    assert search_cache.record(InlineWriter(db), "Plumbers", "Prague", "CZ", LISTINGS)
+    cached = search_cache.lookup(db, "plumbers", "prague", "cz")
+    assert cached.fresh
+    assert cached.result_count == 2
+    assert cached.known == set()
+
+
+def test_delta_mode_returns_known_listings(db, monkeypatch):
+    """Test delta mode loads the listings seen within the TTL"""
+    monkeypatch.setattr(settings, "search_cache_mode", "delta")
+    search_cache.record(InlineWriter(db), "Plumbers", "Prague", "CZ", LISTINGS)
+
+    cached = search_cache.lookup(db, "Plumbers", "Prague", "CZ")
+    assert cached.known == set(LISTINGS)
+
+
+def test_entries_expire_after_ttl(db, monkeypatch):
+    """Test a search and its listings older than SEARCH_CACHE_TTL are stale"""
+    monkeypatch.setattr(settings, "search_cache_mode", "delta")
+    search_cache.record(InlineWriter(db), "Plumbers", "Prague", "CZ", LISTINGS)
+    age(db, days=2)
+
+    cached = search_cache.lookup(db, "Plumbers", "Prague", "CZ")
+    assert cached.last_scraped is not None
+    assert not cached.fresh
+    assert cached.known == set()
+
+
+def test_only_completed_runs_are_recorded(db, monkeypatch):
+    """Test an incomplete run leaves the cache untouched, and 'off' records nothing"""
+    monkeypatch.setattr(settings, "search_cache_mode", "skip")
+    writer = InlineWriter(db)
+
+    assert not search_cache.record(writer, "Plumbers", "Prague", "CZ", LISTINGS, completed=False)
+    assert db.get_search_cache(search_cache.search_key("Plumbers", "Prague", "CZ")) is None
+
+    monkeypatch.setattr(settings, "search_cache_mode", "off")
+    assert not search_cache.record(writer, "Plumbers", "Prague", "CZ", LISTINGS)
+    assert not search_cache.lookup(db, "Plumbers", "Prague", "CZ").fresh
@@ -0,0 +1,160 @@
+"""
+Per-phase timing
+span()/Stopwatch.lap() time the phases of a scrape (browser launch,
+navigation, consent, search, scrolls, card clicks, field extraction,
+DB writes). Every measurement feeds the process-wide Prometheus
+histograms (/metrics) and, while a job is active in the current
+thread/task, that job's JobTimer, which is stored in job_timings.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Histogram buckets in seconds
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current: ContextVar[Optional["JobTimer"]] = ContextVar("job_timer", default=None)
+
+
+class PhaseStats:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class JobTimer:
+    """Phase totals for one job, split by the proxy in use at the time"""
+
+    def __init__(self, job_id: Optional[int] = None, proxy: Optional[str] = None):
+        self.job_id = job_id
+        self.proxy = proxy
+        self.started = time.perf_counter()
+        self.phases: Dict[Tuple[str, Optional[str]], PhaseStats] = {}
+
+    def record(self, phase: str, seconds: float):
+        key = (phase, self.proxy)
+        stats = self.phases.get(key)
+        if stats is None:
+            stats = self.phases[key] = PhaseStats()
+        stats.add(seconds)
+
+    def rows(self) -> List[Dict]:
+        """Rows for Database.save_job_timings()"""
+        return [
+            {
+                "phase": phase,
+                "proxy": proxy,
+                "count": stats.count,
+                "total_seconds": round(stats.total, 4),
+                "max_seconds": round(stats.max, 4),
+            }
+            for (phase, proxy), stats in self.phases.items()
+        ]
+
+    def summary(self, top: int = 5) -> str:
+        totals: Dict[str, float] = {}
+        for (phase, _), stats in self.phases.items():
+            totals[phase] = totals.get(phase, 0.0) + stats.total
+        wall = time.perf_counter() - self.started
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+        parts = ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in ranked)
+        return f"{wall:.1f}s wall; {parts}" if parts else f"{wall:.1f}s wall"
+
+
+class PhaseMetrics:
+    """Process-wide histograms per phase, rendered in Prometheus text format"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # phase -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[str, List[float]] = {}
+
+    def observe(self, phase: str, seconds: float):
+        with self._lock:
+            series = self._series.get(phase)
+            if series is None:
+                series = self._series[phase] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += seconds
+
+    def render(self) -> str:
+        lines = [
+            "# HELP scraper_phase_seconds Time spent per scrape phase",
+            "# TYPE scraper_phase_seconds histogram",
+        ]
+        with self._lock:
+            series = {phase: list(values) for phase, values in sorted(self._series.items())}
+        for phase, values in series.items():
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'scraper_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {count}')
+            count = values[len(self.buckets)]
+            lines.append(f'scraper_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {count}')
+            lines.append(f'scraper_phase_seconds_sum{{phase="{phase}"}} {values[-1]:.6f}')
+            lines.append(f'scraper_phase_seconds_count{{phase="{phase}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+metrics = PhaseMetrics()
+
+
+def record(phase: str, seconds: float):
+    """Add one measurement to the metrics and the active job, if any"""
+    metrics.observe(phase, seconds)
+    timer = _current.get()
+    if timer is not None:
+        timer.record(phase, seconds)
+
+
+@contextmanager
+def span(phase: str):
+    """Time a block as `phase` (also when it raises)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+
+
+class Stopwatch:
+    """Split timer for straight-line code: lap(phase) records time since the last lap"""
+
+    def __init__(self):
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        record(phase, now - self._last)
+        self._last = now
+
+
+def activate(timer: JobTimer):
+    """Attribute spans in this thread/task to `timer`; returns a token for deactivate()"""
+    return _current.set(timer)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def set_proxy(proxy: Optional[str]):
+    """Attribute the active job's following spans to another proxy"""
+    timer = _current.get()
+    if timer is not None:
+        timer.proxy = proxy